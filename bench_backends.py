@@ -0,0 +1,81 @@
+"""
+Time the dashboard's Home and Analysis queries on each data backend.
+
+Runs the same calls the pages make (the per-table Home summaries, state map,
+ranked states, filter options, filtered reads) against the database at
+settings.DB_URL, the Parquet snapshot and DuckDB over that snapshot, and prints
+the median time per query.
+
+    python bench_backends.py --backends sql duckdb --repeat 5
+"""
+import argparse
+import statistics
+import time
+
+import settings
+from datasource import create_db_engine, create_source
+from hierarchy import COUNTRY
+from queries import HOME_SUMMARY_TABLES
+
+ANALYSIS_TABLES = ["agg_trans", "map_trans", "top_trans"]
+
+
+def _cases(source, tables):
+    """(label, call) for every query the Home and Analysis pages issue."""
+    # One summary query per table, as the Home page issues them
+    cases = [(f"{table} summary", lambda t=table: source.table_summary(t)) for table in HOME_SUMMARY_TABLES]
+    cases += [
+        ("state map", source.state_rollup),
+        ("ranked states", lambda: source.children("payments", "state", COUNTRY)),
+    ]
+    for table in tables:
+        options = source.filter_options(table)
+        year = options["year"][-1] if options["year"] else "All"
+        quarter = options["quarter"][0] if options["quarter"] else "All"
+        state = options["state"][0] if options["state"] else "All"
+        cases += [
+            (f"{table} filter options", lambda t=table: source.filter_options(t)),
+            (f"{table} all rows", lambda t=table: source.filtered(t)),
+            (f"{table} year", lambda t=table: source.filtered(t, year=year)),
+            (f"{table} year+quarter+state",
+             lambda t=table: source.filtered(t, year=year, quarter=quarter, state=state)),
+        ]
+    return cases
+
+
+def run(source, tables, repeat):
+    source.check()
+    source.data_version()
+    timings = {}
+    for label, call in _cases(source, tables):
+        call()  # warm-up: first-touch file reads and view setup
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            call()
+            runs.append(time.perf_counter() - start)
+        timings[label] = statistics.median(runs)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dashboard queries per data backend.")
+    parser.add_argument("--backends", nargs="+", default=["sql", "parquet", "duckdb"],
+                        choices=["sql", "parquet", "duckdb"])
+    parser.add_argument("--tables", nargs="+", default=ANALYSIS_TABLES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for backend in args.backends:
+        engine = create_db_engine(settings.DB_URL) if backend == "sql" else None
+        results[backend] = run(create_source(backend, engine), args.tables, args.repeat)
+
+    labels = list(next(iter(results.values())))
+    print(f"{'query':<36}" + "".join(f"{b:>12}" for b in results))
+    for label in labels:
+        print(f"{label:<36}" + "".join(f"{results[b][label] * 1000:>10.1f}ms" for b in results))
+
+
+if __name__ == "__main__":
+    main()
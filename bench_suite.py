@@ -0,0 +1,286 @@
+"""
+Benchmark suite for the dashboard's hot paths on synthetic data.
+
+Generates Pulse-shaped data with synthetic.py, loads it into a throwaway SQLite
+database and Parquet snapshot (DuckDB reads the snapshot when installed) and
+times, per group:
+
+  - ingest:   parsing the JSON tree, bulk loading, writing the snapshot and
+              deriving the growth metrics and geographic levels
+  - analysis: get_data, filtered reads per backend and views of the shared
+              dataset (range slices, and the positional index for districts)
+  - home:     the Home KPI (per table and fetched concurrently, as the Home page
+              does), state map, growth metric and drill-down reads per backend
+  - charts:   render_5_charts figure construction (Streamlit calls run headless)
+
+Results (min/median/mean/max/stddev per case) can be saved as a baseline and a
+later run compared against it; the exit status is 1 when a case got slower than
+the threshold, so CI can fail a PR on it.
+
+    python bench_suite.py --scale medium --save benchmarks/baseline.json
+    python bench_suite.py --scale medium --compare benchmarks/baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import settings
+from bulk_load import bulk_load, create_bulk_engine
+from datasource import DuckDBSource, ParquetSource, SQLSource, write_snapshot_table
+from growth import build_growth_from_db
+from hierarchy import COUNTRY, build_geo_levels_from_db
+from ingest import load_table, mark_data_changed
+from queries import HOME_SUMMARY_TABLES, build_state_rollup, fetch_state_rollup, fetch_table_summary, get_data
+from registry import DatasetRegistry
+from synthetic import SCALES, Scale, generate_tables, write_pulse_tree
+
+GROUPS = ["ingest", "analysis", "home", "charts"]
+
+# case study -> (table, category, count, amount), as on the Analysis page
+CHART_CASES = {
+    "agg_trans": ("transaction_type", "transaction_count", "transaction_amount"),
+    "map_user": ("district", "registered_users", "app_opens"),
+}
+
+
+# ----------------------------------
+# SETUP
+# ----------------------------------
+class Workspace:
+    """Synthetic Pulse tree, SQLite database and Parquet snapshot under one directory."""
+
+    def __init__(self, root, scale, seed=0):
+        self.root = root
+        self.scale = scale
+        self.pulse_dir = os.path.join(root, "pulse")
+        self.snapshot_dir = os.path.join(root, "snapshot")
+        self.db_url = f"sqlite:///{os.path.join(root, 'bench.db')}"
+        write_pulse_tree(self.pulse_dir, scale, seed)
+        self.tables = generate_tables(scale, seed)
+        self.engine = create_bulk_engine(self.db_url)
+        for table, df in self.tables.items():
+            with self.engine.begin() as conn:
+                bulk_load(df, table, conn, if_exists="replace")
+            write_snapshot_table(df, table, self.snapshot_dir)
+        mark_data_changed(self.engine, self.snapshot_dir)
+
+    def sources(self):
+        sources = {"sql": SQLSource(self.engine), "parquet": ParquetSource(self.snapshot_dir)}
+        try:
+            sources["duckdb"] = DuckDBSource(self.snapshot_dir)
+        except ImportError:
+            pass  # duckdb is optional
+        return sources
+
+
+def _filters(df):
+    """label -> (year, quarter, state, district) filters, including multi-selects."""
+    year, quarter, state = df["year"].max(), df["quarter"].min(), df["state"].iloc[0]
+    states = df["state"].unique()[:3].tolist()
+    filters = {
+        "year": (year, "All", "All", "All"),
+        "year+quarter+state": (year, quarter, state, "All"),
+        "3 states+year": (year, "All", states, "All"),
+    }
+    if "district" in df.columns:
+        filters["district"] = ("All", "All", "All", df["district"].iloc[0])
+    return filters
+
+
+# ----------------------------------
+# CASES
+# ----------------------------------
+def ingest_cases(ws):
+    table = "map_trans"
+    df = ws.tables[table]
+    snapshot = os.path.join(ws.root, "snapshot_bench")
+    yield f"load_table {table} (1 worker)", lambda: load_table(table, ws.pulse_dir, workers=1)
+    workers = max(2, settings.INGEST_WORKERS)
+    yield f"load_table {table} ({workers} workers)", lambda: load_table(table, ws.pulse_dir, workers=workers)
+
+    def load():
+        with ws.engine.begin() as conn:
+            bulk_load(df, "bench_load", conn, if_exists="replace")
+    yield f"bulk_load {table} sqlite", load
+    yield f"write_snapshot_table {table}", lambda: write_snapshot_table(df, table, snapshot)
+
+    def derive():
+        with ws.engine.connect() as conn:
+            build_growth_from_db(conn)
+    yield "build_growth_from_db sqlite", derive
+
+    def levels():
+        with ws.engine.connect() as conn:
+            build_geo_levels_from_db(conn)
+    yield "build_geo_levels_from_db sqlite", levels
+
+
+def analysis_cases(ws):
+    sources = ws.sources()
+    registry = DatasetRegistry(sources["parquet"], os.path.join(ws.root, "shared"))
+    for table in CHART_CASES:
+        frame = ws.tables[table]
+        yield f"get_data {table}", lambda t=table: get_data(ws.engine, t)
+        for label, filters in _filters(frame).items():
+            for name, source in sources.items():
+                yield (f"{name} filtered {table} {label}",
+                       lambda s=source, t=table, f=filters: s.filtered(t, None, *f))
+            # What the Analysis page reads with PHONEPE_SHARED_DATASET=1 (the default)
+            yield (f"shared view {table} {label}",
+                   lambda t=table, f=filters: registry.view(t, 0, None, *f))
+
+
+def fetch_home_concurrently(source, pool):
+    """The Home page's fetch: one table_summary per table plus the state rollup, on a thread pool."""
+    futures = [pool.submit(source.table_summary, table) for table in HOME_SUMMARY_TABLES]
+    futures.append(pool.submit(source.state_rollup))
+    return [future.result() for future in futures]
+
+
+def home_cases(ws):
+    for table in HOME_SUMMARY_TABLES:
+        yield f"fetch_table_summary sqlite {table}", lambda t=table: fetch_table_summary(ws.engine, t)
+    yield "fetch_state_rollup sqlite (stored)", lambda: fetch_state_rollup(ws.engine)
+
+    def rebuild():
+        with ws.engine.connect() as conn:
+            build_state_rollup(conn)
+    yield "build_state_rollup sqlite", rebuild
+    pool = ThreadPoolExecutor(max_workers=settings.HOME_QUERY_WORKERS, thread_name_prefix="bench-home")
+    for name, source in ws.sources().items():
+        if name != "sql":
+            for table in HOME_SUMMARY_TABLES:
+                yield f"{name} table_summary {table}", lambda s=source, t=table: s.table_summary(t)
+            yield f"{name} state_rollup", source.state_rollup
+        yield (f"{name} Home fetch ({settings.HOME_QUERY_WORKERS} workers)",
+               lambda s=source: fetch_home_concurrently(s, pool))
+        yield f"{name} growth_metrics agg_trans", lambda s=source: s.growth_metrics("agg_trans")
+        yield f"{name} children top 5 states", lambda s=source: s.children("payments", "state", COUNTRY, limit=5)
+        state = ws.scale.state_slugs()[0]
+        yield (f"{name} children top 10 districts",
+               lambda s=source: s.children("transactions", "district", state, limit=10))
+
+
+def chart_cases(ws):
+    # Imported here: charts pulls in Streamlit, which the other groups do not need
+    from streamlit import config
+    from streamlit.logger import set_log_level
+
+    from charts import render_5_charts
+
+    # Outside `streamlit run` every st.* call warns about the missing script context. The config
+    # (parsed on first use) resets the log level, so parse it before lowering the level.
+    config.get_option("logger.level")
+    set_log_level("error")
+    for table, (category, count, amount) in CHART_CASES.items():
+        df = ws.tables[table]
+        yield (f"render_5_charts {table} ({len(df):,} rows)",
+               lambda d=df, t=table, c=category, n=count, a=amount: render_5_charts(d, c, n, a, t))
+
+
+CASES = {"ingest": ingest_cases, "analysis": analysis_cases, "home": home_cases, "charts": chart_cases}
+
+
+# ----------------------------------
+# RUNNER
+# ----------------------------------
+def measure(call, rounds, warmup=1):
+    for _ in range(warmup):
+        call()
+    runs = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        call()
+        runs.append(time.perf_counter() - start)
+    return {
+        "min": min(runs),
+        "max": max(runs),
+        "mean": statistics.mean(runs),
+        "median": statistics.median(runs),
+        "stddev": statistics.stdev(runs) if len(runs) > 1 else 0.0,
+        "rounds": rounds,
+    }
+
+
+def run(ws, groups, rounds):
+    results = []
+    for group in groups:
+        for name, call in CASES[group](ws):
+            results.append({"group": group, "name": name, "stats": measure(call, rounds)})
+            print(f"{group:<9} {name:<52} {results[-1]['stats']['median'] * 1000:>10.2f}ms", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print current vs baseline medians; returns the names of cases slower than 1 + threshold."""
+    before = {b["name"]: b["stats"]["median"] for b in baseline["benchmarks"]}
+    regressions = []
+    print(f"{'case':<62}{'baseline':>12}{'current':>12}{'change':>9}")
+    for result in results:
+        name, median = result["name"], result["stats"]["median"]
+        if name not in before:
+            print(f"{name:<62}{'-':>12}{median * 1000:>10.2f}ms{'new':>9}")
+            continue
+        change = median / before[name] - 1 if before[name] else 0.0
+        flag = " !" if change > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<62}{before[name] * 1000:>10.2f}ms{median * 1000:>10.2f}ms{change:>+8.0%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's hot paths on synthetic data.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=GROUPS)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="Write the results as a baseline JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative median slowdown reported as a regression")
+    parser.add_argument("--workdir", help="Keep the generated data here instead of a temporary directory")
+    args = parser.parse_args(argv)
+
+    root = args.workdir or tempfile.mkdtemp(prefix="phonepe_bench_")
+    try:
+        scale = Scale.preset(args.scale)
+        ws = Workspace(root, scale, args.seed)
+        results = run(ws, args.groups, args.rounds)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        "datetime": datetime.now(timezone.utc).isoformat(),
+        "scale": args.scale,
+        "machine_info": {"python": platform.python_version(), "platform": platform.platform(),
+                         "cpu_count": os.cpu_count()},
+        "benchmarks": results,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {len(results)} results to {args.save}")
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != args.scale:
+            print(f"warning: baseline was recorded at scale {baseline.get('scale')!r}", file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than +{args.threshold:.0%}: " + ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
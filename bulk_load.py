@@ -0,0 +1,171 @@
+"""
+Bulk loading of DataFrames into the dashboard database.
+
+Replaces DataFrame.to_sql's default small insert batches with one of:
+  - infile:   CSV chunks loaded with MySQL's LOAD DATA LOCAL INFILE
+  - copy:     CSV chunks loaded with DuckDB's COPY ... FROM
+  - multirow: large multi-row INSERT batches (any SQLAlchemy backend, e.g. SQLite)
+
+Everything for one table runs inside a single transaction.
+
+Benchmark without MySQL:
+    python bulk_load.py --url sqlite:///bench.db --rows 500000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, inspect
+
+import settings
+
+NULL_MARKER = "\\N"
+
+
+def default_method(dialect_name):
+    if settings.BULK_LOAD_METHOD != "auto":
+        return settings.BULK_LOAD_METHOD
+    if dialect_name == "mysql":
+        return "infile"
+    if dialect_name == "duckdb":
+        return "copy"
+    return "multirow"
+
+
+def create_bulk_engine(url=None):
+    """Engine for loading; enables LOAD DATA LOCAL INFILE on MySQL."""
+    url = url or settings.DB_URL
+    connect_args = {"local_infile": True} if url.startswith("mysql") else {}
+    return create_engine(url, connect_args=connect_args)
+
+
+def _iter_chunks(df, chunk_size):
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def _write_csv(chunk, path, na_rep):
+    chunk.to_csv(path, index=False, header=False, na_rep=na_rep, lineterminator="\n")
+
+
+def _load_infile(conn, table, chunk, columns, tmp_dir):
+    path = os.path.join(tmp_dir, f"{table}.csv")
+    _write_csv(chunk, path, NULL_MARKER)
+    conn.exec_driver_sql(
+        f"LOAD DATA LOCAL INFILE '{path.replace(os.sep, '/')}' INTO TABLE {table} "
+        "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+        f"LINES TERMINATED BY '\\n' ({', '.join(columns)})"
+    )
+
+
+def _load_copy(conn, table, chunk, columns, tmp_dir):
+    path = os.path.join(tmp_dir, f"{table}.csv")
+    _write_csv(chunk, path, "")
+    conn.exec_driver_sql(f"COPY {table} ({', '.join(columns)}) FROM '{path}' (HEADER false)")
+
+
+def _placeholder(dialect):
+    return "?" if dialect.paramstyle in ("qmark", "numeric") else "%s"
+
+
+def _load_multirow(conn, table, chunk, columns, tmp_dir):
+    # Convert column-wise to plain Python objects so every DBAPI driver accepts them
+    values = [chunk[col].astype(object).where(chunk[col].notna(), None).tolist() for col in columns]
+    rows = list(zip(*values))
+    row_sql = "(" + ", ".join([_placeholder(conn.dialect)] * len(columns)) + ")"
+    # Stay below the bound-parameter limit of the backend (SQLite allows 32766)
+    per_statement = max(1, min(settings.BULK_INSERT_ROWS, 32000 // len(columns)))
+    for start in range(0, len(rows), per_statement):
+        batch = rows[start:start + per_statement]
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ", ".join([row_sql] * len(batch))
+        conn.exec_driver_sql(sql, tuple(v for row in batch for v in row))
+
+
+LOADERS = {
+    "infile": _load_infile,
+    "copy": _load_copy,
+    "multirow": _load_multirow,
+}
+
+
+def bulk_load(df, table, conn, if_exists="append", chunk_size=None, method=None):
+    """
+    Load `df` into `table` over an open connection (the caller owns the transaction).
+
+    Returns a dict with rows, seconds, rows_per_sec and the method used.
+    """
+    chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+    method = method or default_method(conn.dialect.name)
+    loader = LOADERS[method]
+    columns = list(df.columns)
+
+    start = time.perf_counter()
+    # Let pandas derive the table DDL from the frame, then stream rows ourselves
+    if if_exists == "replace" or not inspect(conn).has_table(table):
+        df.head(0).to_sql(table, con=conn, if_exists="replace", index=False)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for chunk in _iter_chunks(df, chunk_size):
+            loader(conn, table, chunk, columns, tmp_dir)
+
+    seconds = time.perf_counter() - start
+    return {
+        "table": table,
+        "rows": len(df),
+        "seconds": seconds,
+        "rows_per_sec": len(df) / seconds if seconds > 0 else 0.0,
+        "method": method,
+    }
+
+
+def format_stats(stats):
+    return (f"{stats['table']}: {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+            f"({stats['rows_per_sec']:,.0f} rows/sec, {stats['method']})")
+
+
+# ----------------------------------
+# BENCHMARK
+# ----------------------------------
+def _sample_frame(rows, seed=0):
+    """District-level frame shaped like map_trans."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "state": rng.choice([f"state-{i}" for i in range(36)], rows),
+        "year": rng.integers(2018, 2025, rows),
+        "quarter": rng.integers(1, 5, rows),
+        "district": rng.choice([f"district {i}" for i in range(800)], rows),
+        "transaction_type": "TOTAL",
+        "transaction_count": rng.integers(0, 10_000_000, rows),
+        "transaction_amount": rng.random(rows) * 1e9,
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark bulk_load against DataFrame.to_sql.")
+    parser.add_argument("--url", default="sqlite:///bulk_bench.db")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=settings.BULK_CHUNK_SIZE)
+    parser.add_argument("--method", choices=sorted(LOADERS))
+    args = parser.parse_args(argv)
+
+    df = _sample_frame(args.rows)
+    engine = create_bulk_engine(args.url)
+
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        df.to_sql("bench_to_sql", con=conn, if_exists="replace", index=False)
+    seconds = time.perf_counter() - start
+    print(format_stats({"table": "bench_to_sql", "rows": len(df), "seconds": seconds,
+                        "rows_per_sec": len(df) / seconds, "method": "to_sql"}))
+
+    with engine.begin() as conn:
+        stats = bulk_load(df, "bench_bulk", conn, if_exists="replace",
+                          chunk_size=args.chunk_size, method=args.method)
+    print(format_stats(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Small in-process caches shared by every Streamlit session.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe key -> value cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, ttl, maxsize=128):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            if len(self._data) >= self.maxsize:
+                # Drop expired entries first, then the one closest to expiry
+                for k in [k for k, (expires, _) in self._data.items() if expires <= now]:
+                    del self._data[k]
+                if len(self._data) >= self.maxsize:
+                    del self._data[min(self._data, key=lambda k: self._data[k][0])]
+            self._data[key] = (now + self.ttl, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._data),
+            }
+
+
+def sizeof(value):
+    """Approximate memory footprint of a cached value in bytes."""
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by total byte size, with per-entry TTL.
+
+    Entries belong to a data version: the first lookup with a newer version
+    drops everything cached for the old one.
+    """
+
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _set_version(self, version):
+        if version != self.version:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self.bytes = 0
+            self.version = version
+
+    def _pop(self, key):
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+
+    def get_or_compute(self, key, compute, version=None):
+        now = time.monotonic()
+        with self._lock:
+            self._set_version(version)
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._pop(key)
+            self.misses += 1
+
+        value = compute()
+        size = sizeof(value)
+        with self._lock:
+            # The data version may have moved on while we were computing
+            if version != self.version or size > self.max_bytes:
+                return value
+            if key in self._data:
+                self._pop(key)
+            while self._data and self.bytes + size > self.max_bytes:
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+            self._data[key] = (now + self.ttl, value, size)
+            self.bytes += size
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class FigureCache:
+    """
+    LRU cache of built Plotly figures (and the aggregations behind them) shared by every session.
+
+    Keys carry the data version (and anything else the figure depends on), so a new
+    load simply misses. Each entry remembers how long it took to build, which hits
+    report as build time saved.
+    """
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.build_seconds = 0.0
+        self.saved_seconds = 0.0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += entry[1]
+                return entry[0]
+            self.misses += 1
+
+        start = time.perf_counter()
+        figure = build()
+        seconds = time.perf_counter() - start
+        with self._lock:
+            self.build_seconds += seconds
+            self._data[key] = (figure, seconds)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return figure
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._data),
+                "build_seconds_total": self.build_seconds,
+                "saved_seconds_total": self.saved_seconds,
+            }
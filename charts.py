@@ -0,0 +1,435 @@
+"""
+Chart sections for the Analysis page and the Home page map.
+"""
+import plotly.express as px
+import streamlit as st
+
+import instrument
+import settings
+from sampling import box_figure, box_stats, histogram_counts, stratified_sample
+
+ROWS_COL = "_rows"
+
+
+def show_chart(name, fig):
+    """st.plotly_chart as a timed "chart" span, with the payload size when settings.TIMING_PAYLOAD is set."""
+    # Measured outside the span so the extra encoding does not count as render time
+    fields = {"bytes": instrument.payload_bytes(fig)} if settings.TIMINGS and settings.TIMING_PAYLOAD else {}
+    with instrument.span("chart", name, **fields):
+        st.plotly_chart(fig, width="stretch")
+
+
+def build_cube(df, category_col, metric_count, metric_amount):
+    """
+    One aggregation pass over the filtered rows: sums of count/amount (plus the
+    number of non-null amounts) per (year, quarter, category). Every aggregate
+    chart in render_5_charts slices this small frame instead of the raw rows.
+    """
+    keys = [k for k in dict.fromkeys(["year", "quarter", category_col]) if k in df.columns]
+    return (
+        df.groupby(keys, observed=True, sort=False)
+        .agg(**{
+            metric_count: (metric_count, "sum"),
+            metric_amount: (metric_amount, "sum"),
+            ROWS_COL: (metric_amount, "count"),
+        })
+        .reset_index()
+    )
+
+
+class ChartContext:
+    """
+    One filtered selection as seen by the chart sections.
+
+    Aggregations and figures are built on first use. With a `cache` they are stored
+    under `cache_key` (the filter state) so reopening a section, in any session,
+    reuses them. Cached objects are shared and must not be modified.
+    """
+
+    def __init__(self, df, category_col, metric_count, metric_amount, cache=None, cache_key=None, overview=None,
+                 growth=None, drill_down=None):
+        self.df = df
+        self.category_col = category_col
+        self.metric_count = metric_count
+        self.metric_amount = metric_amount
+        self.cache = cache
+        self.cache_key = cache_key
+        self.overview = overview
+        self.growth = growth
+        self.drill_down = drill_down
+        # Determine the column to use for Pie Charts (Category or State)
+        # Fallback to 'state' if category_col is not present
+        self.pie_col = category_col if category_col in df.columns else "state"
+        # Above the point budget the raw rows are replaced by a sample / pre-binned counts / quartiles
+        self.budget = settings.CHART_POINT_BUDGET
+        self.reduced = len(df) > self.budget
+
+    def cached(self, name, build, kind="figure"):
+        # Only actual builds are timed; cache hits cost nothing worth reporting
+        def timed_build():
+            return instrument.timed(kind, name, build)
+        if self.cache is None or self.cache_key is None:
+            return timed_build()
+        return self.cache.get_or_build(self.cache_key + (name,), timed_build)
+
+    def plot(self, name, build):
+        show_chart(name, self.cached(name, build))
+
+    @property
+    def cube(self):
+        # Single aggregation pass shared by the pie, bar, metric, trend and stacked charts
+        return self.cached("cube", lambda: build_cube(self.df, self.pie_col, self.metric_count, self.metric_amount),
+                           kind="aggregation")
+
+    @property
+    def period_data(self):
+        # Group by year and quarter (the line and area charts share this rollup)
+        def build():
+            period_data = (self.cube.groupby(['year', 'quarter'], observed=True)[[self.metric_count, self.metric_amount]]
+                           .sum().reset_index())
+            period_data['Period'] = period_data['year'].astype(str) + "-Q" + period_data['quarter'].astype(str)
+            return period_data
+        return self.cached("period_data", build, kind="aggregation")
+
+
+def _render_overview(ctx):
+    if ctx.overview is not None:
+        ctx.overview()
+    else:
+        st.dataframe(ctx.df.head(100), width="stretch")
+
+
+def _render_distribution(ctx):
+    col1, col2 = st.columns(2)
+    pie_col, metric_count, metric_amount = ctx.pie_col, ctx.metric_count, ctx.metric_amount
+
+    with col1:
+        if pie_col in ctx.df.columns:
+            def build():
+                pie_data = ctx.cube.groupby(pie_col, observed=True)[metric_amount].sum().reset_index()
+                return px.pie(pie_data, names=pie_col, values=metric_amount, title=f"Amount Distribution by {pie_col}", hole=0.4)
+            ctx.plot("pie_amount", build)
+        else:
+            st.warning(f"Column {pie_col} not found for Pie Chart.")
+
+    with col2:
+        if pie_col in ctx.df.columns:
+            def build():
+                pie_data_2 = ctx.cube.groupby(pie_col, observed=True)[metric_count].sum().reset_index()
+                return px.pie(pie_data_2, names=pie_col, values=metric_count, title=f"Count Distribution by {pie_col}", hole=0.4)
+            ctx.plot("pie_count", build)
+        else:
+            st.warning(f"Column {pie_col} not found for Pie Chart.")
+
+
+def _render_relationships(ctx):
+    col3, col4, col5 = st.columns(3)
+    df, category_col, metric_count, metric_amount = ctx.df, ctx.category_col, ctx.metric_count, ctx.metric_amount
+
+    with col3:
+        # Scatter: Count vs Amount
+        # Using 'year' for color
+        def build():
+            scatter_df = stratified_sample(df, "year", metric_amount, ctx.budget)
+            fig_scatter = px.scatter(scatter_df, x=metric_count, y=metric_amount, color="year", size=metric_amount,
+                                     title="Count vs Amount Correlation",
+                                     hover_data=[category_col] if category_col in df.columns else None)
+            return fig_scatter, len(scatter_df)
+        fig_scatter, sampled = ctx.cached("scatter", build)
+        show_chart("scatter", fig_scatter)
+        if ctx.reduced:
+            st.caption(f"Sampled {sampled:,} of {len(df):,} points (stratified by year).")
+
+    with col4:
+        # Bar: Top Categories
+        bar_col = category_col if category_col in df.columns else "state"
+        if bar_col in df.columns:
+            def build():
+                bar_data = ctx.cube.groupby(bar_col, observed=True)[[metric_count, metric_amount]].sum().reset_index().sort_values(metric_amount, ascending=False).head(10)
+                return px.bar(bar_data, x=bar_col, y=metric_amount, color=metric_count, title=f"Top 10 {bar_col} by Amount")
+            ctx.plot("bar", build)
+
+    with col5:
+        # Histogram: Amount Distribution
+        def build():
+            if ctx.reduced:
+                hist_data = histogram_counts(df, metric_amount, "year", bins=settings.CHART_HISTOGRAM_BINS)
+                hist_data["year"] = hist_data["year"].astype(str)
+                fig_hist = px.bar(hist_data, x="bin_mid", y="count", color="year",
+                                  title=f"Distribution of {metric_amount}",
+                                  labels={"bin_mid": metric_amount, "count": "count"})
+                fig_hist.update_layout(bargap=0)
+                return fig_hist
+            return px.histogram(df, x=metric_amount, title=f"Distribution of {metric_amount}", color="year")
+        ctx.plot("histogram", build)
+        if ctx.reduced:
+            st.caption(f"Pre-binned from {len(df):,} rows.")
+
+
+def _render_insights(ctx):
+    col5, col6 = st.columns(2)
+
+    with col5:
+        # Correlation Heatmap
+        numeric_df = ctx.df.select_dtypes(include='number')
+        if not numeric_df.empty:
+            def build():
+                corr = numeric_df.corr()
+                return px.imshow(corr, text_auto=True, title="Correlation Heatmap")
+            ctx.plot("heatmap", build)
+
+    with col6:
+        # Summary Metrics
+        cube = ctx.cube
+        total_amt = cube[ctx.metric_amount].sum()
+        total_cnt = cube[ctx.metric_count].sum()
+        avg_amt = total_amt / cube[ROWS_COL].sum() if cube[ROWS_COL].sum() else float("nan")
+
+        st.markdown("### Key Metrics")
+        st.metric(label="Total Amount", value=f"₹ {total_amt:,.0f}")
+        st.metric(label="Total Count", value=f"{total_cnt:,.0f}")
+        st.metric(label="Average Amount", value=f"₹ {avg_amt:,.0f}")
+
+
+def _render_trends(ctx):
+    df, category_col, metric_amount = ctx.df, ctx.category_col, ctx.metric_amount
+
+    # Line Chart: Amount over Time
+    def build():
+        return px.line(ctx.period_data, x='Period', y=metric_amount, markers=True, title="Total Amount Trend over Quarters")
+    ctx.plot("line", build)
+
+    # Stacked Bar: Category over Time
+    stack_col = category_col if category_col in df.columns else "state"
+    if stack_col in df.columns:
+        def build():
+            stack_data = ctx.cube.groupby(['year', stack_col], observed=True)[metric_amount].sum().reset_index()
+            return px.bar(stack_data, x="year", y=metric_amount, color=stack_col, title=f"Yearly Trend by {stack_col}")
+        ctx.plot("stacked_bar", build)
+
+    if ctx.growth is not None:
+        _render_growth(ctx)
+
+
+def _render_growth(ctx):
+    # Rates come precomputed from the growth table (growth.py), not from the filtered rows
+    growth = ctx.cached("growth_rows", ctx.growth, kind="aggregation")
+    if growth.empty:
+        return
+    national = (growth["state"] == "All").all()
+    col9, col10 = st.columns(2)
+
+    with col9:
+        def build():
+            rates = growth.melt(id_vars=["Period", "state"], value_vars=["amount_qoq", "amount_yoy"],
+                                var_name="growth", value_name="change")
+            fig = px.line(rates, x="Period", y="change", color="state", line_dash="growth", markers=True,
+                          title="Amount Growth (QoQ / YoY)")
+            return fig.update_yaxes(tickformat=".0%")
+        ctx.plot("growth", build)
+
+    with col10:
+        if national:
+            def build():
+                return px.line(growth, x="Period", y="ticket_size", markers=True, title="Average Ticket Size")
+            ctx.plot("ticket_size", build)
+        else:
+            def build():
+                fig = px.line(growth, x="Period", y="amount_share", color="state", markers=True,
+                              title="Share of National Amount")
+                return fig.update_yaxes(tickformat=".0%")
+            ctx.plot("share", build)
+
+
+def _render_advanced(ctx):
+    col7, col8 = st.columns(2)
+    df, category_col, metric_amount = ctx.df, ctx.category_col, ctx.metric_amount
+
+    with col7:
+        # Box Plot: Amount Distribution by Category
+        box_col = category_col if category_col in df.columns else "state"
+        if box_col in df.columns:
+            def build():
+                if ctx.reduced:
+                    return box_figure(box_stats(df, box_col, metric_amount), box_col, metric_amount,
+                                      title=f"Amount Distribution by {box_col}")
+                return px.box(df, x=box_col, y=metric_amount, title=f"Amount Distribution by {box_col}", color=box_col)
+            ctx.plot("box", build)
+            if ctx.reduced:
+                st.caption(f"Quartiles precomputed from {len(df):,} rows; outlier points omitted.")
+
+    with col8:
+        # Area Chart: Count Trend over Time
+        def build():
+            return px.area(ctx.period_data, x='Period', y=ctx.metric_count, title="Total Count Trend over Quarters", markers=True)
+        ctx.plot("area", build)
+
+
+def _render_drill_down(ctx):
+    if ctx.drill_down is not None:
+        ctx.drill_down()
+    else:
+        st.info("No drill-down is available for this selection.")
+
+
+# Section title -> renderer, in page order
+SECTIONS = {
+    "Data Overview": _render_overview,
+    "Distribution": _render_distribution,
+    "Relationships": _render_relationships,
+    "Additional Insights": _render_insights,
+    "Trends Over Time": _render_trends,
+    "Advanced Analytics": _render_advanced,
+    "Drill Down": _render_drill_down,
+}
+
+
+def render_5_charts(df, category_col, metric_count, metric_amount, title_prefix, sections=None, cache=None,
+                    cache_key=None, overview=None, growth=None, drill_down=None):
+    """
+    Renders 5 standardized charts.
+    Assumes all input column names are lowercase.
+
+    Only the named `sections` (default: all) are computed and drawn. Pass a figure
+    `cache` and a `cache_key` identifying the filter state to reuse their output.
+    `overview` draws the Data Overview section in place of the first 100 rows.
+    `growth` returns the growth.select_growth() rows of the selection; Trends then
+    adds growth and share (or ticket size) charts. `drill_down` draws the Drill Down
+    section (see drilldown.py).
+    """
+    ctx = ChartContext(df, category_col, metric_count, metric_amount, cache, cache_key, overview, growth,
+                       drill_down)
+    for number, (name, render) in enumerate(SECTIONS.items(), start=1):
+        if sections is None or name in sections:
+            st.subheader(f"{number}. {title_prefix} - {name}")
+            render(ctx)
+
+
+def build_india_map(df_map, india_geojson, map_height):
+    """Home page choropleth with the state bubble overlay, themed for the dark Pulse look."""
+    # Create base choropleth layer
+    fig_map = px.choropleth(
+        df_map,
+        geojson=india_geojson,
+        featureidkey='properties.ST_NM',
+        locations='state',
+        color='total_value',
+        color_continuous_scale=[
+            [0.0, '#0d0221'],
+            [0.2, '#240046'],
+            [0.4, '#5a189a'],
+            [0.6, '#9d4edd'],
+            [0.8, '#e0aaff'],
+            [1.0, '#ffffff']
+        ],
+        range_color=(0, df_map['total_value'].max()),
+        hover_data={
+            'state': True,
+            'total_value': ':,.0f',
+            'trans_amount': ':,.0f',
+            'ins_amount': ':,.0f',
+            'registered_users': ':,.0f'
+        },
+        labels={
+            'total_value': 'Total Value (₹)',
+            'trans_amount': 'Transactions (₹)',
+            'ins_amount': 'Insurance (₹)',
+            'registered_users': 'Registered Users'
+        }
+    )
+    
+    # Add 3D scatter overlay for particle effect
+    fig_scatter = px.scatter_geo(
+        df_map.dropna(subset=['lat', 'lon']),
+        lat='lat',
+        lon='lon',
+        size='total_value',
+        color='total_value',
+        hover_name='state',
+        hover_data={
+            'total_value': ':,.0f',
+            'trans_amount': ':,.0f',
+            'ins_amount': ':,.0f',
+            'registered_users': ':,.0f',
+            'lat': False,
+            'lon': False
+        },
+        color_continuous_scale=[
+            [0.0, '#5a189a'],
+            [0.5, '#9d4edd'],
+            [1.0, '#ffffff']
+        ],
+        size_max=50
+    )
+    
+    # Combine both traces
+    for trace in fig_scatter.data:
+        trace.marker.line = dict(color='rgba(255, 255, 255, 0.8)', width=2)
+        trace.marker.opacity = 0.8
+        fig_map.add_trace(trace)
+    
+    # Update geo layout for India focus
+    fig_map.update_geos(
+        projection_type="natural earth",
+        fitbounds="locations",
+        visible=False,
+        showcountries=False,
+        showcoastlines=False,
+        showland=False,
+        showlakes=False,
+        showrivers=False,
+        bgcolor='rgba(13, 2, 33, 0.0)'
+    )
+    
+    # Enhanced layout
+    fig_map.update_layout(
+        height=map_height,
+        margin={"r":0,"t":40,"l":0,"b":0},
+        paper_bgcolor='rgba(13, 2, 33, 0.0)',
+        plot_bgcolor='rgba(13, 2, 33, 0.0)',
+        font=dict(
+            family="Inter, sans-serif",
+            size=12,
+            color='white'
+        ),
+        showlegend=False,
+        coloraxis_colorbar=dict(
+            title=dict(
+                text="Total Value (₹)",
+                font=dict(size=14, color='white')
+            ),
+            thickness=20,
+            len=0.7,
+            bgcolor='rgba(26, 11, 62, 0.6)',
+            bordercolor='rgba(157, 78, 221, 0.5)',
+            borderwidth=2,
+            tickfont=dict(color='white', size=11),
+            tickformat=',.0f',
+            x=1.02
+        ),
+        hoverlabel=dict(
+            bgcolor='rgba(26, 11, 62, 0.95)',
+            bordercolor='rgba(157, 78, 221, 0.8)',
+            font=dict(
+                family="Inter, sans-serif",
+                size=13,
+                color='white'
+            )
+        )
+    )
+    
+    # Update choropleth traces
+    fig_map.update_traces(
+        selector=dict(type='choropleth'),
+        marker=dict(
+            line=dict(
+                color='rgba(157, 78, 221, 0.8)',
+                width=2
+            )
+        ),
+        hovertemplate='<b>%{location}</b><br>' +
+                     'Total Value: ₹%{z:,.0f}<br>' +
+                     '<extra></extra>'
+    )
+
+    return fig_map
@@ -0,0 +1,598 @@
+"""
+Pluggable data sources for the dashboard.
+
+Every backend answers the same questions the pages ask:
+data_version(), table_summary(table), state_rollup(), growth_metrics(dataset), children(dataset, level,
+parent, ...) for the geographic drill-down, filter_options(table) and
+filtered(table, columns, year, quarter, state, district). The Data Overview grid also uses
+row_count(), page() for one sorted page and iter_chunks() for streamed exports.
+Each filter is "All", one value or a list of values (see queries.filter_values).
+session() scopes the queries of one page render to a single database connection
+(a no-op for file backends).
+
+  - SQLSource:     the MySQL (or any SQLAlchemy) database loaded by ingest.py
+  - ParquetSource: a read-only snapshot of one hive-partitioned Parquet dataset
+                   per table (<root>/<table>/year=YYYY/quarter=Q/*.parquet),
+                   read with memory mapping plus column and partition pruning
+  - DuckDBSource:  the same snapshot (or <root>/<table>.csv exports) queried
+                   in-process by DuckDB with the dashboard's own SQL
+"""
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+import instrument
+import settings
+from geo import attach_state_dimension
+from growth import (GROWTH_SOURCES, GROWTH_TABLE, build_growth_metrics, fetch_growth_metrics,
+                    growth_source_query)
+from hierarchy import (ALL_PERIODS, GEO_LEVELS_TABLE, HIERARCHY_SOURCES, build_geo_levels, children_params,
+                       fetch_children, level_frame, level_query, select_children)
+from queries import (HOME_SUMMARY_COLUMNS, SELECTION_COLUMNS, STATE_ROLLUP_COLUMNS, STATE_ROLLUP_SOURCES,
+                     STATE_ROLLUP_TABLE, build_count_query, build_filtered_query, build_page_query,
+                     fetch_filter_options, fetch_filtered, fetch_page, fetch_row_count, fetch_state_rollup,
+                     fetch_table_summary, filter_columns, filter_values, finish_state_rollup,
+                     iter_filtered_chunks, page_order, quote_identifier, read_data_version,
+                     state_map_full_join_query, state_rollup_frame, table_summary_query)
+from registry import arrow_page
+from schema import apply_schema
+
+PARTITION_COLUMNS = ["year", "quarter"]
+VERSION_FILE = "_version"
+
+
+# ----------------------------------
+# SQL DATABASE
+# ----------------------------------
+def create_db_engine(url=None):
+    """Engine for the dashboard's reads, with the connection pool configured from settings."""
+    url = make_url(url or settings.DB_URL)
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING, "pool_recycle": settings.DB_POOL_RECYCLE}
+    # In-memory SQLite uses a single shared connection, which has no pool size to configure
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        options.update(pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW,
+                       pool_timeout=settings.DB_POOL_TIMEOUT)
+    return create_engine(url, **options)
+
+
+class SQLSource:
+    name = "sql"
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_checkout(self, *args):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_connect(self, *args):
+        with self._lock:
+            self.connects += 1
+
+    def _on_invalidate(self, *args):
+        with self._lock:
+            self.invalidations += 1
+
+    def _on_execute(self, conn, cursor, statement, *args):
+        instrument.note_sql(statement)
+
+    @contextmanager
+    def session(self):
+        """
+        Check out one connection and run every query of this thread on it until the
+        block exits. Nested sessions reuse the outer connection.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+        start = time.perf_counter()
+        conn = self.engine.connect()
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            conn.close()
+
+    def pool_stats(self):
+        pool = self.engine.pool
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "wait_seconds_total": self.wait_seconds,
+                "wait_seconds_max": self.max_wait_seconds,
+            }
+        for stat in ("size", "checkedout", "overflow"):
+            if hasattr(pool, stat):
+                stats[stat] = getattr(pool, stat)()
+        return stats
+
+    def check(self):
+        with self.session():
+            pass
+
+    def data_version(self):
+        with self.session() as conn:
+            return read_data_version(conn)
+
+    def table_summary(self, table_name):
+        with self.session() as conn:
+            return fetch_table_summary(conn, table_name)
+
+    def state_rollup(self):
+        with self.session() as conn:
+            return fetch_state_rollup(conn)
+
+    def growth_metrics(self, dataset):
+        with self.session() as conn:
+            return fetch_growth_metrics(conn, dataset)
+
+    def children(self, dataset, level, parent, year=ALL_PERIODS, quarter=ALL_PERIODS, limit=None):
+        with self.session() as conn:
+            return fetch_children(conn, dataset, level, parent, year, quarter, limit)
+
+    def filter_options(self, table_name):
+        with self.session() as conn:
+            return fetch_filter_options(conn, table_name)
+
+    def filtered(self, table_name, columns=None, year="All", quarter="All", state="All", district="All"):
+        with self.session() as conn:
+            df = fetch_filtered(conn, table_name, columns, year, quarter, state, district)
+        return apply_schema(df, table_name)
+
+    def row_count(self, table_name, year="All", quarter="All", state="All", district="All"):
+        with self.session() as conn:
+            return fetch_row_count(conn, table_name, year, quarter, state, district)
+
+    def page(self, table_name, columns=None, year="All", quarter="All", state="All", district="All",
+             sort_by=None, descending=False, offset=0, limit=100):
+        with self.session() as conn:
+            df = fetch_page(conn, table_name, columns, year, quarter, state, district, sort_by, descending,
+                            offset, limit)
+        return apply_schema(df, table_name)
+
+    def iter_chunks(self, table_name, columns=None, year="All", quarter="All", state="All", district="All",
+                    chunksize=50_000):
+        with self.session() as conn:
+            yield from iter_filtered_chunks(conn, table_name, columns, year, quarter, state, district, chunksize)
+
+
+# ----------------------------------
+# PARQUET SNAPSHOT
+# ----------------------------------
+def _partition_filter(year="All", quarter="All", state="All", district="All"):
+    conditions = []
+    for col, value in zip(SELECTION_COLUMNS, (year, quarter, state, district)):
+        values = filter_values(col, value)
+        if values is not None:
+            conditions.append((col, "=", values[0]) if len(values) == 1 else (col, "in", list(values)))
+    return conditions or None
+
+
+def read_snapshot_version(root):
+    path = os.path.join(root, VERSION_FILE)
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r") as f:
+        return int(f.read().strip() or 0)
+
+
+class ParquetSource:
+    name = "parquet"
+
+    def __init__(self, root=None):
+        self.root = root or settings.SNAPSHOT_DIR
+
+    def _path(self, table_name):
+        return os.path.join(self.root, table_name)
+
+    def has_table(self, table_name):
+        return os.path.isdir(self._path(table_name))
+
+    def read(self, table_name, columns=None, year="All", quarter="All", state="All", district="All"):
+        """Read a table, touching only the requested columns and matching year/quarter partitions."""
+        table = pq.read_table(
+            self._path(table_name),
+            columns=columns,
+            filters=_partition_filter(year, quarter, state, district),
+            partitioning="hive",
+            memory_map=True,
+        )
+        return apply_schema(table.to_pandas(), table_name)
+
+    def _scan(self, table_name, year="All", quarter="All", state="All", district="All"):
+        conditions = _partition_filter(year, quarter, state, district)
+        dataset = ds.dataset(self._path(table_name), format="parquet", partitioning="hive")
+        return dataset, (pq.filters_to_expression(conditions) if conditions else None)
+
+    def row_count(self, table_name, year="All", quarter="All", state="All", district="All"):
+        dataset, expression = self._scan(table_name, year, quarter, state, district)
+        return dataset.count_rows(filter=expression)
+
+    def page(self, table_name, columns=None, year="All", quarter="All", state="All", district="All",
+             sort_by=None, descending=False, offset=0, limit=100):
+        """Sort the selection in Arrow and convert only the requested page to pandas."""
+        dataset, expression = self._scan(table_name, year, quarter, state, district)
+        table = dataset.to_table(columns=columns, filter=expression)
+        table = arrow_page(table, page_order(columns or table.column_names, sort_by, descending), offset, limit)
+        return apply_schema(table.to_pandas(), table_name)
+
+    def iter_chunks(self, table_name, columns=None, year="All", quarter="All", state="All", district="All",
+                    chunksize=50_000):
+        dataset, expression = self._scan(table_name, year, quarter, state, district)
+        for batch in dataset.to_batches(columns=columns, filter=expression, batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def session(self):
+        return nullcontext()
+
+    def check(self):
+        if not os.path.isdir(self.root):
+            raise FileNotFoundError(f"Parquet snapshot not found: {self.root}")
+
+    def data_version(self):
+        return read_snapshot_version(self.root)
+
+    def table_summary(self, table_name):
+        if not self.has_table(table_name):
+            raise FileNotFoundError(f"Table not in snapshot: {table_name}")
+        aliases = {alias: column for alias, (table, column) in HOME_SUMMARY_COLUMNS.items() if table == table_name}
+        df = self.read(table_name, columns=list(dict.fromkeys(aliases.values())))
+        return {alias: df[column].sum() for alias, column in aliases.items()}
+
+    def state_rollup(self):
+        path = os.path.join(self.root, f"{STATE_ROLLUP_TABLE}.parquet")
+        if os.path.exists(path):
+            return attach_state_dimension(pd.read_parquet(path))[STATE_ROLLUP_COLUMNS]
+        return build_snapshot_state_rollup(self)
+
+    def growth_metrics(self, dataset):
+        df = read_snapshot_growth(self.root, dataset)
+        if df is None:
+            df = build_snapshot_growth_metrics(self)
+            df = df[df["dataset"] == dataset].reset_index(drop=True)
+        return df
+
+    def children(self, dataset, level, parent, year=ALL_PERIODS, quarter=ALL_PERIODS, limit=None):
+        df = read_snapshot_children(self.root, dataset, level, parent, year, quarter, limit)
+        if df is None:
+            df = select_children(build_snapshot_geo_levels(self), dataset, level, parent, year, quarter, limit)
+        return df
+
+    def filter_options(self, table_name):
+        columns = filter_columns(table_name)
+        df = self.read(table_name, columns=columns)
+        return {col: sorted(df[col].dropna().unique().tolist()) for col in columns}
+
+    def filtered(self, table_name, columns=None, year="All", quarter="All", state="All", district="All"):
+        return self.read(table_name, columns, year, quarter, state, district)
+
+
+def build_snapshot_state_rollup(source):
+    frames = []
+    for table, sums in STATE_ROLLUP_SOURCES.items():
+        if source.has_table(table):
+            df = source.read(table, columns=["state", "year", "quarter"] + list(sums.values()))
+            frames.append(state_rollup_frame(df, table))
+    return finish_state_rollup(frames)
+
+
+def build_snapshot_growth_metrics(source):
+    frames = {}
+    for table, (category, count, amount) in GROWTH_SOURCES.items():
+        if source.has_table(table):
+            df = source.read(table, columns=["state", category, "year", "quarter", count, amount])
+            frames[table] = (
+                df.groupby(["state", category, "year", "quarter"], observed=True)[[count, amount]].sum()
+                .reset_index()
+                .rename(columns={category: "category", count: "total_count", amount: "total_amount"})
+            )
+    return build_growth_metrics(frames)
+
+
+def build_snapshot_geo_levels(source):
+    frames = {}
+    for dataset, levels in HIERARCHY_SOURCES.items():
+        for level, (table, count, amount) in levels.items():
+            if source.has_table(table):
+                columns = list(dict.fromkeys(["state", level, "year", "quarter", count] + ([amount] if amount else [])))
+                frames[(dataset, level)] = level_frame(source.read(table, columns=columns), level, count, amount)
+    return build_geo_levels(frames)
+
+
+def read_snapshot_children(root, dataset, level, parent, year=ALL_PERIODS, quarter=ALL_PERIODS, limit=None):
+    """One node's children from the snapshot's geo_levels file, or None if the snapshot has none."""
+    path = os.path.join(root, f"{GEO_LEVELS_TABLE}.parquet")
+    if not os.path.exists(path):
+        return None
+    filters = [(col, "=", value) for col, value in children_params(dataset, level, parent, year, quarter).items()]
+    if limit:
+        filters.append(("ranking", "<=", int(limit)))
+    return pd.read_parquet(path, filters=filters).sort_values("ranking", ignore_index=True)
+
+
+def read_snapshot_growth(root, dataset):
+    """One dataset's rows of the snapshot's growth table, or None if the snapshot has none."""
+    path = os.path.join(root, f"{GROWTH_TABLE}.parquet")
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path, filters=[("dataset", "=", dataset)])
+
+
+# ----------------------------------
+# DUCKDB
+# ----------------------------------
+class DuckDBSource:
+    """
+    Runs the dashboard SQL in an embedded DuckDB over the snapshot directory.
+
+    Every table is a view over <root>/<table>/**/*.parquet (hive partitioned)
+    or <root>/<table>.csv, so DuckDB scans, filters and aggregates the files
+    itself, in parallel across settings.DUCKDB_THREADS threads.
+    """
+    name = "duckdb"
+
+    def __init__(self, root=None, threads=None):
+        import duckdb  # optional dependency, only needed for this backend
+
+        self.root = root or settings.SNAPSHOT_DIR
+        self.con = duckdb.connect(":memory:")
+        self.con.execute(f"SET threads = {int(threads or settings.DUCKDB_THREADS)}")
+        self.tables = set()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _sources(self):
+        if not os.path.isdir(self.root):
+            return {}
+        sources = {}
+        for entry in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, entry)
+            name, ext = os.path.splitext(entry)
+            if os.path.isdir(path) and not ext:
+                sources[entry] = f"read_parquet('{os.path.join(path, '**', '*.parquet')}', hive_partitioning = true)"
+            elif ext == ".csv":
+                sources[name] = f"read_csv_auto('{path}')"
+        return {name: src for name, src in sources.items() if _is_identifier(name)}
+
+    def refresh(self):
+        """(Re)create one view per table found under the snapshot root."""
+        sources = self._sources()
+        for name, src in sources.items():
+            self.con.execute(f"CREATE OR REPLACE VIEW {name} AS SELECT * FROM {src}")
+        for name in self.tables - set(sources):
+            self.con.execute(f"DROP VIEW IF EXISTS {name}")
+        self.tables = set(sources)
+
+    def available_tables(self):
+        if self._version is None:
+            self.data_version()
+        return self.tables
+
+    def _query(self, sql, params=None):
+        # DuckDB connections are not thread-safe; a cursor is a cheap per-call handle on the same database
+        self.available_tables()
+        instrument.note_sql(sql)
+        cursor = self.con.cursor()
+        try:
+            return cursor.execute(sql, params or {}).df()
+        finally:
+            cursor.close()
+
+    def session(self):
+        return nullcontext()
+
+    def check(self):
+        if not os.path.isdir(self.root):
+            raise FileNotFoundError(f"Snapshot not found: {self.root}")
+
+    def data_version(self):
+        version = read_snapshot_version(self.root)
+        with self._lock:
+            if version != self._version:
+                # New or removed tables only show up after a re-scan
+                self.refresh()
+                self._version = version
+        return version
+
+    def table_summary(self, table_name):
+        if table_name not in self.available_tables():
+            raise FileNotFoundError(f"Table not in snapshot: {table_name}")
+        df = self._query(table_summary_query(table_name))
+        return {col: (value if pd.notna(value) else 0) for col, value in df.iloc[0].items()}
+
+    def state_rollup(self):
+        available = self.available_tables() & set(STATE_ROLLUP_SOURCES)
+        if not available:
+            return finish_state_rollup([])
+        return finish_state_rollup([self._query(state_map_full_join_query(available))])
+
+    def growth_metrics(self, dataset):
+        df = read_snapshot_growth(self.root, dataset)
+        if df is not None:
+            return df
+        if dataset not in GROWTH_SOURCES or dataset not in self.available_tables():
+            return build_growth_metrics({})
+        return build_growth_metrics({dataset: self._query(growth_source_query(dataset))})
+
+    def children(self, dataset, level, parent, year=ALL_PERIODS, quarter=ALL_PERIODS, limit=None):
+        df = read_snapshot_children(self.root, dataset, level, parent, year, quarter, limit)
+        if df is not None:
+            return df
+        available = self.available_tables()
+        frames = {
+            (name, lvl): self._query(level_query(lvl, table, count, amount))
+            for name, levels in HIERARCHY_SOURCES.items()
+            for lvl, (table, count, amount) in levels.items()
+            if table in available
+        }
+        return select_children(build_geo_levels(frames), dataset, level, parent, year, quarter, limit)
+
+    def filter_options(self, table_name):
+        table = quote_identifier(table_name)
+        return {
+            col: self._query(f"SELECT DISTINCT {col} FROM {table} WHERE {col} IS NOT NULL ORDER BY 1")[col].tolist()
+            for col in filter_columns(table_name)
+        }
+
+    def filtered(self, table_name, columns=None, year="All", quarter="All", state="All", district="All"):
+        sql, params = build_filtered_query(table_name, columns, year, quarter, state, district, param_prefix="$")
+        return apply_schema(self._query(sql, params), table_name)
+
+    def row_count(self, table_name, year="All", quarter="All", state="All", district="All"):
+        sql, params = build_count_query(table_name, year, quarter, state, district, param_prefix="$")
+        return int(self._query(sql, params)["row_count"].iloc[0])
+
+    def page(self, table_name, columns=None, year="All", quarter="All", state="All", district="All",
+             sort_by=None, descending=False, offset=0, limit=100):
+        sql, params = build_page_query(table_name, columns, year, quarter, state, district, sort_by, descending,
+                                       offset, limit, param_prefix="$")
+        return apply_schema(self._query(sql, params), table_name)
+
+    def iter_chunks(self, table_name, columns=None, year="All", quarter="All", state="All", district="All",
+                    chunksize=50_000):
+        sql, params = build_filtered_query(table_name, columns, year, quarter, state, district, param_prefix="$")
+        self.available_tables()
+        cursor = self.con.cursor()
+        try:
+            reader = cursor.execute(sql, params).fetch_record_batch(chunksize)
+            for batch in reader:
+                yield batch.to_pandas()
+        finally:
+            cursor.close()
+
+
+def _is_identifier(name):
+    try:
+        quote_identifier(name)
+        return True
+    except ValueError:
+        return False
+
+
+# ----------------------------------
+# SNAPSHOT WRITERS (used by ingest.py)
+# ----------------------------------
+def _to_arrow(df):
+    # All-None columns (e.g. pincode in a district-only partition) would be typed null, and
+    # categoricals become dictionary columns; store both as strings so every partition shares
+    # one schema (Parquet dictionary-encodes them on disk anyway)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_null(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+        elif pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+    return table
+
+
+def write_snapshot_table(df, table_name, root=None):
+    """Write a whole table as a new partitioned dataset and swap it in place of the old one."""
+    root = root or settings.SNAPSHOT_DIR
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, table_name)
+    tmp_path, old_path = path + ".tmp", path + ".old"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    ds.write_dataset(
+        _to_arrow(df),
+        tmp_path,
+        format="parquet",
+        partitioning=PARTITION_COLUMNS,
+        partitioning_flavor="hive",
+    )
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def update_snapshot_partitions(df, table_name, keys, root=None):
+    """
+    Replace the rows of the given (state, year, quarter) keys with `df`,
+    rewriting only the year/quarter partitions those keys fall into.
+    """
+    root = root or settings.SNAPSHOT_DIR
+    path = os.path.join(root, table_name)
+    frames = [df]
+    for year, quarter in {(year, quarter) for _, year, quarter in keys}:
+        part_path = os.path.join(path, f"year={year}", f"quarter={quarter}")
+        if not os.path.isdir(part_path):
+            continue
+        old = pq.read_table(part_path).to_pandas()
+        states = {state for state, y, q in keys if (y, q) == (year, quarter)}
+        old = old[~old["state"].isin(states)].assign(year=year, quarter=quarter)
+        frames.append(old[df.columns])
+    combined = pd.concat(frames, ignore_index=True)
+    if not combined.empty:
+        ds.write_dataset(
+            _to_arrow(combined),
+            path,
+            format="parquet",
+            partitioning=PARTITION_COLUMNS,
+            partitioning_flavor="hive",
+            existing_data_behavior="delete_matching",
+        )
+    # Partitions whose rows were all removed are not rewritten above
+    touched = {(year, quarter) for _, year, quarter in keys}
+    for year, quarter in touched - set(zip(combined["year"], combined["quarter"])):
+        shutil.rmtree(os.path.join(path, f"year={year}", f"quarter={quarter}"), ignore_errors=True)
+
+
+def write_snapshot_derived(version, root=None):
+    """Refresh the snapshot's derived tables (state rollup, growth metrics, geo levels) and stamp its version."""
+    root = root or settings.SNAPSHOT_DIR
+    source = ParquetSource(root)
+    build_snapshot_state_rollup(source).to_parquet(
+        os.path.join(root, f"{STATE_ROLLUP_TABLE}.parquet"), index=False
+    )
+    build_snapshot_growth_metrics(source).to_parquet(os.path.join(root, f"{GROWTH_TABLE}.parquet"), index=False)
+    # Sorted by the lookup keys, so row group statistics let a children() read skip most of the file
+    build_snapshot_geo_levels(source).to_parquet(os.path.join(root, f"{GEO_LEVELS_TABLE}.parquet"), index=False,
+                                                 row_group_size=settings.GEO_LEVELS_ROW_GROUP)
+    tmp_path = os.path.join(root, VERSION_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(str(version))
+    os.replace(tmp_path, os.path.join(root, VERSION_FILE))
+
+
+# ----------------------------------
+# FACTORY
+# ----------------------------------
+def create_source(backend=None, engine=None):
+    backend = backend or settings.DATA_BACKEND
+    if backend == "parquet":
+        return ParquetSource(settings.SNAPSHOT_DIR)
+    if backend == "duckdb":
+        return DuckDBSource(settings.SNAPSHOT_DIR)
+    if backend == "sql":
+        return SQLSource(engine)
+    raise ValueError(f"Unknown data backend: {backend!r}")
@@ -0,0 +1,59 @@
+"""
+Geographic drill-down: India -> one state -> its districts and pincodes.
+
+Each step reads only the children of the chosen node from the pre-aggregated
+levels (hierarchy.py), already ranked, so no fact table is scanned and the
+top-N lists are read as stored.
+"""
+import plotly.express as px
+import streamlit as st
+
+import settings
+from charts import show_chart
+from geo import format_state_name
+from hierarchy import COUNTRY, rank_column
+
+VALUE_LABELS = {
+    "payments": "Payment value (₹)",
+    "transactions": "Transaction amount (₹)",
+    "insurance": "Insurance amount (₹)",
+    "users": "Registered users",
+}
+
+
+def _ranking_figure(df, value, label, title, format_name):
+    data = df.assign(node=df["name"].map(format_name))
+    fig = px.bar(data, x=value, y="node", orientation="h", title=title, labels={value: label, "node": ""})
+    # Rank 1 on top
+    return fig.update_yaxes(autorange="reversed")
+
+
+def render_drill_down(key, dataset, fetch_children, period, state=None):
+    """
+    `fetch_children(level, parent, limit)` returns one node's precomputed children,
+    best first (every child when `limit` is None). `period` labels the rows shown
+    and `state` preselects a state, e.g. the one the Analysis filters selected.
+    """
+    states = fetch_children("state", COUNTRY, None)
+    if states.empty:
+        st.info("No data available for the drill-down.")
+        return
+    value, label, top_n = rank_column(dataset), VALUE_LABELS.get(dataset, dataset), settings.DRILL_TOP_N
+    options = [COUNTRY] + states["name"].tolist()
+    chosen = st.selectbox("Drill down into", options, index=options.index(state) if state in options else 0,
+                          format_func=lambda s: "All India" if s == COUNTRY else format_state_name(s),
+                          key=f"drill:{key}")
+    st.caption(f"Top {top_n} by {label.lower()}, {period}")
+
+    if chosen == COUNTRY:
+        show_chart("drill_states", _ranking_figure(states.head(top_n), value, label, f"Top {top_n} States",
+                                                   format_state_name))
+        return
+    for column, level in zip(st.columns(2), ("district", "pincode")):
+        with column:
+            children = fetch_children(level, chosen, top_n)
+            if children.empty:
+                st.info(f"No {level} data for {format_state_name(chosen)}.")
+                continue
+            show_chart(f"drill_{level}s", _ranking_figure(
+                children, value, label, f"Top {level.title()}s in {format_state_name(chosen)}", str))
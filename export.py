@@ -0,0 +1,101 @@
+"""
+Chunked CSV/Parquet export of a filtered selection.
+
+Rows arrive from a data source's iter_chunks() (or the shared dataset's) a chunk
+at a time and are appended to the output, so the whole selection is never held
+as one DataFrame.
+
+    python export.py map_user --format parquet --year 2023 --out map_user_2023.parquet
+    python export.py map_user --format csv --state goa kerala --out map_user_goa_kerala.csv
+"""
+import argparse
+import tempfile
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import settings
+from schema import CATEGORY, COLUMN_TYPES, TABLE_COLUMNS
+
+EXPORT_FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def _arrow_schema(df):
+    """Declared column types as Arrow types, so every chunk is written with the same schema."""
+    fields = []
+    for field in pa.Schema.from_pandas(df, preserve_index=False):
+        dtype = COLUMN_TYPES.get(field.name)
+        if dtype == CATEGORY or pa.types.is_dictionary(field.type) or pa.types.is_null(field.type):
+            fields.append(pa.field(field.name, pa.string()))
+        elif dtype:
+            fields.append(pa.field(field.name, pa.from_numpy_dtype(np.dtype(dtype))))
+        else:
+            fields.append(field)
+    return pa.schema(fields)
+
+
+def write_export(chunks, sink, fmt):
+    """Write DataFrame `chunks` to `sink` (a path or binary file) as CSV or Parquet; returns the row count."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    rows = 0
+    writer = None
+    try:
+        for df in chunks:
+            if fmt == "csv":
+                if writer is None:
+                    writer = open(sink, "wb") if isinstance(sink, str) else sink
+                writer.write(df.to_csv(index=False, header=rows == 0).encode("utf-8"))
+            else:
+                if writer is None:
+                    schema = _arrow_schema(df)
+                    writer = pq.ParquetWriter(sink, schema)
+                writer.write_table(pa.Table.from_pandas(df, preserve_index=False).cast(schema))
+            rows += len(df)
+    finally:
+        if writer is not None and writer is not sink:
+            writer.close()
+    return rows
+
+
+def export_to_tempfile(chunks, fmt):
+    """
+    Export into an anonymous temporary file (removed once closed), rewound for reading.
+
+    The chunks go to disk as they are encoded; whoever reads the file back (the
+    download button reads all of it) holds only the encoded bytes, once.
+    """
+    f = tempfile.TemporaryFile()
+    write_export(chunks, f, fmt)
+    f.seek(0)
+    return f
+
+
+def main(argv=None):
+    from datasource import create_db_engine, create_source
+
+    parser = argparse.ArgumentParser(description="Export a filtered table in chunks.")
+    parser.add_argument("table")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--columns", nargs="+")
+    # Each filter takes one or more values (rows matching any of them); omitted means all
+    for name in ("year", "quarter", "state", "district"):
+        parser.add_argument(f"--{name}", nargs="+", default="All")
+    parser.add_argument("--backend", choices=["sql", "parquet", "duckdb"], default=settings.DATA_BACKEND)
+    parser.add_argument("--chunksize", type=int, default=settings.EXPORT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    engine = create_db_engine(settings.DB_URL) if args.backend == "sql" else None
+    source = create_source(args.backend, engine)
+    # Declared column order, whichever backend (and partition layout) the rows come from
+    columns = args.columns or TABLE_COLUMNS.get(args.table)
+    chunks = source.iter_chunks(args.table, columns, args.year, args.quarter, args.state, args.district,
+                                args.chunksize)
+    rows = write_export(chunks, args.out, args.format)
+    print(f"Wrote {rows:,} rows to {args.out}" if rows else "No rows match the filters; nothing written")
+
+
+if __name__ == "__main__":
+    main()
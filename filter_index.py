@@ -0,0 +1,65 @@
+"""
+Positional index over a loaded table.
+
+For every indexed column the index keeps the sorted row positions of each value.
+A filter is then the union of the selected values' positions per column,
+intersected across columns, so the work grows with the number of matching rows
+instead of the table length.
+
+The shared dataset (registry.py) uses it for district selections: its rows are
+stored in (state, year, quarter) ranges, and a district's rows are spread over
+all of them.
+"""
+import numpy as np
+
+from queries import SELECTION_COLUMNS, filter_values
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def intersect_sorted(small, large):
+    """Positions present in both sorted arrays, in O(len(small) * log(len(large)))."""
+    if len(small) > len(large):
+        small, large = large, small
+    if not len(small):
+        return _EMPTY
+    found = np.minimum(np.searchsorted(large, small), len(large) - 1)
+    return small[large[found] == small]
+
+
+class PositionIndex:
+    """value -> sorted row positions, per column of one DataFrame."""
+
+    def __init__(self, df, columns=None):
+        self.size = len(df)
+        self.positions = {}
+        for col in columns or SELECTION_COLUMNS:
+            if col not in df.columns:
+                continue
+            groups = df.groupby(df[col], observed=True, sort=False).indices
+            cast = int if col in ("year", "quarter") else str
+            self.positions[col] = {cast(value): np.asarray(rows, dtype=np.int64) for value, rows in groups.items()}
+
+    def _select(self, col, values):
+        if col not in self.positions:
+            raise KeyError(f"Column not indexed: {col}")
+        index = self.positions[col]
+        arrays = [index[value] for value in values if value in index]
+        if len(arrays) <= 1:
+            return arrays[0] if arrays else _EMPTY
+        # Each row holds one value, so the per-value arrays are disjoint
+        return np.sort(np.concatenate(arrays))
+
+    def lookup(self, **filters):
+        """Sorted positions matching every filter ("All", a value or a list), or None if nothing is filtered."""
+        selected = [
+            self._select(col, values) for col, values in
+            ((col, filter_values(col, value)) for col, value in filters.items()) if values is not None
+        ]
+        if not selected:
+            return None
+        selected.sort(key=len)
+        positions = selected[0]
+        for other in selected[1:]:
+            positions = intersect_sorted(positions, other)
+        return positions
@@ -0,0 +1,239 @@
+"""
+State names, coordinates and boundary GeoJSON for the India map.
+
+The boundary file is kept locally under settings.GEOJSON_DIR together with
+pre-simplified copies. Build (or rebuild) them once with:
+    python geo.py --build-assets
+"""
+import argparse
+import json
+import os
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+import settings
+
+# Upstream source of the state boundaries (properties.ST_NM holds the state name)
+GEOJSON_URL = "https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/raw/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson"
+GEOJSON_NAME = "india_states"
+# Rough north-south extent of India in degrees, used to relate map pixels to tolerance
+INDIA_LAT_SPAN = 30.0
+
+# ----------------------------------
+# STATE DIMENSION
+# ----------------------------------
+# One row per state: Pulse/database slug, GeoJSON name (properties.ST_NM), approximate
+# center and ISO 3166-2 code. Every slug -> name/coordinate lookup goes through this table.
+# The codes follow the 2023 revision of ISO 3166-2:IN, which aligned them with the vehicle
+# registration codes (Telangana IN-TG -> IN-TS, Uttarakhand IN-UT -> IN-UK, Chhattisgarh
+# IN-CT -> IN-CG). The boundary GeoJSON carries no ISO ids; the map joins on properties.ST_NM.
+STATES = [
+    ("andaman-&-nicobar-islands", "Andaman & Nicobar", 11.7401, 92.6586, "IN-AN"),
+    ("andhra-pradesh", "Andhra Pradesh", 15.9129, 79.7400, "IN-AP"),
+    ("arunachal-pradesh", "Arunachal Pradesh", 28.2180, 94.7278, "IN-AR"),
+    ("assam", "Assam", 26.2006, 92.9376, "IN-AS"),
+    ("bihar", "Bihar", 25.0961, 85.3131, "IN-BR"),
+    ("chandigarh", "Chandigarh", 30.7333, 76.7794, "IN-CH"),
+    ("chhattisgarh", "Chhattisgarh", 21.2787, 81.8661, "IN-CG"),
+    ("dadra-&-nagar-haveli-&-daman-&-diu", "Dadra and Nagar Haveli and Daman and Diu", 20.1809, 73.0169, "IN-DH"),
+    ("delhi", "Delhi", 28.7041, 77.1025, "IN-DL"),
+    ("goa", "Goa", 15.2993, 74.1240, "IN-GA"),
+    ("gujarat", "Gujarat", 22.2587, 71.1924, "IN-GJ"),
+    ("haryana", "Haryana", 29.0588, 76.0856, "IN-HR"),
+    ("himachal-pradesh", "Himachal Pradesh", 31.1048, 77.1734, "IN-HP"),
+    ("jammu-&-kashmir", "Jammu & Kashmir", 33.7782, 76.5762, "IN-JK"),
+    ("jharkhand", "Jharkhand", 23.6102, 85.2799, "IN-JH"),
+    ("karnataka", "Karnataka", 15.3173, 75.7139, "IN-KA"),
+    ("kerala", "Kerala", 10.8505, 76.2711, "IN-KL"),
+    ("ladakh", "Ladakh", 34.1526, 77.5771, "IN-LA"),
+    ("lakshadweep", "Lakshadweep", 10.5667, 72.6417, "IN-LD"),
+    ("madhya-pradesh", "Madhya Pradesh", 22.9734, 78.6569, "IN-MP"),
+    ("maharashtra", "Maharashtra", 19.7515, 75.7139, "IN-MH"),
+    ("manipur", "Manipur", 24.6637, 93.9063, "IN-MN"),
+    ("meghalaya", "Meghalaya", 25.4670, 91.3662, "IN-ML"),
+    ("mizoram", "Mizoram", 23.1645, 92.9376, "IN-MZ"),
+    ("nagaland", "Nagaland", 26.1584, 94.5624, "IN-NL"),
+    ("odisha", "Odisha", 20.9517, 85.0985, "IN-OD"),
+    ("puducherry", "Puducherry", 11.9416, 79.8083, "IN-PY"),
+    ("punjab", "Punjab", 31.1471, 75.3412, "IN-PB"),
+    ("rajasthan", "Rajasthan", 27.0238, 74.2179, "IN-RJ"),
+    ("sikkim", "Sikkim", 27.5330, 88.5122, "IN-SK"),
+    ("tamil-nadu", "Tamil Nadu", 11.1271, 78.6569, "IN-TN"),
+    ("telangana", "Telangana", 18.1124, 79.0193, "IN-TS"),
+    ("tripura", "Tripura", 23.9408, 91.9882, "IN-TR"),
+    ("uttar-pradesh", "Uttar Pradesh", 26.8467, 80.9462, "IN-UP"),
+    ("uttarakhand", "Uttarakhand", 30.0668, 79.0193, "IN-UK"),
+    ("west-bengal", "West Bengal", 22.9868, 87.8550, "IN-WB"),
+]
+
+STATE_DIMENSION = pd.DataFrame(STATES, columns=["state_slug", "state", "lat", "lon", "iso_code"])
+STATE_NAMES = dict(zip(STATE_DIMENSION["state_slug"], STATE_DIMENSION["state"]))
+
+
+def _title_slug(slug):
+    # Only the whole word "and" stays lowercase; "Andhra" and "Andaman" keep their capital
+    words = slug.replace('-', ' ').split()
+    return " ".join(w if w in ("&", "and") else w.capitalize() for w in words)
+
+
+def format_state_name(state):
+    """Convert database state name to GeoJSON format"""
+    # Database has: 'andaman-&-nicobar-islands', GeoJSON expects: 'Andaman & Nicobar'
+    return STATE_NAMES.get(state) or _title_slug(state)
+
+
+def attach_state_dimension(df, slug_col="state_slug"):
+    """
+    Add state (GeoJSON name), lat, lon and iso_code to `df` with one merge on the slug.
+    Slugs missing from STATES keep a title-cased name and no coordinates.
+    """
+    df = df.drop(columns=[c for c in ("state", "lat", "lon", "iso_code") if c != slug_col and c in df.columns])
+    df = df.merge(STATE_DIMENSION.rename(columns={"state_slug": slug_col}), on=slug_col, how="left")
+    missing = df["state"].isna()
+    if missing.any():
+        df.loc[missing, "state"] = df.loc[missing, slug_col].astype(str).map(_title_slug)
+    return df
+
+
+# ----------------------------------
+# BOUNDARY GEOJSON
+# ----------------------------------
+def geojson_path(tolerance=None):
+    name = GEOJSON_NAME if tolerance is None else f"{GEOJSON_NAME}_{tolerance:g}"
+    return os.path.join(settings.GEOJSON_DIR, f"{name}.geojson")
+
+
+def _douglas_peucker(points, tolerance):
+    """Keep the vertices of a line that deviate more than `tolerance` degrees."""
+    n = len(points)
+    if n < 3:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        seg = points[end] - points[start]
+        rel = points[start + 1:end] - points[start]
+        seg_len = np.hypot(seg[0], seg[1])
+        if seg_len == 0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / seg_len
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            mid = start + 1 + i
+            keep[mid] = True
+            stack.append((start, mid))
+            stack.append((mid, end))
+    return points[keep]
+
+
+def _simplify_ring(ring, tolerance, precision):
+    points = np.asarray(ring, dtype=float)
+    simplified = _douglas_peucker(points, tolerance)
+    # A closed ring needs at least 4 positions; keep tiny islands as they are
+    if len(simplified) < 4:
+        simplified = points
+    return np.round(simplified, precision).tolist()
+
+
+def simplify_geojson(geojson, tolerance, precision=4):
+    """Return a copy of a Polygon/MultiPolygon FeatureCollection with simplified rings."""
+    features = []
+    for feature in geojson["features"]:
+        geometry = feature["geometry"]
+        if geometry["type"] == "Polygon":
+            coords = [_simplify_ring(ring, tolerance, precision) for ring in geometry["coordinates"]]
+        elif geometry["type"] == "MultiPolygon":
+            coords = [[_simplify_ring(ring, tolerance, precision) for ring in polygon]
+                      for polygon in geometry["coordinates"]]
+        else:
+            coords = geometry["coordinates"]
+        features.append({**feature, "geometry": {"type": geometry["type"], "coordinates": coords}})
+    return {**geojson, "features": features}
+
+
+def count_vertices(geojson):
+    def count(coords):
+        if coords and isinstance(coords[0], (int, float)):
+            return 1
+        return sum(count(c) for c in coords)
+    return sum(count(f["geometry"]["coordinates"]) for f in geojson["features"])
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(data, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def build_geojson_assets(source=None):
+    """
+    Store the full-resolution boundaries locally (downloading them if needed) and
+    write one simplified copy per tolerance in settings.GEOJSON_TOLERANCES.
+    """
+    os.makedirs(settings.GEOJSON_DIR, exist_ok=True)
+    full_path = geojson_path()
+    source = source or (full_path if os.path.exists(full_path) else GEOJSON_URL)
+    if source.startswith(("http://", "https://")):
+        with urllib.request.urlopen(source) as response:
+            geojson = json.load(response)
+    else:
+        geojson = _read_json(source)
+    if os.path.abspath(source) != os.path.abspath(full_path):
+        _write_json(geojson, full_path)
+
+    written = {None: count_vertices(geojson)}
+    for tolerance in settings.GEOJSON_TOLERANCES:
+        simplified = simplify_geojson(geojson, tolerance)
+        _write_json(simplified, geojson_path(tolerance))
+        written[tolerance] = count_vertices(simplified)
+    return written
+
+
+def load_geojson(tolerance=None):
+    """
+    Load the local boundaries at the given tolerance (None = full resolution).
+
+    Falls back to simplifying the full-resolution file in memory when the variant
+    has not been built, and returns None when no local copy exists at all.
+    """
+    path = geojson_path(tolerance)
+    if os.path.exists(path):
+        return _read_json(path)
+    full_path = geojson_path()
+    if tolerance is not None and os.path.exists(full_path):
+        return simplify_geojson(_read_json(full_path), tolerance)
+    return None
+
+
+def pick_geojson_tolerance(map_height):
+    """Coarsest tolerance that stays below one pixel at the given map height."""
+    degrees_per_pixel = INDIA_LAT_SPAN / max(map_height, 1)
+    fitting = [t for t in settings.GEOJSON_TOLERANCES if t <= degrees_per_pixel]
+    return max(fitting) if fitting else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local India boundary GeoJSON.")
+    parser.add_argument("--build-assets", action="store_true",
+                        help="Store the boundaries locally and write the simplified copies")
+    parser.add_argument("--source", help="Local file or URL to read instead of the default")
+    args = parser.parse_args()
+    if args.build_assets:
+        for tolerance, vertices in build_geojson_assets(args.source).items():
+            label = "full" if tolerance is None else f"tolerance {tolerance:g}"
+            print(f"{label:<16} {vertices:>8,} vertices -> {geojson_path(tolerance)}")
+    else:
+        parser.print_help()
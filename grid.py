@@ -0,0 +1,49 @@
+"""
+Data Overview grid: one sorted page of a filtered selection at a time.
+
+Pages are fetched from the data source (ORDER BY ... LIMIT/OFFSET in SQL, a
+slice of the shared Arrow table otherwise), so any row of a large table can be
+reached without loading the selection into the session or the browser. The
+download button writes the whole selection through export.py in chunks to a
+temporary file. Streamlit then reads that file into memory to serve it, so a
+download holds one encoded copy of the export in memory (never the rows as
+DataFrames).
+"""
+import math
+
+import streamlit as st
+
+import settings
+from export import EXPORT_FORMATS, export_to_tempfile
+
+
+def render_data_grid(key, columns, row_count, fetch_page, iter_chunks, file_stem):
+    """
+    `fetch_page(sort_by, descending, offset, limit)` returns one page of the
+    `row_count` rows and `iter_chunks()` yields all of them for the export.
+    `key` names the selection, so paging restarts when the filters change; every
+    widget key is derived from it, so several grids can share a page.
+    """
+    if not row_count:
+        st.info("No rows match the selected filters.")
+        return
+
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
+    sort_by = col1.selectbox("Sort by", [None] + list(columns), key=f"grid_sort:{key}",
+                             format_func=lambda col: "Default order" if col is None else col)
+    descending = col2.toggle("Descending", key=f"grid_desc:{key}", disabled=sort_by is None)
+    page_size = col3.selectbox("Rows per page", settings.GRID_PAGE_SIZES, index=1, key=f"grid_size:{key}")
+    pages = max(1, math.ceil(row_count / page_size))
+    # A new sort or page size starts again from the first page
+    page = col4.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, step=1,
+                             key=f"grid_page:{key}:{sort_by}:{descending}:{page_size}")
+
+    offset = (page - 1) * page_size
+    df = fetch_page(sort_by, descending, offset, page_size)
+    st.dataframe(df, width="stretch", hide_index=True)
+    st.caption(f"Rows {offset + 1:,}–{offset + len(df):,} of {row_count:,}")
+
+    fmt = st.radio("Export format", list(EXPORT_FORMATS), horizontal=True, key=f"grid_format:{key}")
+    # Generated on click, on a separate thread, so the page itself never holds the export
+    st.download_button(f"⬇️ Download all {row_count:,} rows", data=lambda: export_to_tempfile(iter_chunks(), fmt),
+                       file_name=f"{file_stem}.{fmt}", mime=EXPORT_FORMATS[fmt], on_click="ignore")
@@ -0,0 +1,125 @@
+"""
+Growth, market share and ticket size per state, type and quarter.
+
+Derived once per data version (ingest.py / the snapshot writer) from the
+aggregated tables into one long table, so the Trends section reads the rates
+instead of re-deriving them from raw rows on every render:
+
+  - total_count / total_amount  sums per (dataset, state, category, year, quarter)
+  - ticket_size                 total_amount / total_count
+  - *_qoq / *_yoy               change against the previous quarter / the same quarter a year earlier
+  - *_share                     the state's part of the national total for that category and quarter
+
+Totals over every state (state "All") and over every type (category "All") are
+rows of their own, so a national or all-types series is a plain lookup too.
+Rates are fractions (0.1 = +10%) and NaN where there is nothing to compare with.
+"""
+import numpy as np
+import pandas as pd
+from sqlalchemy import inspect, text
+
+from queries import connect, filter_values, quote_identifier
+
+GROWTH_TABLE = "growth_metrics"
+ALL = "All"
+
+# dataset -> (category column, count column, amount column)
+GROWTH_SOURCES = {
+    "agg_trans": ("transaction_type", "transaction_count", "transaction_amount"),
+    "agg_insur": ("insurance_type", "insurance_count", "insurance_amount"),
+}
+
+KEYS = ["state", "category", "year", "quarter"]
+METRICS = ["count", "amount"]
+SUMS = [f"total_{metric}" for metric in METRICS]
+GROWTH_COLUMNS = [
+    "dataset", *KEYS, *SUMS, "ticket_size",
+    "count_qoq", "amount_qoq", "count_yoy", "amount_yoy", "count_share", "amount_share",
+]
+
+
+def growth_source_query(table):
+    """Per (state, category, year, quarter) sums of one aggregated table."""
+    category, count, amount = GROWTH_SOURCES[table]
+    return (f"SELECT state, {category} AS category, year, quarter, "
+            f"SUM({count}) AS total_count, SUM({amount}) AS total_amount "
+            f"FROM {quote_identifier(table)} GROUP BY state, {category}, year, quarter")
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def _derive(dataset, df):
+    df = df.dropna(subset=KEYS).astype({"state": str, "category": str, "year": int, "quarter": int})
+    df = pd.concat([
+        df,
+        df.groupby(["state", "year", "quarter"], as_index=False)[SUMS].sum().assign(category=ALL),
+        df.groupby(["category", "year", "quarter"], as_index=False)[SUMS].sum().assign(state=ALL),
+        df.groupby(["year", "quarter"], as_index=False)[SUMS].sum().assign(state=ALL, category=ALL),
+    ], ignore_index=True)
+    df = df.groupby(KEYS, as_index=False, sort=True)[SUMS].sum()
+
+    # Quarters as consecutive integers, so "previous quarter" and "a year earlier" are fixed offsets.
+    # Joining on the offset (rather than shifting rows) stays correct when a state skips quarters.
+    period = df["year"] * 4 + df["quarter"] - 1
+    current = df[["state", "category"]].assign(period=period)
+    for suffix, lag in (("qoq", 1), ("yoy", 4)):
+        previous = current.merge(current.assign(period=period + lag, **{c: df[c] for c in SUMS}),
+                                 on=["state", "category", "period"], how="left")
+        for metric, col in zip(METRICS, SUMS):
+            df[f"{metric}_{suffix}"] = _ratio(df[col].to_numpy(), previous[col].to_numpy()) - 1
+
+    national = df[df["state"] == ALL][["category", "year", "quarter", *SUMS]]
+    totals = df[["category", "year", "quarter"]].merge(national, on=["category", "year", "quarter"], how="left")
+    for metric, col in zip(METRICS, SUMS):
+        df[f"{metric}_share"] = _ratio(df[col].to_numpy(), totals[col].to_numpy())
+    df["ticket_size"] = _ratio(df["total_amount"].to_numpy(), df["total_count"].to_numpy())
+    return df.assign(dataset=dataset)[GROWTH_COLUMNS]
+
+
+def build_growth_metrics(frames):
+    """{dataset: growth_source_query-shaped DataFrame} -> the growth table."""
+    derived = [_derive(dataset, df) for dataset, df in frames.items() if len(df)]
+    if not derived:
+        return pd.DataFrame(columns=GROWTH_COLUMNS)
+    return pd.concat(derived, ignore_index=True)
+
+
+def build_growth_from_db(conn):
+    return build_growth_metrics({
+        table: pd.read_sql(growth_source_query(table), conn)
+        for table in GROWTH_SOURCES
+        if inspect(conn).has_table(table)
+    })
+
+
+def refresh_growth_metrics(conn):
+    build_growth_from_db(conn).to_sql(GROWTH_TABLE, con=conn, if_exists="replace", index=False)
+
+
+def fetch_growth_metrics(engine, dataset):
+    """One dataset's rows of the stored table, derived on the fly if ingest has not created it yet."""
+    with connect(engine) as conn:
+        if inspect(conn).has_table(GROWTH_TABLE):
+            return pd.read_sql(text(f"SELECT * FROM {GROWTH_TABLE} WHERE dataset = :dataset"), conn,
+                               params={"dataset": dataset})
+        df = build_growth_from_db(conn)
+    return df[df["dataset"] == dataset].reset_index(drop=True)
+
+
+def select_growth(df, year="All", quarter="All", state="All", category=ALL):
+    """
+    Rows of one dataset's growth table for the Analysis filters: the selected
+    states (or the national totals), the selected periods and one category, with
+    a "Period" label. Rates still compare against quarters outside the selection.
+    """
+    states = filter_values("state", state) or (ALL,)
+    rows = df[df["state"].isin(states) & (df["category"] == category)]
+    for col, value in (("year", year), ("quarter", quarter)):
+        values = filter_values(col, value)
+        if values is not None:
+            rows = rows[rows[col].isin(values)]
+    rows = rows.sort_values(["state", "year", "quarter"])
+    return rows.assign(Period=rows["year"].astype(str) + "-Q" + rows["quarter"].astype(str))
@@ -0,0 +1,202 @@
+"""
+Pre-aggregated geographic levels for the drill-down views.
+
+One table (geo_levels) holds, per dataset, the sums of every node of the
+country -> state -> district / pincode hierarchy, keyed by
+(dataset, level, parent, year, quarter):
+
+  - level "state":    parent "india", from the aggregated tables (map_user for users)
+  - level "district": parent = the state, from the map_* tables
+  - level "pincode":  parent = the state, from the pincode rows of the top_* tables
+                      (Pulse does not say which district a pincode belongs to)
+
+Besides each quarter, every node has per-year rows (quarter 0) and all-period
+rows (year 0, quarter 0). Those sum the quarters, except for running totals
+(registered users), which take the node's latest quarter in the period instead.
+`ranking` is the node's position among its siblings
+(1 = largest), so a top-N list is an indexed range read and each drill-down
+step fetches only the children of the chosen node.
+"""
+import pandas as pd
+from sqlalchemy import inspect, text
+
+from queries import connect, create_index, filter_values, quote_identifier
+
+GEO_LEVELS_TABLE = "geo_levels"
+COUNTRY = "india"
+ALL_PERIODS = 0
+
+# dataset -> level -> (table, count column, amount column or None)
+HIERARCHY_SOURCES = {
+    "transactions": {
+        "state": ("agg_trans", "transaction_count", "transaction_amount"),
+        "district": ("map_trans", "transaction_count", "transaction_amount"),
+        "pincode": ("top_trans", "transaction_count", "transaction_amount"),
+    },
+    "insurance": {
+        "state": ("agg_insur", "insurance_count", "insurance_amount"),
+        "district": ("map_insur", "insurance_count", "insurance_amount"),
+        "pincode": ("top_insur", "insurance_count", "insurance_amount"),
+    },
+    "users": {
+        "state": ("map_user", "registered_users", "app_opens"),
+        "district": ("map_user", "registered_users", "app_opens"),
+        "pincode": ("top_users", "registered_users", None),
+    },
+}
+# Datasets summed from others: payments matches the Home map's total_value (transactions + insurance)
+COMBINED_DATASETS = {"payments": ["transactions", "insurance"]}
+# Siblings are ranked by amount, except users (registered users; top_users has no app opens)
+RANK_BY = {"users": "total_count"}
+# Running totals rather than per-quarter flows: a period's value is its latest quarter, not the sum
+STOCK_COLUMNS = {"users": ["total_count"]}
+# Analysis table -> the dataset its drill-down shows
+TABLE_DATASETS = {"agg_trans": "transactions", "agg_insur": "insurance", "map_user": "users"}
+
+KEYS = ["dataset", "level", "parent", "year", "quarter"]
+SUMS = ["total_count", "total_amount"]
+GEO_LEVEL_COLUMNS = KEYS + ["name", *SUMS, "ranking"]
+
+
+def rank_column(dataset):
+    return RANK_BY.get(dataset, "total_amount")
+
+
+def level_query(level, table, count, amount):
+    """Sums of one level's nodes per quarter from one fact table."""
+    parent = "" if level == "state" else "state AS parent, "
+    group = "state, year, quarter" if level == "state" else f"state, {level}, year, quarter"
+    amount_sql = f"SUM({amount})" if amount else "NULL"
+    return (f"SELECT {parent}{level} AS name, year, quarter, SUM({count}) AS total_count, "
+            f"{amount_sql} AS total_amount FROM {quote_identifier(table)} "
+            f"WHERE {level} IS NOT NULL GROUP BY {group}")
+
+
+def level_frame(df, level, count, amount):
+    """level_query() over a DataFrame, for the Parquet snapshot."""
+    keys = (["state"] if level != "state" else []) + [level, "year", "quarter"]
+    sums = {"total_count": (count, "sum")}
+    if amount:
+        sums["total_amount"] = (amount, "sum")
+    out = df.dropna(subset=[level]).groupby(keys, observed=True).agg(**sums).reset_index()
+    return out.rename(columns={"state": "parent", level: "name"} if level != "state" else {level: "name"})
+
+
+def _period_rows(df, keys):
+    """One row per `keys` group: quarters summed, STOCK_COLUMNS taken from the latest quarter."""
+    out = df.groupby(keys, as_index=False)[SUMS].sum(min_count=1)
+    for dataset, columns in STOCK_COLUMNS.items():
+        rows = df[df["dataset"] == dataset]
+        if rows.empty:
+            continue
+        latest = rows.sort_values(["year", "quarter"]).groupby(keys, as_index=False)[columns].last()
+        merged = out[keys].merge(latest, on=keys, how="left")
+        stock = (out["dataset"] == dataset).to_numpy()
+        for col in columns:
+            out.loc[stock, col] = merged.loc[stock, col].to_numpy()
+    return out
+
+
+def build_geo_levels(frames):
+    """{(dataset, level): level_query-shaped DataFrame} -> the geo_levels table."""
+    parts = []
+    for (dataset, level), df in frames.items():
+        df = df.assign(dataset=dataset, level=level)
+        if level == "state":
+            df = df.assign(parent=COUNTRY)
+        parts.append(df.reindex(columns=KEYS + ["name", *SUMS]))
+    if not parts:
+        return pd.DataFrame(columns=GEO_LEVEL_COLUMNS)
+    df = pd.concat(parts, ignore_index=True)
+    df = df.dropna(subset=["parent", "name", "year", "quarter"])
+    df = df.astype({"parent": str, "name": str, "year": int, "quarter": int,
+                    "total_count": float, "total_amount": float})
+    node = ["dataset", "level", "parent", "name"]
+
+    combined = [
+        df[df["dataset"].isin(members)].assign(dataset=dataset)
+        for dataset, members in COMBINED_DATASETS.items()
+    ]
+    df = pd.concat([df, *combined], ignore_index=True)
+    # min_count keeps a missing amount (users' pincodes) missing instead of 0
+    df = df.groupby(node + ["year", "quarter"], as_index=False)[SUMS].sum(min_count=1)
+    df = pd.concat([
+        df,
+        _period_rows(df, node + ["year"]).assign(quarter=ALL_PERIODS),
+        _period_rows(df, node).assign(year=ALL_PERIODS, quarter=ALL_PERIODS),
+    ], ignore_index=True)
+
+    value = df["total_amount"].where(~df["dataset"].isin(list(RANK_BY)), df["total_count"])
+    df["ranking"] = (value.fillna(0).groupby([df[k] for k in KEYS]).rank(method="first", ascending=False)
+                     .astype(int))
+    return df.sort_values(KEYS + ["ranking"], ignore_index=True)[GEO_LEVEL_COLUMNS]
+
+
+def build_geo_levels_from_db(conn):
+    frames = {}
+    for dataset, levels in HIERARCHY_SOURCES.items():
+        for level, (table, count, amount) in levels.items():
+            if inspect(conn).has_table(table):
+                frames[(dataset, level)] = pd.read_sql(level_query(level, table, count, amount), conn)
+    return build_geo_levels(frames)
+
+
+def refresh_geo_levels(conn):
+    build_geo_levels_from_db(conn).to_sql(GEO_LEVELS_TABLE, con=conn, if_exists="replace", index=False)
+    create_index(conn, GEO_LEVELS_TABLE, f"ix_{GEO_LEVELS_TABLE}_lookup", KEYS + ["ranking"],
+                 text_columns=["dataset", "level", "parent"])
+
+
+def children_query(limit=None):
+    """One node's children, best first; `limit` keeps only the precomputed top N."""
+    where = " AND ".join(f"{col} = :{col}" for col in KEYS)
+    top = f" AND ranking <= {int(limit)}" if limit else ""
+    return f"SELECT * FROM {GEO_LEVELS_TABLE} WHERE {where}{top} ORDER BY ranking"
+
+
+def children_params(dataset, level, parent, year=ALL_PERIODS, quarter=ALL_PERIODS):
+    return {"dataset": dataset, "level": level, "parent": str(parent), "year": int(year), "quarter": int(quarter)}
+
+
+def select_children(df, dataset, level, parent, year=ALL_PERIODS, quarter=ALL_PERIODS, limit=None):
+    """children_query() over an in-memory geo_levels frame."""
+    params = children_params(dataset, level, parent, year, quarter)
+    mask = pd.Series(True, index=df.index)
+    for col, value in params.items():
+        mask &= df[col] == value
+    if limit:
+        mask &= df["ranking"] <= int(limit)
+    return df[mask].sort_values("ranking", ignore_index=True)
+
+
+def fetch_children(engine, dataset, level, parent, year=ALL_PERIODS, quarter=ALL_PERIODS, limit=None):
+    """Read from the stored table, building the levels on the fly if ingest has not created it yet."""
+    with connect(engine) as conn:
+        if inspect(conn).has_table(GEO_LEVELS_TABLE):
+            return pd.read_sql(text(children_query(limit)), conn,
+                               params=children_params(dataset, level, parent, year, quarter))
+        df = build_geo_levels_from_db(conn)
+    return select_children(df, dataset, level, parent, year, quarter, limit)
+
+
+def drill_period(year="All", quarter="All"):
+    """
+    (year, quarter) key of the pre-aggregated rows for the Analysis filters, and
+    whether it matches them: the levels hold single quarters, single years (quarter
+    0) and all periods (0, 0), so other selections fall back to all periods.
+    """
+    years, quarters = filter_values("year", year), filter_values("quarter", quarter)
+    if years is None and quarters is None:
+        return (ALL_PERIODS, ALL_PERIODS), True
+    if years is not None and len(years) == 1:
+        if quarters is None:
+            return (years[0], ALL_PERIODS), True
+        if len(quarters) == 1:
+            return (years[0], quarters[0]), True
+    return (ALL_PERIODS, ALL_PERIODS), False
+
+
+def period_label(year, quarter):
+    if year == ALL_PERIODS:
+        return "all periods"
+    return str(year) if quarter == ALL_PERIODS else f"{year}-Q{quarter}"
@@ -0,0 +1,476 @@
+"""
+Pulse JSON ingestion.
+
+Walks a PhonePe Pulse checkout (state/year/quarter.json) for all nine datasets,
+parses the files across a process pool and yields column batches that build the
+lowercase tables read by apply.py.
+
+Usage:
+    python ingest.py --root pulse/data
+    python ingest.py --root pulse/data --tables map_trans map_user --load
+    python ingest.py --root pulse/data --incremental
+    python ingest.py --root pulse/data --load --target parquet   # snapshot only, no database
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from sqlalchemy import inspect, text
+
+import settings
+from bulk_load import bulk_load, create_bulk_engine, format_stats
+from datasource import update_snapshot_partitions, write_snapshot_derived, write_snapshot_table
+from growth import refresh_growth_metrics
+from hierarchy import refresh_geo_levels
+from queries import bump_data_version, ensure_indexes, refresh_state_rollup
+from schema import apply_schema, format_memory
+
+
+# ----------------------------------
+# JSON PARSERS (one per dataset)
+# ----------------------------------
+# Each parser receives the decoded JSON document and returns a list of row tuples
+# holding every column after (state, year, quarter).
+
+def _section(data, key):
+    return (data.get("data") or {}).get(key) or []
+
+
+def _parse_agg_payments(data):
+    rows = []
+    for item in _section(data, "transactionData"):
+        instrument = item["paymentInstruments"][0]
+        rows.append((item["name"], instrument["count"], instrument["amount"]))
+    return rows
+
+
+def _parse_agg_users(data):
+    rows = []
+    for item in _section(data, "usersByDevice"):
+        rows.append((item.get("brand"), item.get("count"), item.get("percentage")))
+    return rows
+
+
+def _parse_map_payments(data):
+    rows = []
+    for item in _section(data, "hoverDataList"):
+        metric = item["metric"][0]
+        rows.append((item["name"], metric["type"], metric["count"], metric["amount"]))
+    return rows
+
+
+def _parse_map_users(data):
+    hover_data = (data.get("data") or {}).get("hoverData") or {}
+    rows = []
+    for district, values in hover_data.items():
+        rows.append((district, values.get("registeredUsers"), values.get("appOpens")))
+    return rows
+
+
+def _parse_top_payments(data):
+    rows = []
+    for item in _section(data, "districts"):
+        rows.append((item["entityName"], None, item["metric"]["count"], item["metric"]["amount"]))
+    for item in _section(data, "pincodes"):
+        rows.append((None, item["entityName"], item["metric"]["count"], item["metric"]["amount"]))
+    return rows
+
+
+def _parse_top_users(data):
+    rows = []
+    for item in _section(data, "districts"):
+        rows.append((item["name"], None, item["registeredUsers"]))
+    for item in _section(data, "pincodes"):
+        rows.append((None, item["name"], item["registeredUsers"]))
+    return rows
+
+
+# ----------------------------------
+# DATASETS
+# ----------------------------------
+# table name -> directory under the Pulse data root, parser and output columns.
+# Column names match what get_data() in apply.py expects.
+KEY_COLUMNS = ["state", "year", "quarter"]
+
+DATASETS = {
+    "agg_trans": {
+        "path": os.path.join("aggregated", "transaction"),
+        "parser": _parse_agg_payments,
+        "columns": KEY_COLUMNS + ["transaction_type", "transaction_count", "transaction_amount"],
+    },
+    "agg_insur": {
+        "path": os.path.join("aggregated", "insurance"),
+        "parser": _parse_agg_payments,
+        "columns": KEY_COLUMNS + ["insurance_type", "insurance_count", "insurance_amount"],
+    },
+    "agg_users": {
+        "path": os.path.join("aggregated", "user"),
+        "parser": _parse_agg_users,
+        "columns": KEY_COLUMNS + ["user_type", "user_count", "user_percentage"],
+    },
+    "map_trans": {
+        "path": os.path.join("map", "transaction", "hover"),
+        "parser": _parse_map_payments,
+        "columns": KEY_COLUMNS + ["district", "transaction_type", "transaction_count", "transaction_amount"],
+    },
+    "map_insur": {
+        "path": os.path.join("map", "insurance", "hover"),
+        "parser": _parse_map_payments,
+        "columns": KEY_COLUMNS + ["district", "insurance_type", "insurance_count", "insurance_amount"],
+    },
+    "map_user": {
+        "path": os.path.join("map", "user", "hover"),
+        "parser": _parse_map_users,
+        "columns": KEY_COLUMNS + ["district", "registered_users", "app_opens"],
+    },
+    "top_trans": {
+        "path": os.path.join("top", "transaction"),
+        "parser": _parse_top_payments,
+        "columns": KEY_COLUMNS + ["district", "pincode", "transaction_count", "transaction_amount"],
+    },
+    "top_insur": {
+        "path": os.path.join("top", "insurance"),
+        "parser": _parse_top_payments,
+        "columns": KEY_COLUMNS + ["district", "pincode", "insurance_count", "insurance_amount"],
+    },
+    "top_users": {
+        "path": os.path.join("top", "user"),
+        "parser": _parse_top_users,
+        "columns": KEY_COLUMNS + ["district", "pincode", "registered_users"],
+    },
+}
+
+
+# ----------------------------------
+# WALKER
+# ----------------------------------
+def _subdirs(path):
+    with os.scandir(path) as entries:
+        return sorted(e.name for e in entries if e.is_dir())
+
+
+def walk_files(table, root=None):
+    """Yield (file_path, state, year, quarter) for every quarter file of a dataset."""
+    root = root or settings.PULSE_DATA_DIR
+    state_root = os.path.join(root, DATASETS[table]["path"], "country", "india", "state")
+    if not os.path.isdir(state_root):
+        return
+    for state in _subdirs(state_root):
+        state_path = os.path.join(state_root, state)
+        for year in _subdirs(state_path):
+            year_path = os.path.join(state_path, year)
+            with os.scandir(year_path) as entries:
+                names = sorted(e.name for e in entries if e.is_file() and e.name.endswith(".json"))
+            for name in names:
+                yield os.path.join(year_path, name), state, int(year), int(name[:-len(".json")])
+
+
+# ----------------------------------
+# PARSING
+# ----------------------------------
+def parse_files(table, files):
+    """Parse a list of walker entries into a column batch (dict of lists)."""
+    spec = DATASETS[table]
+    batch = {col: [] for col in spec["columns"]}
+    value_cols = spec["columns"][len(KEY_COLUMNS):]
+    for file_path, state, year, quarter in files:
+        with open(file_path, "r") as f:
+            data = json.load(f)
+        for row in spec["parser"](data):
+            batch["state"].append(state)
+            batch["year"].append(year)
+            batch["quarter"].append(quarter)
+            for col, value in zip(value_cols, row):
+                batch[col].append(value)
+    return batch
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def iter_batches(table, root=None, files=None, workers=None, batch_files=None, progress=None):
+    """
+    Yield column batches for a dataset, parsing files across a process pool.
+
+    `files` defaults to every file found by walk_files(). `progress`, if given, is
+    called as progress(table, files_done, files_total, elapsed_seconds) after each batch.
+    """
+    files = list(walk_files(table, root)) if files is None else list(files)
+    workers = workers or settings.INGEST_WORKERS
+    batch_files = batch_files or settings.INGEST_BATCH_FILES
+    chunks = list(_chunks(files, batch_files))
+    start = time.perf_counter()
+    done = 0
+
+    if workers <= 1 or len(chunks) <= 1:
+        results = (parse_files(table, chunk) for chunk in chunks)
+        for chunk, batch in zip(chunks, results):
+            done += len(chunk)
+            if progress:
+                progress(table, done, len(files), time.perf_counter() - start)
+            yield batch
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(parse_files, [table] * len(chunks), chunks)
+        for chunk, batch in zip(chunks, results):
+            done += len(chunk)
+            if progress:
+                progress(table, done, len(files), time.perf_counter() - start)
+            yield batch
+
+
+def load_table(table, root=None, files=None, workers=None, progress=None):
+    """Build the full DataFrame for one dataset."""
+    frames = [
+        pd.DataFrame(batch, columns=DATASETS[table]["columns"])
+        for batch in iter_batches(table, root, files=files, workers=workers, progress=progress)
+    ]
+    if not frames:
+        return pd.DataFrame(columns=DATASETS[table]["columns"])
+    return apply_schema(pd.concat(frames, ignore_index=True), table)
+
+
+# ----------------------------------
+# INCREMENTAL INGEST
+# ----------------------------------
+# The manifest maps target ("db" / "parquet") -> table -> relative file path ->
+# {"mtime", "size", "sha256"}. Each target keeps its own entries, so a load into one
+# of them never hides changes from the other. A file is re-parsed only when its
+# mtime/size moved AND its content hash changed.
+TARGETS = ("db", "parquet")
+
+
+def load_manifest(path=None):
+    path = path or settings.INGEST_MANIFEST
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    # Manifests written before targets were tracked only ever described the database
+    if manifest and not set(manifest) & set(TARGETS):
+        manifest = {"db": manifest}
+    return manifest
+
+
+def manifest_targets(engine, snapshot_dir):
+    return [target for target, enabled in zip(TARGETS, (engine is not None, bool(snapshot_dir))) if enabled]
+
+
+def save_manifest(manifest, path=None):
+    path = path or settings.INGEST_MANIFEST
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _hash_file(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def diff_files(table, root=None, manifest=None):
+    """
+    Compare the files on disk with the manifest entries for a dataset.
+
+    Returns (changed, removed, entries): walker tuples for new/changed files,
+    (state, year, quarter) keys of files that disappeared, and the refreshed
+    manifest entries for the table.
+    """
+    root = root or settings.PULSE_DATA_DIR
+    old_entries = (manifest or {}).get(table, {})
+    entries = {}
+    changed = []
+    for file_path, state, year, quarter in walk_files(table, root):
+        rel_path = os.path.relpath(file_path, root).replace(os.sep, "/")
+        stat = os.stat(file_path)
+        old = old_entries.get(rel_path)
+        if old and old["mtime"] == stat.st_mtime and old["size"] == stat.st_size:
+            entries[rel_path] = old
+            continue
+        sha256 = _hash_file(file_path)
+        entries[rel_path] = {"mtime": stat.st_mtime, "size": stat.st_size, "sha256": sha256}
+        if not old or old["sha256"] != sha256:
+            changed.append((file_path, state, year, quarter))
+
+    removed = []
+    for rel_path in old_entries.keys() - entries.keys():
+        state, year, name = rel_path.split("/")[-3:]
+        removed.append((state, int(year), int(name[:-len(".json")])))
+    return changed, removed, entries
+
+
+def upsert_table(conn, table, df, keys):
+    """Replace the rows of the given (state, year, quarter) keys with `df`."""
+    if keys and inspect(conn).has_table(table):
+        conn.execute(
+            text(f"DELETE FROM {table} WHERE state = :state AND year = :year AND quarter = :quarter"),
+            [{"state": state, "year": year, "quarter": quarter} for state, year, quarter in keys],
+        )
+    if not df.empty:
+        return bulk_load(df, table, conn)
+    return None
+
+
+def _rows_of_files(df, files):
+    """Rows of `df` parsed from the given walker entries."""
+    keys = {(state, year, quarter) for _, state, year, quarter in files}
+    mask = [key in keys for key in zip(df["state"], df["year"], df["quarter"])]
+    return df.loc[mask]
+
+
+def run_incremental(engine, tables=None, root=None, manifest_path=None, workers=None, progress=None,
+                    snapshot_dir=None):
+    """
+    Parse only new or changed quarter files and upsert their rows into the database
+    (if `engine`) and the Parquet snapshot (if `snapshot_dir`). Each target is
+    compared with its own manifest entries and receives only its own changes.
+
+    Returns {table: load stats or None}.
+    """
+    root = root or settings.PULSE_DATA_DIR
+    manifest = load_manifest(manifest_path)
+    targets = manifest_targets(engine, snapshot_dir)
+    written = {}
+    for table in tables or list(DATASETS):
+        diffs = {target: diff_files(table, root, manifest.get(target)) for target in targets}
+        changed = sorted({entry for target_changed, _, _ in diffs.values() for entry in target_changed})
+        if changed or any(removed for _, removed, _ in diffs.values()):
+            df = load_table(table, root, files=changed, workers=workers, progress=progress)
+            stats = None
+            start = time.perf_counter()
+            for target, (target_changed, removed, _) in diffs.items():
+                keys = {(state, year, quarter) for _, state, year, quarter in target_changed} | set(removed)
+                if not keys:
+                    continue
+                rows = df if len(target_changed) == len(changed) else _rows_of_files(df, target_changed)
+                if target == "db":
+                    with engine.begin() as conn:
+                        stats = upsert_table(conn, table, rows, keys) or stats
+                else:
+                    start = time.perf_counter()
+                    update_snapshot_partitions(rows, table, keys, snapshot_dir)
+                    stats = stats or _load_stats(table, len(rows), start, "parquet")
+            # Only deletions (files removed from the checkout) still count as a change
+            written[table] = stats or _load_stats(table, 0, start, "delete")
+        else:
+            written[table] = None
+        # Only record the new state once the rows are committed
+        for target, (_, _, entries) in diffs.items():
+            manifest.setdefault(target, {})[table] = entries
+        save_manifest(manifest, manifest_path)
+    if any(written.values()):
+        mark_data_changed(engine, snapshot_dir)
+    return written
+
+
+def run_full(engine, tables=None, root=None, manifest_path=None, workers=None, progress=None,
+             snapshot_dir=None):
+    """
+    Re-parse every file, replace each table in the database (if `engine`) and the
+    Parquet snapshot (if `snapshot_dir`) and rebuild those targets' manifest entries.
+
+    Returns {table: load stats}.
+    """
+    root = root or settings.PULSE_DATA_DIR
+    manifest = load_manifest(manifest_path)
+    written = {}
+    for table in tables or list(DATASETS):
+        _, _, entries = diff_files(table, root, {})
+        df = load_table(table, root, workers=workers, progress=progress)
+        stats = None
+        if engine is not None:
+            with engine.begin() as conn:
+                stats = bulk_load(df, table, conn, if_exists="replace")
+        if snapshot_dir:
+            start = time.perf_counter()
+            write_snapshot_table(df, table, snapshot_dir)
+            stats = stats or _load_stats(table, len(df), start, "parquet")
+        written[table] = stats
+        for target in manifest_targets(engine, snapshot_dir):
+            manifest.setdefault(target, {})[table] = entries
+        save_manifest(manifest, manifest_path)
+    mark_data_changed(engine, snapshot_dir)
+    return written
+
+
+def _load_stats(table, rows, start, method):
+    seconds = time.perf_counter() - start
+    return {"table": table, "rows": rows, "seconds": seconds,
+            "rows_per_sec": rows / seconds if seconds > 0 else 0.0, "method": method}
+
+
+def mark_data_changed(engine, snapshot_dir=None):
+    """
+    Index the fact tables, rebuild the derived tables and stamp a new data
+    version so the dashboard caches refresh.
+    """
+    version = time.time_ns() // 1_000_000
+    if engine is not None:
+        with engine.begin() as conn:
+            for table in DATASETS:
+                ensure_indexes(conn, table)
+            refresh_state_rollup(conn)
+            refresh_growth_metrics(conn)
+            refresh_geo_levels(conn)
+            bump_data_version(conn, version)
+    if snapshot_dir:
+        write_snapshot_derived(version, snapshot_dir)
+
+
+def print_progress(table, done, total, elapsed):
+    rate = done / elapsed if elapsed > 0 else 0.0
+    end = "\n" if done == total else ""
+    sys.stderr.write(f"\r{table:<10} {done:>6}/{total:<6} files  {rate:,.0f} files/sec")
+    sys.stderr.write(end)
+    sys.stderr.flush()
+
+
+# ----------------------------------
+# CLI
+# ----------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest PhonePe Pulse JSON into the dashboard tables.")
+    parser.add_argument("--root", default=settings.PULSE_DATA_DIR, help="Pulse data directory")
+    parser.add_argument("--tables", nargs="+", choices=sorted(DATASETS), default=list(DATASETS))
+    parser.add_argument("--workers", type=int, default=settings.INGEST_WORKERS)
+    parser.add_argument("--manifest", default=settings.INGEST_MANIFEST)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--load", action="store_true", help="Replace the database tables with a full re-parse")
+    mode.add_argument("--incremental", action="store_true",
+                      help="Parse only new or changed files and upsert their rows")
+    parser.add_argument("--target", choices=["db", "parquet", "both"], default="db",
+                        help="Write to the database, the Parquet snapshot, or both")
+    parser.add_argument("--snapshot-dir", default=settings.SNAPSHOT_DIR)
+    args = parser.parse_args(argv)
+
+    if not (args.load or args.incremental):
+        for table in args.tables:
+            df = load_table(table, args.root, workers=args.workers, progress=print_progress)
+            print(format_memory(table) if len(df) else f"{table}: 0 rows")
+        return
+
+    engine = create_bulk_engine(settings.DB_URL) if args.target in ("db", "both") else None
+    snapshot_dir = args.snapshot_dir if args.target in ("parquet", "both") else None
+    run = run_incremental if args.incremental else run_full
+    start = time.perf_counter()
+    written = run(engine, args.tables, args.root, args.manifest, args.workers, progress=print_progress,
+                  snapshot_dir=snapshot_dir)
+    for table, stats in written.items():
+        print(format_stats(stats) if stats else f"{table}: up to date")
+    print(f"done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
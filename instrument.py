@@ -0,0 +1,138 @@
+"""
+Timing of the dashboard's hot paths.
+
+A span times one step of a page render:
+
+  - query:       a data source call (its SQL statements and returned row count)
+  - aggregation: a shared rollup behind several charts (the chart cube, period sums)
+  - figure:      building one Plotly figure
+  - chart:       handing a figure to st.plotly_chart, plus its serialized size in
+                 bytes when settings.TIMING_PAYLOAD is set
+
+Spans feed three outputs: per-(kind, name) totals exported by metrics.py as
+phonepe_span_* series, an optional JSON lines log (settings.TIMING_LOG), and the
+trace of the current render that the debug sidebar panel shows.
+
+The current trace lives in a context variable. Work handed to a thread pool
+reports into it when submitted through copy_context().run.
+"""
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import plotly.io as pio
+
+import settings
+
+KINDS = ["query", "aggregation", "figure", "chart"]
+
+_trace = contextvars.ContextVar("phonepe_trace", default=None)
+_open_spans = contextvars.ContextVar("phonepe_open_spans", default=())
+_totals = {}
+_lock = threading.Lock()
+
+
+def start_trace():
+    """Collect the spans of this render (and of work it submits with copy_context) into a new list."""
+    trace = []
+    _trace.set(trace)
+    return trace
+
+
+def _record(span):
+    trace = _trace.get()
+    if trace is not None:
+        trace.append(span)
+    with _lock:
+        totals = _totals.setdefault((span["kind"], span["name"]), {
+            "count": 0, "seconds_total": 0.0, "seconds_max": 0.0, "rows_total": 0, "bytes_total": 0,
+        })
+        totals["count"] += 1
+        totals["seconds_total"] += span["seconds"]
+        totals["seconds_max"] = max(totals["seconds_max"], span["seconds"])
+        totals["rows_total"] += span.get("rows") or 0
+        totals["bytes_total"] += span.get("bytes") or 0
+        if settings.TIMING_LOG:
+            with open(settings.TIMING_LOG, "a") as f:
+                f.write(json.dumps(span, default=str) + "\n")
+
+
+@contextmanager
+def span(kind, name, **fields):
+    """Time the block; the yielded dict takes extra fields such as rows or bytes."""
+    record = {"kind": kind, "name": name, **fields}
+    if not settings.TIMINGS:
+        yield record
+        return
+    token = _open_spans.set(_open_spans.get() + (record,))
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        record["ts"] = time.time()
+        _open_spans.reset(token)
+        _record(record)
+
+
+def timed(kind, name, fn):
+    with span(kind, name):
+        return fn()
+
+
+def note_sql(statement):
+    """Attach a statement to the innermost open span (called from the database layers)."""
+    spans = _open_spans.get()
+    if spans:
+        spans[-1].setdefault("sql", []).append(" ".join(str(statement).split()))
+
+
+def payload_bytes(fig):
+    # The same JSON encoding st.plotly_chart sends to the browser
+    return len(pio.to_json(fig, validate=False))
+
+
+def row_count(result):
+    # DataFrames report their length; scalars and dicts (KPIs, versions) have no row count
+    return len(result) if hasattr(result, "columns") else None
+
+
+def totals():
+    """[(labels, {stat: value})] per (kind, name), for metrics.register_series()."""
+    with _lock:
+        return [({"kind": kind, "name": name}, dict(stats)) for (kind, name), stats in sorted(_totals.items())]
+
+
+class TimedSource:
+    """Wraps a data source so every data call is a "query" span named <backend>.<method>(<table>)."""
+
+    TIMED = {"data_version", "table_summary", "state_rollup", "growth_metrics", "children",
+             "filter_options", "filtered", "row_count", "page"}
+
+    def __init__(self, source):
+        self._source = source
+
+    def __getattr__(self, attr):
+        value = getattr(self._source, attr)
+        if attr not in self.TIMED:
+            return value
+
+        def call(*args, **kwargs):
+            table = f"({args[0]})" if args and isinstance(args[0], str) else ""
+            with span("query", f"{self._source.name}.{attr}{table}") as record:
+                result = value(*args, **kwargs)
+                record["rows"] = row_count(result)
+            return result
+        return call
+
+
+def summarize(trace):
+    """Seconds and span count per kind for one trace."""
+    out = {kind: {"seconds": 0.0, "count": 0} for kind in KINDS}
+    for record in trace:
+        stats = out.setdefault(record["kind"], {"seconds": 0.0, "count": 0})
+        stats["seconds"] += record.get("seconds", 0.0)
+        stats["count"] += 1
+    return out
@@ -0,0 +1,86 @@
+"""
+Process-wide metrics in Prometheus text format.
+
+Streamlit cannot serve a /metrics endpoint, so the app writes the exposition
+text to settings.METRICS_TEXTFILE (e.g. for node_exporter's textfile collector).
+"""
+import os
+import threading
+import time
+
+import settings
+
+PREFIX = "phonepe"
+
+_collectors = {}
+_series = {}
+_lock = threading.Lock()
+_last_write = 0.0
+
+
+def register(name, collect):
+    """Register `collect()` -> {stat: number}; exported as phonepe_<name>_<stat>."""
+    with _lock:
+        _collectors[name] = collect
+
+
+def register_series(name, collect):
+    """Register `collect()` -> [(labels, {stat: number})]; exported as phonepe_<name>_<stat>{labels}."""
+    with _lock:
+        _series[name] = collect
+
+
+def collect():
+    with _lock:
+        collectors = dict(_collectors)
+    return {name: fn() for name, fn in collectors.items()}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _label_text(labels):
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+def render_prometheus():
+    lines = []
+    for name, stats in sorted(collect().items()):
+        for stat, value in sorted(stats.items()):
+            if not _is_number(value):
+                continue
+            metric = f"{PREFIX}_{name}_{stat}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+    with _lock:
+        series = dict(_series)
+    for name, collect_series in sorted(series.items()):
+        by_metric = {}
+        for labels, stats in collect_series():
+            for stat, value in stats.items():
+                if _is_number(value):
+                    by_metric.setdefault(f"{PREFIX}_{name}_{stat}", []).append(f"{_label_text(labels)} {value}")
+        for metric, samples in sorted(by_metric.items()):
+            lines.append(f"# TYPE {metric} gauge")
+            lines.extend(metric + sample for sample in samples)
+    return "\n".join(lines) + "\n"
+
+
+def maybe_write_textfile(path=None):
+    """Write the current metrics at most once per settings.METRICS_WRITE_INTERVAL seconds."""
+    global _last_write
+    path = path or settings.METRICS_TEXTFILE
+    if not path:
+        return False
+    now = time.monotonic()
+    with _lock:
+        if now - _last_write < settings.METRICS_WRITE_INTERVAL:
+            return False
+        _last_write = now
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+    return True
@@ -0,0 +1,352 @@
+"""
+SQL used by the dashboard pages.
+"""
+import re
+from contextlib import nullcontext
+
+import pandas as pd
+from sqlalchemy import Connection, inspect, text
+
+from geo import attach_state_dimension
+from schema import TABLE_COLUMNS
+
+DATA_VERSION_TABLE = "data_version"
+FILTER_COLUMNS = ["year", "quarter", "state"]
+# Every filter the Analysis page can apply; district only on tables that have it (map_user)
+SELECTION_COLUMNS = FILTER_COLUMNS + ["district"]
+INDEX_COLUMNS = ["state", "year", "quarter"]
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def quote_identifier(name):
+    # Table/column names are interpolated into SQL, so only plain identifiers are allowed
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return name
+
+
+def connect(engine):
+    # Every fetch_* accepts an Engine or an already checked-out Connection (reused, not closed)
+    return nullcontext(engine) if isinstance(engine, Connection) else engine.connect()
+
+
+# ----------------------------------
+# ANALYSIS PAGE
+# ----------------------------------
+def get_data(engine, table_name):
+    query = f"SELECT * FROM {quote_identifier(table_name)}"
+    with connect(engine) as conn:
+        df = pd.read_sql(query, conn)
+    # Normalize headers to lowercase to avoid case-sensitivity issues
+    df.columns = df.columns.str.strip().str.lower()
+    return df
+
+
+def filter_values(col, value):
+    """None for "All" (or an empty multi-select), else the selected values as a tuple of the column's type."""
+    values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+    if not values or "All" in values:
+        return None
+    cast = int if col in ("year", "quarter") else str
+    return tuple(dict.fromkeys(cast(v) for v in values))
+
+
+def filter_columns(table_name):
+    """The filters offered for a table: year/quarter/state, plus district where the table has one."""
+    return [col for col in SELECTION_COLUMNS
+            if col in FILTER_COLUMNS or col in TABLE_COLUMNS.get(table_name, ())]
+
+
+def _where_clause(year="All", quarter="All", state="All", district="All", param_prefix=":"):
+    where, params = [], {}
+    for col, value in zip(SELECTION_COLUMNS, (year, quarter, state, district)):
+        values = filter_values(col, value)
+        if values is None:
+            continue
+        if len(values) == 1:
+            where.append(f"{col} = {param_prefix}{col}")
+            params[col] = values[0]
+        else:
+            names = [f"{col}_{i}" for i in range(len(values))]
+            where.append(f"{col} IN ({', '.join(param_prefix + name for name in names)})")
+            params.update(zip(names, values))
+    return (" WHERE " + " AND ".join(where) if where else ""), params
+
+
+def build_filtered_query(table_name, columns=None, year="All", quarter="All", state="All", district="All",
+                         param_prefix=":"):
+    """
+    SELECT only `columns` with year/quarter/state/district pushed into the WHERE clause.
+
+    Each filter is "All", one value (`col = ...`) or a list of values (`col IN (...)`).
+    Returns (sql, params); values are always sent as bound parameters
+    (`:name` for SQLAlchemy, `$name` for DuckDB).
+    """
+    select = ", ".join(quote_identifier(c) for c in columns) if columns else "*"
+    where, params = _where_clause(year, quarter, state, district, param_prefix)
+    return f"SELECT {select} FROM {quote_identifier(table_name)}{where}", params
+
+
+def build_count_query(table_name, year="All", quarter="All", state="All", district="All", param_prefix=":"):
+    where, params = _where_clause(year, quarter, state, district, param_prefix)
+    return f"SELECT COUNT(*) AS row_count FROM {quote_identifier(table_name)}{where}", params
+
+
+def page_order(columns=None, sort_by=None, descending=False):
+    """
+    (column, "ascending"/"descending") keys a data grid page is sorted by: `sort_by`
+    first, then the index columns and the other selected columns as tie-breakers,
+    so the same page request always returns the same rows. Missing values sort
+    last in either direction on every backend.
+    """
+    keys = [(sort_by, "descending" if descending else "ascending")] if sort_by else []
+    for col in dict.fromkeys(INDEX_COLUMNS + list(columns or [])):
+        if col != sort_by and (columns is None or col in columns):
+            keys.append((col, "ascending"))
+    return keys
+
+
+def build_page_query(table_name, columns=None, year="All", quarter="All", state="All", district="All",
+                     sort_by=None, descending=False, offset=0, limit=100, param_prefix=":"):
+    """build_filtered_query for one page of the data grid (ORDER BY ... LIMIT ... OFFSET)."""
+    sql, params = build_filtered_query(table_name, columns, year, quarter, state, district, param_prefix)
+    # `col IS NULL` first puts NULLs last like Arrow does; MySQL has no NULLS LAST
+    order = ", ".join(
+        f"{quote_identifier(col)} IS NULL, {quote_identifier(col)} {'DESC' if direction == 'descending' else 'ASC'}"
+        for col, direction in page_order(columns or TABLE_COLUMNS.get(table_name), sort_by, descending)
+    )
+    return f"{sql} ORDER BY {order} LIMIT {int(limit)} OFFSET {int(offset)}", params
+
+
+def fetch_filtered(engine, table_name, columns=None, year="All", quarter="All", state="All", district="All"):
+    sql, params = build_filtered_query(table_name, columns, year, quarter, state, district)
+    with connect(engine) as conn:
+        df = pd.read_sql(text(sql), conn, params=params)
+    df.columns = df.columns.str.strip().str.lower()
+    return df
+
+
+def fetch_page(engine, table_name, columns=None, year="All", quarter="All", state="All", district="All",
+               sort_by=None, descending=False, offset=0, limit=100):
+    sql, params = build_page_query(table_name, columns, year, quarter, state, district, sort_by, descending,
+                                   offset, limit)
+    with connect(engine) as conn:
+        df = pd.read_sql(text(sql), conn, params=params)
+    df.columns = df.columns.str.strip().str.lower()
+    return df
+
+
+def fetch_row_count(engine, table_name, year="All", quarter="All", state="All", district="All"):
+    sql, params = build_count_query(table_name, year, quarter, state, district)
+    with connect(engine) as conn:
+        return int(conn.execute(text(sql), params).scalar() or 0)
+
+
+def iter_filtered_chunks(engine, table_name, columns=None, year="All", quarter="All", state="All",
+                         district="All", chunksize=50_000):
+    """Yield the filtered rows `chunksize` at a time from a streaming (server-side) cursor."""
+    sql, params = build_filtered_query(table_name, columns, year, quarter, state, district)
+    statement = text(sql).execution_options(stream_results=True)
+    with connect(engine) as conn:
+        for df in pd.read_sql(statement, conn, params=params, chunksize=chunksize):
+            df.columns = df.columns.str.strip().str.lower()
+            yield df
+
+
+def fetch_filter_options(engine, table_name):
+    """Distinct values of each filter_columns() column for the filter widgets."""
+    table = quote_identifier(table_name)
+    options = {}
+    with connect(engine) as conn:
+        for col in filter_columns(table_name):
+            rows = conn.execute(text(f"SELECT DISTINCT {col} FROM {table} WHERE {col} IS NOT NULL"))
+            options[col] = sorted(row[0] for row in rows)
+    return options
+
+
+def ensure_indexes(conn, table_name):
+    """Create the composite (state, year, quarter) index used by filtered reads and upserts."""
+    if not inspect(conn).has_table(table_name):
+        return
+    index_name = f"ix_{table_name}_{'_'.join(INDEX_COLUMNS)}"
+    if any(ix["name"] == index_name for ix in inspect(conn).get_indexes(table_name)):
+        return
+    create_index(conn, table_name, index_name, INDEX_COLUMNS, text_columns=["state"])
+
+
+def create_index(conn, table_name, index_name, columns, text_columns=()):
+    """CREATE INDEX over `columns`; `text_columns` are the string columns among them."""
+    # pandas creates TEXT columns for strings; MySQL can only index those with a prefix length
+    mysql = conn.dialect.name == "mysql"
+    keys = [f"{c}(64)" if mysql and c in text_columns else c for c in columns]
+    conn.execute(text(f"CREATE INDEX {quote_identifier(index_name)} ON {quote_identifier(table_name)} "
+                      f"({', '.join(keys)})"))
+
+
+# ----------------------------------
+# HOME PAGE
+# ----------------------------------
+# Headline totals: alias -> (table, summed column)
+HOME_SUMMARY_COLUMNS = {
+    "total_trans_count": ("agg_trans", "transaction_count"),
+    "total_trans_amount": ("agg_trans", "transaction_amount"),
+    "map_trans_count": ("map_trans", "transaction_count"),
+    "map_trans_amount": ("map_trans", "transaction_amount"),
+    "top_trans_count": ("top_trans", "transaction_count"),
+    "top_trans_amount": ("top_trans", "transaction_amount"),
+    "total_ins_count": ("agg_insur", "insurance_count"),
+    "total_ins_amount": ("agg_insur", "insurance_amount"),
+    "map_ins_count": ("map_insur", "insurance_count"),
+    "map_ins_amount": ("map_insur", "insurance_amount"),
+    "top_ins_count": ("top_insur", "insurance_count"),
+    "top_ins_amount": ("top_insur", "insurance_amount"),
+    "map_registered_users": ("map_user", "registered_users"),
+    "total_app_opens": ("map_user", "app_opens"),
+    "top_registered_users": ("top_users", "registered_users"),
+}
+HOME_SUMMARY_TABLES = list(dict.fromkeys(table for table, _ in HOME_SUMMARY_COLUMNS.values()))
+
+
+def table_summary_query(table):
+    """The Home KPIs of one table, so tables can be queried (and fail) independently."""
+    sums = ", ".join(
+        f"SUM({column}) AS {alias}" for alias, (t, column) in HOME_SUMMARY_COLUMNS.items() if t == table
+    )
+    return f"SELECT {sums} FROM {quote_identifier(table)}"
+
+
+def fetch_table_summary(engine, table):
+    """Return one table's Home KPIs as a dict of column -> value (NULL sums become 0)."""
+    with connect(engine) as conn:
+        df = pd.read_sql(table_summary_query(table), conn)
+    return {col: (value if pd.notna(value) else 0) for col, value in df.iloc[0].items()}
+
+
+# ----------------------------------
+# STATE ROLLUP (India choropleth)
+# ----------------------------------
+# ~36 rows, rebuilt by ingest.py so the Home map never scans the fact tables.
+STATE_ROLLUP_TABLE = "state_rollup"
+
+# table -> {rollup column: summed source column}
+STATE_ROLLUP_SOURCES = {
+    "agg_trans": {"trans_amount": "transaction_amount", "trans_count": "transaction_count"},
+    "agg_insur": {"ins_amount": "insurance_amount", "ins_count": "insurance_count"},
+    # agg_users has no registered_users column, so users come from the district table
+    "map_user": {"registered_users": "registered_users", "app_opens": "app_opens"},
+}
+# Running totals rather than per-quarter flows: a state's value is its latest quarter, not the sum
+# (as hierarchy.STOCK_COLUMNS does for the drill-down)
+STATE_ROLLUP_STOCK = {"map_user": ["registered_users"]}
+
+STATE_ROLLUP_COLUMNS = [
+    "state", "state_slug", "lat", "lon", "iso_code",
+    "trans_amount", "trans_count", "ins_amount", "ins_count",
+    "registered_users", "app_opens", "total_value",
+]
+
+
+def state_rollup_query(table):
+    """Per-state sums of one fact table; STATE_ROLLUP_STOCK columns only over the state's latest quarter."""
+    stock = STATE_ROLLUP_STOCK.get(table, [])
+    sums = ", ".join(
+        f"SUM(CASE WHEN t.year * 10 + t.quarter = l.period THEN t.{column} END) AS {alias}" if column in stock
+        else f"SUM(t.{column}) AS {alias}"
+        for alias, column in STATE_ROLLUP_SOURCES[table].items()
+    )
+    table = quote_identifier(table)
+    latest = (f" JOIN (SELECT state, MAX(year * 10 + quarter) AS period FROM {table} GROUP BY state) l"
+              f" ON t.state = l.state") if stock else ""
+    return f"SELECT t.state, {sums} FROM {table} t{latest} GROUP BY t.state"
+
+
+def state_rollup_frame(df, table):
+    """state_rollup_query() over a DataFrame, for the Parquet snapshot."""
+    sums = STATE_ROLLUP_SOURCES[table]
+    out = df.groupby("state", observed=True)[list(sums.values())].sum()
+    stock = STATE_ROLLUP_STOCK.get(table, [])
+    if stock:
+        period = df["year"].astype(int) * 10 + df["quarter"].astype(int)
+        latest = df[period == period.groupby(df["state"], observed=True).transform("max")]
+        out[stock] = latest.groupby("state", observed=True)[stock].sum()
+    return out.reset_index().rename(columns={column: alias for alias, column in sums.items()})
+
+
+def finish_state_rollup(frames):
+    """Merge per-table state sums into rollup rows with GeoJSON names and centroids."""
+    df = pd.DataFrame(columns=["state"])
+    for frame in frames:
+        df = df.merge(frame, on="state", how="outer")
+
+    for col in STATE_ROLLUP_COLUMNS[STATE_ROLLUP_COLUMNS.index("trans_amount"):-1]:
+        df[col] = df[col].fillna(0) if col in df.columns else 0
+    df["total_value"] = df["trans_amount"] + df["ins_amount"]
+
+    df = df.rename(columns={"state": "state_slug"})
+    df["state_slug"] = df["state_slug"].astype(str)
+    return attach_state_dimension(df)[STATE_ROLLUP_COLUMNS]
+
+
+def state_map_full_join_query(tables=None):
+    """
+    The Home map query as a FULL OUTER JOIN of per-table state sums, for engines
+    that support it (MySQL does not, hence build_state_rollup's merge in pandas).
+    Each side is aggregated before the join so rows never fan out.
+    """
+    tables = [t for t in STATE_ROLLUP_SOURCES if tables is None or t in tables]
+    aliases = [f"s{i}" for i in range(len(tables))]
+    select = ["COALESCE(" + ", ".join(f"{a}.state" for a in aliases) + ") AS state"]
+    joins = []
+    for i, (table, alias) in enumerate(zip(tables, aliases)):
+        select += [f"COALESCE({alias}.{col}, 0) AS {col}" for col in STATE_ROLLUP_SOURCES[table]]
+        subquery = f"({state_rollup_query(table)}) {alias}"
+        if i == 0:
+            joins.append(f"FROM {subquery}")
+        else:
+            joined_state = "COALESCE(" + ", ".join(f"{a}.state" for a in aliases[:i]) + ")"
+            joins.append(f"FULL OUTER JOIN {subquery} ON {joined_state} = {alias}.state")
+    return "SELECT " + ",\n       ".join(select) + "\n" + "\n".join(joins)
+
+
+def build_state_rollup(conn):
+    """Aggregate the fact tables into one row per state."""
+    frames = [
+        pd.read_sql(state_rollup_query(table), conn)
+        for table in STATE_ROLLUP_SOURCES
+        if inspect(conn).has_table(table)
+    ]
+    return finish_state_rollup(frames)
+
+
+def refresh_state_rollup(conn):
+    build_state_rollup(conn).to_sql(STATE_ROLLUP_TABLE, con=conn, if_exists="replace", index=False)
+
+
+def fetch_state_rollup(engine):
+    """Read the precomputed rollup, building it on the fly if ingest has not created it yet."""
+    with connect(engine) as conn:
+        if inspect(conn).has_table(STATE_ROLLUP_TABLE):
+            df = pd.read_sql(f"SELECT * FROM {STATE_ROLLUP_TABLE}", conn)
+            # Re-attach names and centroids so a rollup stored before a dimension fix is still correct
+            return attach_state_dimension(df)[STATE_ROLLUP_COLUMNS]
+        return build_state_rollup(conn)
+
+
+# ----------------------------------
+# DATA VERSION
+# ----------------------------------
+# ingest.py stamps this table after every load so caches can key on it.
+
+def read_data_version(engine):
+    with connect(engine) as conn:
+        if not inspect(conn).has_table(DATA_VERSION_TABLE):
+            return 0
+        version = conn.execute(text(f"SELECT MAX(version) FROM {DATA_VERSION_TABLE}")).scalar()
+    return version or 0
+
+
+def bump_data_version(conn, version):
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DATA_VERSION_TABLE} (version BIGINT NOT NULL)"))
+    conn.execute(text(f"DELETE FROM {DATA_VERSION_TABLE}"))
+    conn.execute(text(f"INSERT INTO {DATA_VERSION_TABLE} (version) VALUES (:version)"), {"version": version})
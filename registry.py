@@ -0,0 +1,206 @@
+"""
+Process-wide, read-only copy of the Analysis tables shared by every session.
+
+Each table is read once per data version from the active data source, sorted by
+(state, year, quarter) and then its other columns (the data grid's default
+order) and written as an Arrow IPC file under
+settings.SHARED_DATASET_DIR/<version>/. Every process memory-maps that file, so
+worker processes on the same host share one copy through the page cache.
+
+Because rows are sorted by the filter keys, every selection is a set of
+contiguous row ranges and view() slices the mapped buffers instead of copying
+them. Selections that are a single range (everything, one state, one state and
+year, ...) reach pandas without copying their numeric columns; a year or quarter
+across all states is gathered from one range per state. District rows are
+spread over every range, so a district filter takes its rows by position from a
+filter_index.PositionIndex built on first use.
+"""
+import os
+import shutil
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import settings
+from filter_index import PositionIndex
+from queries import FILTER_COLUMNS, INDEX_COLUMNS, filter_values, page_order
+from schema import apply_schema
+
+
+class SharedTable:
+    """One memory-mapped table plus the row range of every (state, year, quarter)."""
+
+    def __init__(self, table):
+        self.table = table
+        keys = table.select(INDEX_COLUMNS).to_pandas()
+        if len(keys):
+            starts = np.flatnonzero(keys.ne(keys.shift()).any(axis=1).to_numpy())
+            stops = np.append(starts[1:], len(keys))
+            self.ranges = {
+                (str(state), int(year), int(quarter)): (int(start), int(stop))
+                for (state, year, quarter), start, stop in zip(
+                    keys.iloc[starts].itertuples(index=False, name=None), starts, stops)
+            }
+        else:
+            self.ranges = {}
+        self._district_index = None
+
+    def district_index(self):
+        if self._district_index is None:
+            self._district_index = PositionIndex(self.table.select(["district"]).to_pandas(), ["district"])
+        return self._district_index
+
+    def view(self, columns=None, year="All", quarter="All", state="All", district="All"):
+        wanted = [filter_values(col, value) for col, value in zip(INDEX_COLUMNS, (state, year, quarter))]
+        spans = sorted(
+            span for key, span in self.ranges.items()
+            if all(values is None or key[i] in values for i, values in enumerate(wanted))
+        )
+        # Neighbouring ranges (e.g. every quarter of one state) become one slice
+        merged = []
+        for start, stop in spans:
+            if merged and merged[-1][1] == start:
+                merged[-1][1] = stop
+            else:
+                merged.append([start, stop])
+        table = self.table.select(columns) if columns else self.table
+        if not merged:
+            return table.slice(0, 0)
+        if filter_values("district", district) is not None:
+            positions = self.district_index().lookup(district=district)
+            starts, stops = np.array(merged).T
+            slot = np.maximum(np.searchsorted(starts, positions, side="right") - 1, 0)
+            return table.take(positions[(positions >= starts[slot]) & (positions < stops[slot])])
+        return pa.concat_tables([table.slice(start, stop - start) for start, stop in merged])
+
+
+def arrow_page(table, sort_keys, offset, limit):
+    """Rows [offset, offset + limit) of `table` in `sort_keys` order, taking only those rows."""
+    keys = table.select([col for col, _ in sort_keys])
+    # Arrow cannot sort dictionary (categorical) columns, so sort on their decoded values
+    for i, field in enumerate(keys.schema):
+        if pa.types.is_dictionary(field.type):
+            keys = keys.set_column(i, field.name, keys.column(i).cast(field.type.value_type))
+    # Nulls go last (Arrow's default), matching the IS NULL ordering of build_page_query
+    indices = pc.sort_indices(keys, sort_keys=sort_keys)
+    return table.take(indices.slice(offset, limit))
+
+
+def _decoded(series):
+    # Categoricals sort by their dictionary order; every other backend compares the values
+    return series.astype(object) if isinstance(series.dtype, pd.CategoricalDtype) else series
+
+
+def _sort_for_ranges(df):
+    # Missing keys would break the range index; they never match a filter anyway.
+    # Stored in the grid's default order (page_order over every column), so an unsorted page is a slice.
+    df = df.dropna(subset=FILTER_COLUMNS)
+    keys = [col for col, _ in page_order(list(df.columns))]
+    return df.sort_values(keys, kind="stable", na_position="last", ignore_index=True, key=_decoded)
+
+
+class DatasetRegistry:
+    """
+    Lazily loads each table once per data version.
+
+    A new version swaps in a fresh table map in one step, so a session either sees
+    the old tables or the new ones, never a mix. Views handed out earlier keep their
+    own memory map open until they are released.
+    """
+
+    def __init__(self, source, root=None):
+        self.source = source
+        self.root = root or settings.SHARED_DATASET_DIR
+        self.version = None
+        self.builds = 0
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _path(self, version, table_name):
+        return os.path.join(self.root, str(version), f"{table_name}.arrow")
+
+    def _build(self, version, table_name):
+        """Write the table's IPC file for this version unless another process already has."""
+        path = self._path(version, table_name)
+        if os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df = _sort_for_ranges(self.source.filtered(table_name))
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        self.builds += 1
+        return path
+
+    def _open(self, version, table_name):
+        path = self._build(version, table_name)
+        with pa.memory_map(path, "r") as source:
+            return SharedTable(pa.ipc.open_file(source).read_all())
+
+    def _purge_old_versions(self, version):
+        if not os.path.isdir(self.root):
+            return
+        for entry in os.listdir(self.root):
+            if entry != str(version):
+                # Safe while other processes still map the files: unlinked data stays readable
+                shutil.rmtree(os.path.join(self.root, entry), ignore_errors=True)
+
+    def get(self, table_name, version):
+        with self._lock:
+            if version != self.version:
+                self._tables = {}
+                self.version = version
+                self._purge_old_versions(version)
+            tables = self._tables
+            shared = tables.get(table_name)
+        if shared is None:
+            shared = self._open(version, table_name)
+            with self._lock:
+                # Only publish into the map of the version this was built for
+                if tables is self._tables:
+                    shared = tables.setdefault(table_name, shared)
+        return shared
+
+    def view(self, table_name, version, columns=None, year="All", quarter="All", state="All", district="All"):
+        """Filtered rows as a DataFrame whose numeric columns point into the shared mapping."""
+        table = self.get(table_name, version).view(columns, year, quarter, state, district)
+        # split_blocks keeps null-free numeric columns as views instead of consolidating (copying) them
+        return apply_schema(table.to_pandas(split_blocks=True), table_name)
+
+    def row_count(self, table_name, version, year="All", quarter="All", state="All", district="All"):
+        return self.get(table_name, version).view(INDEX_COLUMNS, year, quarter, state, district).num_rows
+
+    def page(self, table_name, version, columns=None, year="All", quarter="All", state="All", district="All",
+             sort_by=None, descending=False, offset=0, limit=100):
+        """One grid page; unsorted pages of every column are plain slices because rows are stored in that order."""
+        shared = self.get(table_name, version)
+        table = shared.view(columns, year, quarter, state, district)
+        if sort_by or page_order(columns or table.column_names) != page_order(shared.table.column_names):
+            table = arrow_page(table, page_order(columns or table.column_names, sort_by, descending), offset, limit)
+        else:
+            table = table.slice(offset, limit)
+        return apply_schema(table.to_pandas(), table_name)
+
+    def iter_chunks(self, table_name, version, columns=None, year="All", quarter="All", state="All",
+                    district="All", chunksize=50_000):
+        table = self.get(table_name, version).view(columns, year, quarter, state, district)
+        for batch in table.to_batches(max_chunksize=chunksize):
+            yield batch.to_pandas()
+
+    def stats(self):
+        with self._lock:
+            tables = dict(self._tables)
+            return {
+                "version": self.version or 0,
+                "tables": len(tables),
+                "rows": sum(t.table.num_rows for t in tables.values()),
+                "mapped_bytes": sum(t.table.nbytes for t in tables.values()),
+                "builds": self.builds,
+            }
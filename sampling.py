@@ -0,0 +1,96 @@
+"""
+Server-side reduction of large frames before they are handed to Plotly.
+
+Plotly serializes every row it is given, so for district-level tables the
+scatter, histogram and box plots are fed a sample, pre-binned counts and
+precomputed quartiles instead of the raw rows.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+def stratified_sample(df, by, value_col, budget, seed=0):
+    """
+    Sample at most `budget` rows, proportionally per `by` group.
+
+    The min and max of `value_col` in every group are always kept so the
+    outliers that shape a scatter plot survive sampling.
+    """
+    if len(df) <= budget:
+        return df
+    rng = np.random.default_rng(seed)
+    all_values = df[value_col].to_numpy(dtype=float)
+    positions = []
+    for _, group_pos in df.groupby(by, observed=True, sort=False).indices.items():
+        quota = max(1, int(round(budget * len(group_pos) / len(df))))
+        if len(group_pos) <= quota:
+            positions.append(group_pos)
+            continue
+        values = all_values[group_pos]
+        if np.isnan(values).all():
+            extremes = group_pos[:0]
+        else:
+            extremes = np.unique(group_pos[[np.nanargmin(values), np.nanargmax(values)]])
+        rest = np.setdiff1d(group_pos, extremes)
+        picked = rng.choice(rest, size=max(0, quota - len(extremes)), replace=False)
+        positions.append(np.concatenate([extremes, picked]))
+    return df.iloc[np.sort(np.concatenate(positions))]
+
+
+def histogram_counts(df, value_col, by, bins=50):
+    """
+    Bin `value_col` with NumPy using shared edges, one row per (group, bin).
+
+    Returns columns: by, bin_start, bin_end, bin_mid, count.
+    """
+    values = df[value_col].to_numpy(dtype=float)
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return pd.DataFrame(columns=[by, "bin_start", "bin_end", "bin_mid", "count"])
+    edges = np.histogram_bin_edges(finite, bins=bins)
+    frames = []
+    for key, group in df.groupby(by, observed=True, sort=True)[value_col]:
+        counts, _ = np.histogram(group.to_numpy(dtype=float), bins=edges)
+        frames.append(pd.DataFrame({
+            by: key,
+            "bin_start": edges[:-1],
+            "bin_end": edges[1:],
+            "bin_mid": (edges[:-1] + edges[1:]) / 2,
+            "count": counts,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def box_stats(df, by, value_col):
+    """Quartiles and Tukey whiskers (1.5 x IQR, clipped to the data) per group."""
+    grouped = df.groupby(by, observed=True, sort=True)[value_col]
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ["q1", "median", "q3"]
+    stats["min"] = grouped.min()
+    stats["max"] = grouped.max()
+    iqr = stats["q3"] - stats["q1"]
+    low_limit = stats["q1"] - 1.5 * iqr
+    high_limit = stats["q3"] + 1.5 * iqr
+    # Whiskers end at the most extreme observation inside the limits
+    values = df[[by, value_col]].join(low_limit.rename("low"), on=by).join(high_limit.rename("high"), on=by)
+    inside = values[(values[value_col] >= values["low"]) & (values[value_col] <= values["high"])]
+    stats["lowerfence"] = inside.groupby(by, observed=True)[value_col].min()
+    stats["upperfence"] = inside.groupby(by, observed=True)[value_col].max()
+    stats["lowerfence"] = stats["lowerfence"].fillna(stats["min"])
+    stats["upperfence"] = stats["upperfence"].fillna(stats["max"])
+    return stats.reset_index()
+
+
+def box_figure(stats, by, value_col, title):
+    """Box plot built from box_stats() output, one trace per group like px.box(color=by)."""
+    fig = go.Figure()
+    for _, row in stats.iterrows():
+        fig.add_trace(go.Box(
+            name=str(row[by]),
+            x=[row[by]],
+            q1=[row["q1"]], median=[row["median"]], q3=[row["q3"]],
+            lowerfence=[row["lowerfence"]], upperfence=[row["upperfence"]],
+        ))
+    fig.update_layout(title=title, xaxis_title=by, yaxis_title=value_col, legend_title_text=by)
+    return fig
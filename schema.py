@@ -0,0 +1,147 @@
+"""
+Declared column types for the dashboard tables.
+
+Repeated strings (state, district, type names, pincode) are categoricals, so each
+distinct value is stored once per column and `==` filters compare small integer
+codes. year and quarter are small ints. Counts and amounts keep enough range for
+all-India totals: a state's quarterly transaction count does not fit in int32,
+and float32 amounts would drift in the Home page sums.
+
+Columns with a known set of values (state and the payment types) share one
+declared dictionary, so a value has the same code in every table and every
+read. district and pincode keep a dictionary per frame: their value sets are
+open-ended (tens of thousands of pincodes) and only ever compared within a table.
+
+ingest.py applies the schema before writing, and every data source applies it
+to what it reads.
+"""
+import threading
+
+import pandas as pd
+
+from geo import STATES
+
+CATEGORY = "category"
+
+# Pulse transaction types, plus "TOTAL", the metric type of the map_* rows
+TRANSACTION_TYPES = ["Financial Services", "Merchant payments", "Others", "Peer-to-peer payments",
+                     "Recharge & bill payments", "TOTAL"]
+INSURANCE_TYPES = ["Insurance", "TOTAL"]
+
+SHARED_CATEGORIES = {
+    "state": pd.CategoricalDtype(sorted(slug for slug, *_ in STATES)),
+    "transaction_type": pd.CategoricalDtype(TRANSACTION_TYPES),
+    "insurance_type": pd.CategoricalDtype(INSURANCE_TYPES),
+}
+
+COLUMN_TYPES = {
+    "state": CATEGORY,
+    "year": "int16",
+    "quarter": "int8",
+    "district": CATEGORY,
+    "pincode": CATEGORY,
+    "transaction_type": CATEGORY,
+    "transaction_count": "int64",
+    "transaction_amount": "float64",
+    "insurance_type": CATEGORY,
+    "insurance_count": "int64",
+    "insurance_amount": "float64",
+    "user_type": CATEGORY,
+    "user_count": "int32",
+    "user_percentage": "float32",
+    "registered_users": "int32",
+    "app_opens": "int64",
+}
+
+# table -> columns, in the order ingest.DATASETS produces them
+TABLE_COLUMNS = {
+    "agg_trans": ["state", "year", "quarter", "transaction_type", "transaction_count", "transaction_amount"],
+    "agg_insur": ["state", "year", "quarter", "insurance_type", "insurance_count", "insurance_amount"],
+    "agg_users": ["state", "year", "quarter", "user_type", "user_count", "user_percentage"],
+    "map_trans": ["state", "year", "quarter", "district", "transaction_type", "transaction_count",
+                  "transaction_amount"],
+    "map_insur": ["state", "year", "quarter", "district", "insurance_type", "insurance_count",
+                  "insurance_amount"],
+    "map_user": ["state", "year", "quarter", "district", "registered_users", "app_opens"],
+    "top_trans": ["state", "year", "quarter", "district", "pincode", "transaction_count", "transaction_amount"],
+    "top_insur": ["state", "year", "quarter", "district", "pincode", "insurance_count", "insurance_amount"],
+    "top_users": ["state", "year", "quarter", "district", "pincode", "registered_users"],
+}
+
+SCHEMAS = {table: {col: COLUMN_TYPES[col] for col in columns} for table, columns in TABLE_COLUMNS.items()}
+
+_memory = {}
+_lock = threading.Lock()
+
+
+def shared_dtype(col, series):
+    """
+    The declared dictionary of `col`. Values it does not know (e.g. a type Pulse
+    adds later) are merged in, keeping the categories sorted like a per-frame
+    dictionary would be, instead of becoming missing.
+    """
+    dtype = SHARED_CATEGORIES[col]
+    extra = set(series.dropna().unique()) - set(dtype.categories)
+    if not extra:
+        return dtype
+    return pd.CategoricalDtype(sorted(set(dtype.categories) | {str(value) for value in extra}))
+
+
+def _cast(series, dtype, col=None):
+    if dtype == CATEGORY:
+        is_categorical = isinstance(series.dtype, pd.CategoricalDtype)
+        if not is_categorical:
+            # Numbers read back from text columns (e.g. pincode) become their string form
+            series = series.where(series.isna(), series.astype(str))
+        if col in SHARED_CATEGORIES:
+            return series.astype(shared_dtype(col, series))
+        if is_categorical:
+            # Parquet dictionaries can carry values filtered out of this frame
+            return series.cat.remove_unused_categories()
+        return series.astype(CATEGORY)
+    if pd.api.types.is_integer_dtype(dtype):
+        values = pd.to_numeric(series)
+        if values.isna().any():
+            # Missing counts need the nullable integer type instead of turning the column into floats
+            return values.astype(dtype.capitalize())
+        return values.astype(dtype)
+    return pd.to_numeric(series).astype(dtype)
+
+
+def apply_schema(df, table):
+    """
+    Cast the columns of `df` that the table's schema declares; other columns are left alone.
+    Records the frame's memory before and after for memory_stats().
+    """
+    schema = SCHEMAS.get(table)
+    if not schema or df.empty:
+        return df
+    before = int(df.memory_usage(index=True, deep=True).sum())
+    df = df.copy(deep=False)
+    for col, dtype in schema.items():
+        if col in df.columns and (dtype == CATEGORY or str(df[col].dtype) != dtype):
+            df[col] = _cast(df[col], dtype, col)
+    after = int(df.memory_usage(index=True, deep=True).sum())
+    with _lock:
+        _memory[table] = {"rows": len(df), "bytes_before": before, "bytes_after": after}
+    return df
+
+
+def memory_stats():
+    """Memory of the last frame typed per table: {<table>_bytes_before/_bytes_after/_rows: n}."""
+    with _lock:
+        return {
+            f"{table}_{stat}": value
+            for table, stats in sorted(_memory.items())
+            for stat, value in stats.items()
+        }
+
+
+def format_memory(table):
+    with _lock:
+        stats = _memory.get(table)
+    if not stats:
+        return f"{table}: no typed frame yet"
+    mb = 1024 * 1024
+    return (f"{table}: {stats['rows']:,} rows, {stats['bytes_after'] / mb:.1f} MB "
+            f"({stats['bytes_before'] / mb:.1f} MB before dtype compaction)")
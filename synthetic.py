@@ -0,0 +1,238 @@
+"""
+Synthetic PhonePe Pulse data at a configurable scale.
+
+write_pulse_tree() writes the nine Pulse JSON layouts that ingest.py parses
+(state/year/quarter.json per dataset), so the loaders can be exercised without a
+Pulse checkout. generate_tables() builds the same nine tables directly as typed
+DataFrames, which is much faster for large scales. Both are seeded and produce
+the same shapes, but not the same values.
+
+Scale is states x districts x years x quarters x types. States are the real
+slugs (so the map joins work) followed by "state-N" beyond the 36 in geo.STATES.
+
+    python synthetic.py --scale medium --root synthetic/pulse
+    python synthetic.py --states 36 --districts 40 --years 7 --root synthetic/pulse
+"""
+import argparse
+import json
+import os
+import random
+
+import numpy as np
+import pandas as pd
+
+from geo import STATES
+from schema import TABLE_COLUMNS, apply_schema
+
+# name -> (states, districts per state, pincodes per state, years, quarters, types)
+SCALES = {
+    "small": (5, 6, 10, 3, 4, 3),
+    "medium": (36, 20, 10, 7, 4, 5),
+    "large": (36, 60, 50, 10, 4, 8),
+}
+FIRST_YEAR = 2018
+TOP_ENTRIES = 10
+
+TRANSACTION_TYPES = ["Recharge & bill payments", "Peer-to-peer payments", "Merchant payments",
+                     "Financial Services", "Others"]
+BRANDS = ["Xiaomi", "Samsung", "Vivo", "Oppo", "OnePlus", "Realme", "Apple", "Motorola", "Lenovo", "Huawei"]
+
+
+class Scale:
+    def __init__(self, states=5, districts=6, pincodes=10, years=3, quarters=4, types=3):
+        self.states = states
+        self.districts = districts
+        self.pincodes = pincodes
+        self.years = years
+        self.quarters = quarters
+        self.types = types
+
+    @classmethod
+    def preset(cls, name):
+        return cls(*SCALES[name])
+
+    def state_slugs(self):
+        slugs = [slug for slug, *_ in STATES[:self.states]]
+        return slugs + [f"state-{i}" for i in range(len(slugs), self.states)]
+
+    def district_names(self, state):
+        return [f"{state} district {i}" for i in range(self.districts)]
+
+    def pincode_names(self, state_index):
+        return [str(110000 + state_index * 1000 + i) for i in range(self.pincodes)]
+
+    def periods(self):
+        return [(FIRST_YEAR + y, q) for y in range(self.years) for q in range(1, self.quarters + 1)]
+
+    def _names(self, base, prefix):
+        return (base + [f"{prefix} {i}" for i in range(len(base), self.types)])[:self.types]
+
+    def transaction_types(self):
+        return self._names(TRANSACTION_TYPES, "Payment type")
+
+    def brands(self):
+        return self._names(BRANDS, "Brand")
+
+    def __repr__(self):
+        return (f"Scale(states={self.states}, districts={self.districts}, pincodes={self.pincodes}, "
+                f"years={self.years}, quarters={self.quarters}, types={self.types})")
+
+
+# ----------------------------------
+# PULSE JSON TREE
+# ----------------------------------
+def _payment(rng, scale=1.0):
+    count = rng.randint(1, 1_000_000)
+    return {"type": "TOTAL", "count": int(count * scale), "amount": count * scale * rng.uniform(50, 5_000)}
+
+
+def _documents(scale, rng, state_index, state):
+    """(dataset directory, document) for every Pulse dataset of one state and quarter."""
+    districts = scale.district_names(state)
+    top_districts = districts[:TOP_ENTRIES]
+    pincodes = scale.pincode_names(state_index)[:TOP_ENTRIES]
+    brands = scale.brands()
+    shares = [rng.random() for _ in brands]
+    yield os.path.join("aggregated", "transaction"), {"data": {"transactionData": [
+        {"name": name, "paymentInstruments": [_payment(rng, 100)]} for name in scale.transaction_types()
+    ]}}
+    yield os.path.join("aggregated", "insurance"), {"data": {"transactionData": [
+        {"name": "Insurance", "paymentInstruments": [_payment(rng, 0.1)]}
+    ]}}
+    yield os.path.join("aggregated", "user"), {"data": {"usersByDevice": [
+        {"brand": brand, "count": rng.randint(1, 5_000_000), "percentage": share / sum(shares)}
+        for brand, share in zip(brands, shares)
+    ]}}
+    yield os.path.join("map", "transaction", "hover"), {"data": {"hoverDataList": [
+        {"name": district, "metric": [_payment(rng, 10)]} for district in districts
+    ]}}
+    yield os.path.join("map", "insurance", "hover"), {"data": {"hoverDataList": [
+        {"name": district, "metric": [_payment(rng, 0.01)]} for district in districts
+    ]}}
+    yield os.path.join("map", "user", "hover"), {"data": {"hoverData": {
+        district: {"registeredUsers": rng.randint(1, 2_000_000), "appOpens": rng.randint(0, 50_000_000)}
+        for district in districts
+    }}}
+    for path, size in ((os.path.join("top", "transaction"), 1), (os.path.join("top", "insurance"), 0.01)):
+        yield path, {"data": {
+            "districts": [{"entityName": d, "metric": _payment(rng, size)} for d in top_districts],
+            "pincodes": [{"entityName": p, "metric": _payment(rng, size)} for p in pincodes],
+        }}
+    yield os.path.join("top", "user"), {"data": {
+        "districts": [{"name": d, "registeredUsers": rng.randint(1, 2_000_000)} for d in top_districts],
+        "pincodes": [{"name": p, "registeredUsers": rng.randint(1, 200_000)} for p in pincodes],
+    }}
+
+
+def write_pulse_tree(root, scale=None, seed=0):
+    """Write <root>/<dataset>/country/india/state/<state>/<year>/<quarter>.json; returns the file count."""
+    scale = scale or Scale()
+    rng = random.Random(seed)
+    files = 0
+    for state_index, state in enumerate(scale.state_slugs()):
+        for year, quarter in scale.periods():
+            for path, doc in _documents(scale, rng, state_index, state):
+                folder = os.path.join(root, path, "country", "india", "state", state, str(year))
+                os.makedirs(folder, exist_ok=True)
+                with open(os.path.join(folder, f"{quarter}.json"), "w") as f:
+                    json.dump(doc, f)
+                files += 1
+    return files
+
+
+# ----------------------------------
+# TABLES
+# ----------------------------------
+def _keys(scale, per_key):
+    """state/year/quarter columns with every key repeated `per_key` times."""
+    keys = [(state, year, quarter) for state in scale.state_slugs() for year, quarter in scale.periods()]
+    states, years, quarters = (np.repeat(np.array(col), per_key) for col in zip(*keys))
+    return {"state": states, "year": years, "quarter": quarters}, len(keys)
+
+
+def _top_entries(scale):
+    """district/pincode columns of the top_* tables (district rows, then pincode rows, per key)."""
+    districts, pincodes = [], []
+    for state_index, state in enumerate(scale.state_slugs()):
+        top_districts = scale.district_names(state)[:TOP_ENTRIES]
+        top_pincodes = scale.pincode_names(state_index)[:TOP_ENTRIES]
+        for _ in scale.periods():
+            districts += top_districts + [None] * len(top_pincodes)
+            pincodes += [None] * len(top_districts) + top_pincodes
+    return districts, pincodes
+
+
+def generate_tables(scale=None, seed=0, tables=None):
+    """{table: DataFrame} with the dashboard's column types, generated without JSON."""
+    scale = scale or Scale()
+    rng = np.random.default_rng(seed)
+    per_state_districts = [scale.district_names(state) for state in scale.state_slugs()]
+    per_key_top = min(scale.districts, TOP_ENTRIES) + min(scale.pincodes, TOP_ENTRIES)
+    out = {}
+
+    def counts(n, size):
+        return (rng.integers(1, 1_000_000, n) * size).astype("int64")
+
+    def amounts(count):
+        return count * rng.uniform(50, 5_000, len(count))
+
+    for table in tables or list(TABLE_COLUMNS):
+        if table.startswith("agg_"):
+            names = {"agg_trans": scale.transaction_types(), "agg_insur": ["Insurance"],
+                     "agg_users": scale.brands()}[table]
+            cols, n_keys = _keys(scale, len(names))
+            cols["type"] = np.tile(names, n_keys)
+        elif table.startswith("map_"):
+            cols, n_keys = _keys(scale, scale.districts)
+            cols["district"] = np.concatenate([
+                np.tile(districts, len(scale.periods())) for districts in per_state_districts
+            ])
+        else:
+            cols, n_keys = _keys(scale, per_key_top)
+            cols["district"], cols["pincode"] = _top_entries(scale)
+        n = len(cols["state"])
+
+        if table in ("agg_trans", "map_trans", "top_trans"):
+            size = {"agg_trans": 100, "map_trans": 10, "top_trans": 1}[table]
+            cols["transaction_type"] = cols.pop("type", "TOTAL")
+            cols["transaction_count"] = counts(n, size)
+            cols["transaction_amount"] = amounts(cols["transaction_count"])
+        elif table in ("agg_insur", "map_insur", "top_insur"):
+            size = {"agg_insur": 0.1, "map_insur": 0.01, "top_insur": 0.01}[table]
+            cols["insurance_type"] = cols.pop("type", "TOTAL")
+            cols["insurance_count"] = counts(n, size)
+            cols["insurance_amount"] = amounts(cols["insurance_count"])
+        elif table == "agg_users":
+            cols["user_type"] = cols.pop("type")
+            cols["user_count"] = rng.integers(1, 5_000_000, n)
+            cols["user_percentage"] = rng.random(n) / len(scale.brands())
+        elif table == "map_user":
+            cols["registered_users"] = rng.integers(1, 2_000_000, n)
+            cols["app_opens"] = rng.integers(0, 50_000_000, n)
+        elif table == "top_users":
+            cols["registered_users"] = rng.integers(1, 2_000_000, n)
+
+        df = pd.DataFrame(cols)[TABLE_COLUMNS[table]]
+        out[table] = apply_schema(df, table)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic Pulse JSON tree.")
+    parser.add_argument("--root", required=True, help="Output directory (the Pulse 'data' folder)")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for name in ("states", "districts", "pincodes", "years", "quarters", "types"):
+        parser.add_argument(f"--{name}", type=int, help=f"Override the preset's {name}")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    scale = Scale.preset(args.scale)
+    for name in ("states", "districts", "pincodes", "years", "quarters", "types"):
+        if getattr(args, name) is not None:
+            setattr(scale, name, getattr(args, name))
+    files = write_pulse_tree(args.root, scale, args.seed)
+    print(f"Wrote {files:,} files for {scale} under {args.root}")
+
+
+if __name__ == "__main__":
+    main()
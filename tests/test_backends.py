@@ -0,0 +1,169 @@
+"""
+The data sources (datasource.py) answer every dashboard query the same way:
+one synthetic tree is ingested into SQLite and a Parquet snapshot, and the
+Parquet and DuckDB backends are compared with the SQL database.
+"""
+import os
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from datasource import DuckDBSource, ParquetSource, SQLSource, write_snapshot_derived, write_snapshot_table
+from hierarchy import COUNTRY
+from ingest import DATASETS, load_table, run_full, run_incremental
+from synthetic import Scale, write_pulse_tree
+
+SCALE = Scale(states=3, districts=3, pincodes=3, years=2, quarters=2, types=2)
+
+
+def _plain(df, sort_by=None):
+    """Backend-independent form: plain values, columns by name and rows in a fixed order."""
+    df = df[sorted(df.columns)]
+    df = df.astype({col: object for col in df.columns if not pd.api.types.is_numeric_dtype(df[col])})
+    return df.sort_values(sort_by or list(df.columns)).reset_index(drop=True)
+
+
+def assert_same(left, right, sort_by=None):
+    pd.testing.assert_frame_equal(_plain(left, sort_by), _plain(right, sort_by), check_dtype=False, rtol=1e-6)
+
+
+@pytest.fixture(scope="module")
+def loaded(tmp_path_factory):
+    """(root, engine, snapshot dir) with the same tree loaded into both targets."""
+    tmp_path = tmp_path_factory.mktemp("backends")
+    root = str(tmp_path / "pulse")
+    write_pulse_tree(root, SCALE, seed=3)
+    engine = create_engine(f"sqlite:///{tmp_path / 'pulse.db'}")
+    snapshot = str(tmp_path / "snapshot")
+    run_full(engine, root=root, manifest_path=str(tmp_path / "manifest.json"), workers=1, snapshot_dir=snapshot)
+    return root, engine, snapshot
+
+
+@pytest.fixture(scope="module")
+def sql(loaded):
+    return SQLSource(loaded[1])
+
+
+def _parquet(snapshot):
+    return ParquetSource(snapshot)
+
+
+def _duckdb(snapshot):
+    pytest.importorskip("duckdb")
+    return DuckDBSource(snapshot)
+
+
+@pytest.fixture(scope="module", params=[_parquet, _duckdb], ids=["parquet", "duckdb"])
+def source(request, loaded):
+    return request.param(loaded[2])
+
+
+@pytest.fixture(scope="module")
+def raw_snapshot(loaded, tmp_path_factory):
+    """The fact tables alone, without the derived files ingest writes next to them."""
+    root = str(tmp_path_factory.mktemp("raw_snapshot"))
+    for table in DATASETS:
+        write_snapshot_table(load_table(table, loaded[0], workers=1), table, root)
+    return root
+
+
+# ----------------------------------
+# ANALYSIS READS
+# ----------------------------------
+@pytest.mark.parametrize("table", ["agg_trans", "map_user", "top_insur"])
+def test_filtered_and_counts(sql, source, table):
+    state = sorted(sql.filter_options(table)["state"])[0]
+    assert_same(source.filtered(table), sql.filtered(table))
+    filters = {"year": ["2018", "2019"], "quarter": 1, "state": state}
+    columns = [col for col in ("state", "year", "district") if col in DATASETS[table]["columns"]]
+    assert_same(source.filtered(table, columns, **filters), sql.filtered(table, columns, **filters))
+    assert source.row_count(table, **filters) == sql.row_count(table, **filters) > 0
+    assert source.filter_options(table) == sql.filter_options(table)
+
+
+def test_page(sql, source):
+    kwargs = {"columns": ["state", "district", "transaction_amount"], "sort_by": "transaction_amount",
+              "descending": True, "offset": 3, "limit": 5}
+    # Row order is part of the answer
+    pd.testing.assert_frame_equal(_plain(source.page("map_trans", **kwargs), sort_by=[]),
+                                  _plain(sql.page("map_trans", **kwargs), sort_by=[]), check_dtype=False)
+
+
+def test_table_summary(sql, source):
+    for table in ("agg_trans", "map_user", "top_users"):
+        expected = sql.table_summary(table)
+        assert source.table_summary(table) == pytest.approx(expected)
+
+
+# ----------------------------------
+# DERIVED TABLES
+# ----------------------------------
+def test_state_rollup(sql, source):
+    assert_same(source.state_rollup(), sql.state_rollup(), sort_by=["state_slug"])
+
+
+@pytest.mark.parametrize("dataset", ["agg_trans", "agg_insur"])
+def test_growth_metrics(sql, source, dataset):
+    assert_same(source.growth_metrics(dataset), sql.growth_metrics(dataset),
+                sort_by=["state", "category", "year", "quarter"])
+
+
+@pytest.mark.parametrize("dataset, level, year, quarter", [
+    ("payments", "state", 0, 0),
+    ("transactions", "district", 2018, 0),
+    ("users", "district", 2019, 2),
+    ("insurance", "pincode", 0, 0),
+])
+def test_children(sql, source, dataset, level, year, quarter):
+    parent = COUNTRY if level == "state" else sorted(sql.filter_options("agg_trans")["state"])[0]
+    expected = sql.children(dataset, level, parent, year, quarter)
+    assert len(expected) > 0
+    assert_same(source.children(dataset, level, parent, year, quarter), expected, sort_by=["ranking"])
+    assert_same(source.children(dataset, level, parent, year, quarter, limit=2), expected.head(2),
+                sort_by=["ranking"])
+
+
+@pytest.mark.parametrize("make_source", [_parquet, _duckdb], ids=["parquet", "duckdb"])
+def test_derived_tables_without_the_stored_files(sql, raw_snapshot, make_source):
+    # A snapshot written without write_snapshot_derived builds the same answers on the fly
+    source = make_source(raw_snapshot)
+    assert not os.path.exists(os.path.join(raw_snapshot, "geo_levels.parquet"))
+    assert_same(source.state_rollup(), sql.state_rollup(), sort_by=["state_slug"])
+    assert_same(source.growth_metrics("agg_trans"), sql.growth_metrics("agg_trans"),
+                sort_by=["state", "category", "year", "quarter"])
+    assert_same(source.children("payments", "state", COUNTRY), sql.children("payments", "state", COUNTRY),
+                sort_by=["ranking"])
+
+
+def test_duckdb_rescans_on_a_new_version(loaded, tmp_path):
+    pytest.importorskip("duckdb")
+    root = str(tmp_path / "snapshot")
+    write_snapshot_table(load_table("agg_trans", loaded[0], workers=1), "agg_trans", root)
+    source = DuckDBSource(root)
+    assert source.available_tables() == {"agg_trans"}
+    write_snapshot_table(load_table("map_user", loaded[0], workers=1), "map_user", root)
+    # The views only change once the snapshot's version is stamped
+    assert source.available_tables() == {"agg_trans"}
+    write_snapshot_derived(2, root)
+    assert source.data_version() == 2
+    assert {"agg_trans", "map_user"} <= source.available_tables()
+    assert source.row_count("map_user") > 0
+
+
+# ----------------------------------
+# PER-TARGET MANIFEST
+# ----------------------------------
+def test_new_target_receives_every_row(tmp_path):
+    # The database was loaded first; the snapshot's first incremental run must still get everything
+    root = str(tmp_path / "pulse")
+    write_pulse_tree(root, Scale(states=2, districts=2, pincodes=2, years=1, quarters=1, types=2), seed=4)
+    engine = create_engine(f"sqlite:///{tmp_path / 'pulse.db'}")
+    manifest = str(tmp_path / "manifest.json")
+    snapshot = str(tmp_path / "snapshot")
+    run_full(engine, ["agg_trans"], root, manifest, workers=1)
+    written = run_incremental(engine, ["agg_trans"], root, manifest, workers=1, snapshot_dir=snapshot)
+    assert written["agg_trans"]["method"] == "parquet"
+    assert_same(ParquetSource(snapshot).filtered("agg_trans"), SQLSource(engine).filtered("agg_trans"))
+    assert run_incremental(engine, ["agg_trans"], root, manifest, workers=1, snapshot_dir=snapshot) == \
+        {"agg_trans": None}
@@ -0,0 +1,154 @@
+"""
+The shared result and figure caches (cache.py): expiry, size bounds, LRU order,
+data-version invalidation and saved build time, driven by a fake clock.
+"""
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import cache
+from cache import FigureCache, LRUCache, TTLCache, sizeof
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=clock.monotonic, perf_counter=clock.monotonic))
+    return clock
+
+
+def _counting(value):
+    calls = []
+
+    def compute():
+        calls.append(value)
+        return value
+    return compute, calls
+
+
+# ----------------------------------
+# TTL CACHE
+# ----------------------------------
+def test_ttl_entries_expire(clock):
+    results = TTLCache(ttl=60)
+    compute, calls = _counting("a")
+    assert results.get_or_compute("k", compute) == "a"
+    clock.now += 59
+    assert results.get_or_compute("k", compute) == "a"
+    clock.now += 1
+    assert results.get_or_compute("k", compute) == "a"
+    assert len(calls) == 2
+    assert results.stats() == {"hits": 1, "misses": 2, "hit_rate": pytest.approx(1 / 3), "entries": 1}
+
+
+def test_ttl_maxsize_drops_expired_then_oldest(clock):
+    results = TTLCache(ttl=60, maxsize=2)
+    results.get_or_compute("old", lambda: 1)
+    clock.now += 30
+    results.get_or_compute("new", lambda: 2)
+    clock.now += 10
+    # Full: "old" is the entry closest to expiry
+    results.get_or_compute("third", lambda: 3)
+    assert set(results._data) == {"new", "third"}
+    clock.now += 100
+    results.get_or_compute("fourth", lambda: 4)
+    # Both expired entries go at once
+    assert set(results._data) == {"fourth"}
+
+
+# ----------------------------------
+# LRU CACHE
+# ----------------------------------
+def _frame(rows):
+    return pd.DataFrame({"value": range(rows)})
+
+
+def test_lru_evicts_least_recently_used_by_bytes(clock):
+    size = sizeof(_frame(100))
+    results = LRUCache(max_bytes=2 * size, ttl=60)
+    results.get_or_compute("a", lambda: _frame(100))
+    results.get_or_compute("b", lambda: _frame(100))
+    results.get_or_compute("a", lambda: _frame(100))    # "a" is now the most recent
+    results.get_or_compute("c", lambda: _frame(100))
+    assert list(results._data) == ["a", "c"]
+    stats = results.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 2 * size
+    # A value larger than the whole budget is returned but never stored
+    assert len(results.get_or_compute("huge", lambda: _frame(1000))) == 1000
+    assert "huge" not in results._data
+
+
+def test_lru_ttl(clock):
+    results = LRUCache(max_bytes=1 << 20, ttl=60)
+    compute, calls = _counting("a")
+    results.get_or_compute("k", compute)
+    clock.now += 61
+    results.get_or_compute("k", compute)
+    assert len(calls) == 2
+    assert results.stats()["entries"] == 1
+
+
+def test_lru_new_version_drops_old_entries(clock):
+    results = LRUCache(max_bytes=1 << 20, ttl=60)
+    compute, calls = _counting("a")
+    results.get_or_compute("k", compute, version=1)
+    results.get_or_compute("k", compute, version=1)
+    results.get_or_compute("k", compute, version=2)
+    assert len(calls) == 2
+    stats = results.stats()
+    assert stats["invalidations"] == 1
+    assert stats["entries"] == 1
+
+
+def test_lru_result_of_a_stale_version_is_not_stored(clock):
+    results = LRUCache(max_bytes=1 << 20, ttl=60)
+
+    def compute_during_reload():
+        # Another session sees the new version while this result is being computed
+        results.get_or_compute("other", lambda: "b", version=2)
+        return "a"
+    assert results.get_or_compute("k", compute_during_reload, version=1) == "a"
+    assert list(results._data) == ["other"]
+    assert results.version == 2
+
+
+# ----------------------------------
+# FIGURE CACHE
+# ----------------------------------
+def _slow_build(clock, figure, seconds):
+    def build():
+        clock.now += seconds
+        return figure
+    return build
+
+
+def test_figure_hits_report_saved_build_time(clock):
+    figures = FigureCache(maxsize=4)
+    assert figures.get_or_build(("map", 1, "dark"), _slow_build(clock, "fig", 2.0)) == "fig"
+    assert figures.get_or_build(("map", 1, "dark"), _slow_build(clock, "other", 2.0)) == "fig"
+    assert figures.get_or_build(("map", 1, "dark"), _slow_build(clock, "other", 2.0)) == "fig"
+    stats = figures.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["build_seconds_total"] == pytest.approx(2.0)
+    assert stats["saved_seconds_total"] == pytest.approx(4.0)
+    # A new data version is a different key, so the old figure is never served for it
+    assert figures.get_or_build(("map", 2, "dark"), _slow_build(clock, "new", 1.0)) == "new"
+
+
+def test_figure_cache_drops_least_recently_used(clock):
+    figures = FigureCache(maxsize=2)
+    figures.get_or_build("a", lambda: 1)
+    figures.get_or_build("b", lambda: 2)
+    figures.get_or_build("a", lambda: 1)
+    figures.get_or_build("c", lambda: 3)
+    assert list(figures._data) == ["a", "c"]
@@ -0,0 +1,79 @@
+"""
+The Analysis chart sections (charts.py): the shared aggregation cube and the
+on-demand rendering of sections (run in Streamlit's bare mode).
+"""
+import pandas as pd
+import pytest
+
+from cache import FigureCache
+from charts import ROWS_COL, build_cube, render_5_charts
+
+AGG_TRANS = pd.DataFrame([
+    ("goa", 2020, 1, "Merchant payments", 10, 1000.0),
+    ("goa", 2020, 1, "Peer-to-peer payments", 5, 500.0),
+    ("kerala", 2020, 1, "Merchant payments", 30, None),
+    ("kerala", 2020, 2, "Merchant payments", 40, 4000.0),
+    ("goa", 2021, 1, "Merchant payments", 20, 2000.0),
+], columns=["state", "year", "quarter", "transaction_type", "transaction_count", "transaction_amount"])
+
+
+def _cube(category_col="transaction_type"):
+    cube = build_cube(AGG_TRANS, category_col, "transaction_count", "transaction_amount")
+    return cube.set_index(["year", "quarter", category_col]).sort_index()
+
+
+# ----------------------------------
+# CUBE
+# ----------------------------------
+def test_cube_matches_a_groupby_of_the_rows():
+    cube = _cube()
+    expected = (AGG_TRANS.groupby(["year", "quarter", "transaction_type"])[["transaction_count", "transaction_amount"]]
+                .sum().sort_index())
+    pd.testing.assert_frame_equal(cube[["transaction_count", "transaction_amount"]], expected)
+    # Charts re-aggregate the cube instead of the rows: totals per category come out the same
+    by_type = cube.groupby("transaction_type")["transaction_amount"].sum()
+    assert by_type["Merchant payments"] == pytest.approx(7000.0)
+
+
+def test_cube_counts_non_null_amounts():
+    # The Average Amount metric divides by rows that have an amount, like DataFrame.mean()
+    cube = _cube()
+    assert cube.loc[(2020, 1, "Merchant payments"), ROWS_COL] == 1
+    assert cube[ROWS_COL].sum() == AGG_TRANS["transaction_amount"].count()
+    average = cube["transaction_amount"].sum() / cube[ROWS_COL].sum()
+    assert average == pytest.approx(AGG_TRANS["transaction_amount"].mean())
+
+
+def test_cube_on_a_period_column():
+    # Falling back to a key column does not group it twice
+    cube = build_cube(AGG_TRANS, "year", "transaction_count", "transaction_amount")
+    assert list(cube.columns) == ["year", "quarter", "transaction_count", "transaction_amount", ROWS_COL]
+    assert len(cube) == 3
+
+
+# ----------------------------------
+# SECTIONS
+# ----------------------------------
+def _render(figures, sections):
+    render_5_charts(AGG_TRANS, "transaction_type", "transaction_count", "transaction_amount", "Transactions",
+                    sections=sections, cache=figures, cache_key=("agg_trans", 1))
+    return {key[-1] for key in figures._data}
+
+
+def test_only_the_chosen_sections_are_built():
+    figures = FigureCache()
+    assert _render(figures, ["Distribution"]) == {"cube", "pie_amount", "pie_count"}
+    # Opening another section reuses the cube and builds only that section's figures
+    assert _render(figures, ["Trends Over Time"]) == {"cube", "pie_amount", "pie_count", "period_data", "line",
+                                                      "stacked_bar"}
+    # Every aggregation and figure was built exactly once
+    assert figures.stats()["misses"] == 6
+    assert _render(figures, []) == _render(figures, ["Data Overview", "Drill Down"])
+
+
+def test_reopening_a_section_builds_nothing():
+    figures = FigureCache()
+    _render(figures, ["Distribution", "Advanced Analytics"])
+    misses = figures.stats()["misses"]
+    _render(figures, ["Distribution", "Advanced Analytics"])
+    assert figures.stats()["misses"] == misses
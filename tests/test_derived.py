@@ -0,0 +1,122 @@
+"""
+Fixed-frame checks for the derived data: growth rates and shares (growth.py)
+and the incremental ingest manifest diff (ingest.diff_files).
+"""
+import json
+import math
+import os
+
+import pandas as pd
+import pytest
+
+from growth import ALL, build_growth_metrics
+from ingest import DATASETS, diff_files
+
+
+# ----------------------------------
+# GROWTH METRICS
+# ----------------------------------
+def _growth_source(rows):
+    return pd.DataFrame(rows, columns=["state", "category", "year", "quarter", "total_count", "total_amount"])
+
+
+def _row(df, state, category, year, quarter):
+    rows = df[(df["state"] == state) & (df["category"] == category)
+              & (df["year"] == year) & (df["quarter"] == quarter)]
+    assert len(rows) == 1
+    return rows.iloc[0]
+
+
+@pytest.fixture
+def growth():
+    # goa skips 2020-Q2; kerala reports every quarter
+    return build_growth_metrics({"agg_trans": _growth_source([
+        ("goa", "Merchant payments", 2020, 1, 10, 1000.0),
+        ("goa", "Merchant payments", 2020, 3, 30, 3000.0),
+        ("goa", "Merchant payments", 2021, 1, 20, 4000.0),
+        ("goa", "Peer-to-peer payments", 2020, 1, 10, 500.0),
+        ("kerala", "Merchant payments", 2020, 1, 30, 3000.0),
+        ("kerala", "Merchant payments", 2020, 2, 40, 4000.0),
+        ("kerala", "Merchant payments", 2020, 3, 60, 6000.0),
+        ("kerala", "Merchant payments", 2021, 1, 60, 6000.0),
+    ])})
+
+
+def test_skipped_quarter_has_no_qoq(growth):
+    # 2020-Q3 follows a missing 2020-Q2, so there is nothing to compare with
+    assert math.isnan(_row(growth, "goa", "Merchant payments", 2020, 3)["count_qoq"])
+    # kerala's Q3 compares with its Q2, not with goa's rows or an earlier quarter
+    assert _row(growth, "kerala", "Merchant payments", 2020, 3)["count_qoq"] == pytest.approx(0.5)
+
+
+def test_yoy_compares_the_same_quarter(growth):
+    row = _row(growth, "goa", "Merchant payments", 2021, 1)
+    assert row["count_yoy"] == pytest.approx(1.0)
+    assert row["amount_yoy"] == pytest.approx(3.0)
+    # The previous row in time is 2020-Q3, three quarters earlier: not a QoQ comparison
+    assert math.isnan(row["count_qoq"])
+
+
+def test_national_rows_and_shares(growth):
+    national = _row(growth, ALL, "Merchant payments", 2020, 1)
+    assert national["total_count"] == 40
+    assert national["total_amount"] == 4000.0
+    assert national["count_share"] == pytest.approx(1.0)
+    assert _row(growth, "goa", "Merchant payments", 2020, 1)["count_share"] == pytest.approx(0.25)
+    assert _row(growth, "kerala", "Merchant payments", 2020, 1)["amount_share"] == pytest.approx(0.75)
+
+
+def test_all_types_rows(growth):
+    goa = _row(growth, "goa", ALL, 2020, 1)
+    assert goa["total_count"] == 20
+    assert goa["ticket_size"] == pytest.approx(75.0)
+    # Share of the all-types national total: 20 of 50 transactions
+    assert goa["count_share"] == pytest.approx(0.4)
+    assert _row(growth, ALL, ALL, 2020, 1)["total_count"] == 50
+
+
+# ----------------------------------
+# MANIFEST DIFF
+# ----------------------------------
+TABLE = "agg_trans"
+
+
+def _write_quarter(root, state, year, quarter, count):
+    path = os.path.join(root, DATASETS[TABLE]["path"], "country", "india", "state", state, str(year),
+                        f"{quarter}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"data": {"transactionData": [
+            {"name": "Merchant payments", "paymentInstruments": [{"type": "TOTAL", "count": count, "amount": 1.0}]},
+        ]}}, f)
+    return path
+
+
+def _keys(changed):
+    return {(state, year, quarter) for _, state, year, quarter in changed}
+
+
+def test_diff_files_new_changed_removed(tmp_path):
+    root = str(tmp_path)
+    _write_quarter(root, "goa", 2020, 1, 10)
+    same = _write_quarter(root, "goa", 2020, 2, 20)
+    gone = _write_quarter(root, "kerala", 2020, 1, 30)
+
+    changed, removed, entries = diff_files(TABLE, root, {})
+    assert _keys(changed) == {("goa", 2020, 1), ("goa", 2020, 2), ("kerala", 2020, 1)}
+    assert removed == []
+    manifest = {TABLE: entries}
+
+    _write_quarter(root, "goa", 2020, 1, 1100)      # content changed
+    _write_quarter(root, "goa", 2021, 1, 40)        # new quarter
+    os.remove(gone)                                 # quarter removed from the checkout
+    stat = os.stat(same)
+    os.utime(same, (stat.st_atime, stat.st_mtime + 10))  # touched, same content
+
+    changed, removed, entries = diff_files(TABLE, root, manifest)
+    assert _keys(changed) == {("goa", 2020, 1), ("goa", 2021, 1)}
+    assert removed == [("kerala", 2020, 1)]
+    assert len(entries) == 3
+
+    # Nothing left to do once the refreshed entries are recorded
+    assert diff_files(TABLE, root, {TABLE: entries})[:2] == ([], [])
@@ -0,0 +1,52 @@
+"""
+The state dimension (geo.py): slug -> GeoJSON name, coordinates and ISO code
+in one merge, with a readable fallback for slugs it does not list.
+"""
+import pandas as pd
+import pytest
+
+from geo import STATE_DIMENSION, attach_state_dimension, format_state_name
+
+
+def test_dimension_is_one_row_per_state():
+    assert len(STATE_DIMENSION) == 36
+    for col in ("state_slug", "state", "iso_code"):
+        assert STATE_DIMENSION[col].is_unique
+    assert STATE_DIMENSION["iso_code"].str.match(r"^IN-[A-Z]{2}$").all()
+    assert STATE_DIMENSION["lat"].between(6, 38).all() and STATE_DIMENSION["lon"].between(68, 98).all()
+
+
+@pytest.mark.parametrize("slug, name", [
+    ("andaman-&-nicobar-islands", "Andaman & Nicobar"),
+    ("dadra-&-nagar-haveli-&-daman-&-diu", "Dadra and Nagar Haveli and Daman and Diu"),
+    ("tamil-nadu", "Tamil Nadu"),
+    # Not in the dimension: title-cased, keeping "&" and the word "and"
+    ("new-state-and-islands", "New State and Islands"),
+    ("andhra-&-new", "Andhra & New"),
+])
+def test_format_state_name(slug, name):
+    assert format_state_name(slug) == name
+
+
+def test_attach_state_dimension():
+    df = pd.DataFrame({
+        "state_slug": ["kerala", "telangana", "new-state", "kerala"],
+        "state": ["stale", "stale", "stale", "stale"],
+        "value": [1, 2, 3, 4],
+    })
+    out = attach_state_dimension(df)
+    # Row order and count are kept; stale name columns are replaced, not suffixed
+    assert out["value"].tolist() == [1, 2, 3, 4]
+    assert list(out.columns) == ["state_slug", "value", "state", "lat", "lon", "iso_code"]
+    assert out["state"].tolist() == ["Kerala", "Telangana", "New State", "Kerala"]
+    assert out.loc[1, "iso_code"] == "IN-TS"
+    assert out.loc[0, "lat"] == pytest.approx(10.8505)
+    # Unknown states have a name but no coordinates, so the map leaves them out
+    assert out.loc[2, ["lat", "lon", "iso_code"]].isna().all()
+
+
+def test_attach_on_another_slug_column():
+    out = attach_state_dimension(pd.DataFrame({"slug": ["goa", "delhi"]}), slug_col="slug")
+    assert out["slug"].tolist() == ["goa", "delhi"]
+    assert out["state"].tolist() == ["Goa", "Delhi"]
+    assert out["iso_code"].tolist() == ["IN-GA", "IN-DL"]
@@ -0,0 +1,120 @@
+"""
+The pre-aggregated drill-down levels (hierarchy.py): period roll-ups, running
+totals, combined datasets and sibling rankings on a fixed frame.
+"""
+import math
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from hierarchy import (ALL_PERIODS, COUNTRY, build_geo_levels, drill_period, fetch_children, refresh_geo_levels,
+                       select_children)
+
+
+def _level(rows, parent=True):
+    columns = (["parent"] if parent else []) + ["name", "year", "quarter", "total_count", "total_amount"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+@pytest.fixture
+def levels():
+    return build_geo_levels({
+        ("transactions", "state"): _level([
+            ("goa", 2020, 1, 10, 1000.0),
+            ("goa", 2020, 2, 20, 2000.0),
+            ("kerala", 2020, 1, 30, 500.0),
+            ("kerala", 2021, 1, 40, 4000.0),
+        ], parent=False),
+        ("insurance", "state"): _level([
+            ("goa", 2020, 1, 1, 100.0),
+            ("kerala", 2020, 1, 2, 3000.0),
+        ], parent=False),
+        # Registered users are a running total: goa's Q2 figure already includes its Q1 users
+        ("users", "district"): _level([
+            ("goa", "north goa", 2020, 1, 100, 10.0),
+            ("goa", "north goa", 2020, 2, 120, 20.0),
+            ("goa", "south goa", 2020, 1, 150, 5.0),
+            ("goa", "south goa", 2021, 1, 90, 8.0),
+        ]),
+        ("users", "pincode"): _level([
+            ("goa", "403001", 2020, 1, 7, None),
+        ]),
+    })
+
+
+def _node(levels, dataset, level, parent, name, year=ALL_PERIODS, quarter=ALL_PERIODS):
+    rows = select_children(levels, dataset, level, parent, year, quarter)
+    rows = rows[rows["name"] == name]
+    assert len(rows) == 1
+    return rows.iloc[0]
+
+
+# ----------------------------------
+# ROLL-UPS
+# ----------------------------------
+def test_flows_sum_over_the_period(levels):
+    assert _node(levels, "transactions", "state", COUNTRY, "goa", 2020)["total_amount"] == 3000.0
+    assert _node(levels, "transactions", "state", COUNTRY, "kerala")["total_count"] == 70
+    assert _node(levels, "transactions", "state", COUNTRY, "goa", 2020, 2)["total_count"] == 20
+
+
+def test_running_totals_take_the_latest_quarter(levels):
+    north = _node(levels, "users", "district", "goa", "north goa", 2020)
+    assert north["total_count"] == 120
+    # App opens are a flow and still sum
+    assert north["total_amount"] == 30.0
+    assert _node(levels, "users", "district", "goa", "south goa")["total_count"] == 90
+    assert _node(levels, "users", "district", "goa", "north goa")["total_count"] == 120
+
+
+def test_payments_combine_transactions_and_insurance(levels):
+    goa = _node(levels, "payments", "state", COUNTRY, "goa", 2020, 1)
+    assert (goa["total_count"], goa["total_amount"]) == (11, 1100.0)
+    assert _node(levels, "payments", "state", COUNTRY, "kerala")["total_amount"] == 7500.0
+
+
+def test_missing_amounts_stay_missing(levels):
+    assert math.isnan(_node(levels, "users", "pincode", "goa", "403001")["total_amount"])
+
+
+# ----------------------------------
+# RANKING AND LOOKUPS
+# ----------------------------------
+def test_siblings_are_ranked(levels):
+    # By amount: kerala leads on all periods, goa in 2020-Q1 transactions
+    assert select_children(levels, "payments", "state", COUNTRY)["name"].tolist() == ["kerala", "goa"]
+    assert select_children(levels, "transactions", "state", COUNTRY, 2020, 1)["name"].tolist() == ["goa", "kerala"]
+    # Users by registered users
+    users = select_children(levels, "users", "district", "goa", 2020)
+    assert users["name"].tolist() == ["south goa", "north goa"]
+    assert users["ranking"].tolist() == [1, 2]
+    assert select_children(levels, "users", "district", "goa", 2020, limit=1)["name"].tolist() == ["south goa"]
+
+
+def test_fetch_children_with_and_without_the_stored_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pulse.db'}")
+    with engine.begin() as conn:
+        pd.DataFrame([
+            ("goa", 2020, 1, "Merchant payments", 10, 1000.0),
+            ("kerala", 2020, 1, "Merchant payments", 30, 3000.0),
+        ], columns=["state", "year", "quarter", "transaction_type", "transaction_count", "transaction_amount"]
+        ).to_sql("agg_trans", conn, index=False)
+    on_the_fly = fetch_children(engine, "transactions", "state", COUNTRY)
+    with engine.begin() as conn:
+        refresh_geo_levels(conn)
+    stored = fetch_children(engine, "transactions", "state", COUNTRY)
+    assert on_the_fly["name"].tolist() == stored["name"].tolist() == ["kerala", "goa"]
+    pd.testing.assert_frame_equal(on_the_fly, stored, check_dtype=False)
+
+
+@pytest.mark.parametrize("year, quarter, key", [
+    ("All", "All", ((ALL_PERIODS, ALL_PERIODS), True)),
+    ("2020", "All", ((2020, ALL_PERIODS), True)),
+    (["2020"], ["3"], ((2020, 3), True)),
+    # Selections the levels do not hold fall back to all periods
+    (["2020", "2021"], "All", ((ALL_PERIODS, ALL_PERIODS), False)),
+    ("All", "2", ((ALL_PERIODS, ALL_PERIODS), False)),
+])
+def test_drill_period(year, quarter, key):
+    assert drill_period(year, quarter) == key
@@ -0,0 +1,177 @@
+"""
+The Pulse JSON ingester (ingest.py): the per-dataset parsers, the walker, the
+process-pool batching and the incremental ingest on a small synthetic tree.
+"""
+import json
+import os
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+import settings
+from ingest import (DATASETS, iter_batches, load_manifest, load_table, parse_files, run_full, run_incremental,
+                    save_manifest, walk_files)
+from synthetic import Scale, write_pulse_tree
+
+SCALE = Scale(states=2, districts=2, pincodes=2, years=1, quarters=2, types=2)
+
+
+def _write_doc(root, table, state, year, quarter, doc):
+    path = os.path.join(root, DATASETS[table]["path"], "country", "india", "state", state, str(year),
+                        f"{quarter}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(doc, f)
+    return path
+
+
+@pytest.fixture(scope="module")
+def pulse_root(tmp_path_factory):
+    root = str(tmp_path_factory.mktemp("pulse"))
+    write_pulse_tree(root, SCALE, seed=1)
+    return root
+
+
+# ----------------------------------
+# PARSERS
+# ----------------------------------
+def test_parse_map_users(tmp_path):
+    root = str(tmp_path)
+    _write_doc(root, "map_user", "goa", 2020, 1, {"data": {"hoverData": {
+        "north goa district": {"registeredUsers": 100, "appOpens": 10},
+        "south goa district": {"registeredUsers": 50, "appOpens": 0},
+    }}})
+    batch = parse_files("map_user", list(walk_files("map_user", root)))
+    assert list(batch) == DATASETS["map_user"]["columns"]
+    assert batch["state"] == ["goa", "goa"]
+    assert batch["quarter"] == [1, 1]
+    assert batch["district"] == ["north goa district", "south goa district"]
+    assert batch["registered_users"] == [100, 50]
+
+
+def test_parse_top_payments_districts_and_pincodes(tmp_path):
+    root = str(tmp_path)
+    metric = {"type": "TOTAL", "count": 5, "amount": 50.0}
+    _write_doc(root, "top_trans", "goa", 2020, 1, {"data": {
+        "districts": [{"entityName": "north goa", "metric": metric}],
+        "pincodes": [{"entityName": "403001", "metric": metric}],
+    }})
+    batch = parse_files("top_trans", list(walk_files("top_trans", root)))
+    assert batch["district"] == ["north goa", None]
+    assert batch["pincode"] == [None, "403001"]
+    assert batch["transaction_count"] == [5, 5]
+
+
+def test_parse_empty_sections(tmp_path):
+    # Early quarters ship "data": null or an empty list
+    root = str(tmp_path)
+    _write_doc(root, "agg_users", "goa", 2018, 1, {"data": {"usersByDevice": None}})
+    _write_doc(root, "agg_trans", "goa", 2018, 1, {"data": None})
+    assert parse_files("agg_users", list(walk_files("agg_users", root)))["state"] == []
+    assert parse_files("agg_trans", list(walk_files("agg_trans", root)))["state"] == []
+
+
+# ----------------------------------
+# WALKER AND BATCHES
+# ----------------------------------
+def test_walk_files_order_and_keys(tmp_path):
+    root = str(tmp_path)
+    doc = {"data": {"transactionData": []}}
+    _write_doc(root, "agg_trans", "kerala", 2020, 1, doc)
+    _write_doc(root, "agg_trans", "goa", 2021, 1, doc)
+    _write_doc(root, "agg_trans", "goa", 2020, 2, doc)
+    notes = os.path.join(os.path.dirname(_write_doc(root, "agg_trans", "goa", 2020, 1, doc)), "README.md")
+    open(notes, "w").close()
+    keys = [(state, year, quarter) for _, state, year, quarter in walk_files("agg_trans", root)]
+    assert keys == [("goa", 2020, 1), ("goa", 2020, 2), ("goa", 2021, 1), ("kerala", 2020, 1)]
+    assert list(walk_files("agg_trans", str(tmp_path / "missing"))) == []
+
+
+def test_parallel_batches_match_serial(pulse_root):
+    serial = parse_files("map_trans", list(walk_files("map_trans", pulse_root)))
+    batches = list(iter_batches("map_trans", pulse_root, workers=2, batch_files=1))
+    # One batch per file, yielded in walker order
+    assert len(batches) == 4
+    merged = {col: [v for batch in batches for v in batch[col]] for col in serial}
+    assert merged == serial
+
+
+def test_progress_reports_every_batch(pulse_root):
+    calls = []
+    list(iter_batches("agg_users", pulse_root, workers=1, batch_files=3,
+                      progress=lambda table, done, total, elapsed: calls.append((table, done, total))))
+    assert calls == [("agg_users", 3, 4), ("agg_users", 4, 4)]
+
+
+@pytest.mark.parametrize("table", list(DATASETS))
+def test_load_table_parallel_equals_serial(pulse_root, table, monkeypatch):
+    serial = load_table(table, pulse_root, workers=1)
+    monkeypatch.setattr(settings, "INGEST_BATCH_FILES", 1)
+    parallel = load_table(table, pulse_root, workers=2)
+    assert len(serial) > 0
+    assert list(serial.columns) == DATASETS[table]["columns"]
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+# ----------------------------------
+# INCREMENTAL INGEST
+# ----------------------------------
+def _agg_trans_doc(count):
+    return {"data": {"transactionData": [
+        {"name": "Merchant payments", "paymentInstruments": [{"type": "TOTAL", "count": count, "amount": 1.0}]},
+    ]}}
+
+
+def _sorted(df):
+    # Plain values: the parsed frame carries the shared categories, the database does not
+    df = df.astype(object)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+@pytest.fixture
+def loaded(tmp_path):
+    """A synthetic tree fully loaded into sqlite; returns (engine, root, manifest path)."""
+    root = str(tmp_path / "pulse")
+    write_pulse_tree(root, SCALE, seed=1)
+    engine = create_engine(f"sqlite:///{tmp_path / 'pulse.db'}")
+    manifest_path = str(tmp_path / "manifest.json")
+    run_full(engine, root=root, manifest_path=manifest_path, workers=1)
+    return engine, root, manifest_path
+
+
+def test_incremental_upserts_changed_new_and_removed_quarters(loaded):
+    engine, root, manifest_path = loaded
+    files = list(walk_files("agg_trans", root))
+    _, state, year, quarter = files[0]
+    _write_doc(root, "agg_trans", state, year, quarter, _agg_trans_doc(7))   # content changed
+    _write_doc(root, "agg_trans", state, year + 1, 1, _agg_trans_doc(8))     # new quarter
+    os.remove(files[-1][0])                                                  # quarter removed
+
+    written = run_incremental(engine, root=root, manifest_path=manifest_path, workers=1)
+    # Only the two re-parsed files are loaded; untouched tables are skipped
+    assert written["agg_trans"]["rows"] == 2
+    assert all(written[table] is None for table in DATASETS if table != "agg_trans")
+
+    # The upserted table matches a full re-parse of the checkout
+    stored = pd.read_sql("SELECT * FROM agg_trans", engine)
+    pd.testing.assert_frame_equal(_sorted(stored), _sorted(load_table("agg_trans", root, workers=1)),
+                                  check_dtype=False)
+    entries = load_manifest(manifest_path)["db"]["agg_trans"]
+    on_disk = {os.path.relpath(file_path, root).replace(os.sep, "/")
+               for file_path, _, _, _ in walk_files("agg_trans", root)}
+    assert set(entries) == on_disk
+
+
+def test_incremental_without_changes_is_a_no_op(loaded):
+    engine, root, manifest_path = loaded
+    written = run_incremental(engine, root=root, manifest_path=manifest_path, workers=1)
+    assert written == {table: None for table in DATASETS}
+
+
+def test_manifest_without_targets_describes_the_database(tmp_path):
+    # Manifests written before targets were tracked were keyed by table directly
+    path = str(tmp_path / "manifest.json")
+    save_manifest({"agg_trans": {"a/goa/2020/1.json": {"mtime": 1.0, "size": 1, "sha256": "x"}}}, path)
+    assert list(load_manifest(path)) == ["db"]
+    assert "agg_trans" in load_manifest(path)["db"]
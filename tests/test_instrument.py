@@ -0,0 +1,112 @@
+"""
+Hot-path timing (instrument.py) and its Prometheus text export (metrics.py).
+"""
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+import instrument
+import metrics
+import settings
+from datasource import SQLSource
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "TIMINGS", True)
+    monkeypatch.setattr(settings, "TIMING_LOG", str(tmp_path / "timings.jsonl"))
+    monkeypatch.setattr(instrument, "_totals", {})
+    monkeypatch.setattr(metrics, "_collectors", {})
+    monkeypatch.setattr(metrics, "_series", {})
+    monkeypatch.setattr(metrics, "_last_write", float("-inf"))
+
+
+@pytest.fixture
+def source(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pulse.db'}")
+    with engine.begin() as conn:
+        pd.DataFrame({"state": ["goa", "kerala"], "year": [2020, 2020], "quarter": [1, 1]}).to_sql(
+            "agg_trans", conn, index=False)
+    return instrument.TimedSource(SQLSource(engine))
+
+
+# ----------------------------------
+# SPANS
+# ----------------------------------
+def test_query_spans_carry_sql_and_rows(source):
+    trace = instrument.start_trace()
+    df = source.filtered("agg_trans", state="goa")
+    assert len(df) == 1
+    (record,) = trace
+    assert (record["kind"], record["name"], record["rows"]) == ("query", "sql.filtered(agg_trans)", 1)
+    assert record["sql"] == ["SELECT * FROM agg_trans WHERE state = ?"]
+    assert record["seconds"] >= 0
+    # Attributes that are not data calls are passed through untimed
+    assert source.name == "sql"
+    assert isinstance(source.pool_stats(), dict)
+    assert len(trace) == 1
+
+
+def test_nested_spans_and_totals():
+    trace = instrument.start_trace()
+    with instrument.span("chart", "pie"):
+        instrument.timed("figure", "pie", lambda: None)
+        instrument.note_sql("SELECT  1")
+    instrument.timed("figure", "pie", lambda: None)
+    assert [(r["kind"], r["name"]) for r in trace] == [("figure", "pie"), ("chart", "pie"), ("figure", "pie")]
+    assert trace[1]["sql"] == ["SELECT 1"]
+    totals = dict((labels["kind"], stats) for labels, stats in instrument.totals())
+    assert totals["figure"]["count"] == 2
+    assert instrument.summarize(trace)["figure"]["count"] == 2
+    # Every span is also appended to the JSON lines log
+    with open(settings.TIMING_LOG) as f:
+        assert [json.loads(line)["kind"] for line in f] == ["figure", "chart", "figure"]
+
+
+def test_pool_work_reports_into_the_render_trace(source):
+    trace = instrument.start_trace()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, source.row_count, "agg_trans") for _ in range(2)]
+        assert [f.result() for f in futures] == [2, 2]
+    assert [r["name"] for r in trace] == ["sql.row_count(agg_trans)"] * 2
+
+
+def test_timings_off(monkeypatch):
+    monkeypatch.setattr(settings, "TIMINGS", False)
+    trace = instrument.start_trace()
+    assert instrument.timed("figure", "pie", lambda: 42) == 42
+    assert trace == []
+    assert instrument.totals() == []
+
+
+# ----------------------------------
+# METRICS
+# ----------------------------------
+def test_prometheus_text():
+    metrics.register("cache", lambda: {"hits": 3, "hit_rate": 0.75, "backend": "sql", "enabled": True})
+    metrics.register_series("span", lambda: [({"kind": "query", "name": 'sql.filtered("x")'},
+                                              {"count": 2, "seconds_total": 0.5})])
+    assert metrics.render_prometheus().splitlines() == [
+        "# TYPE phonepe_cache_hit_rate gauge",
+        "phonepe_cache_hit_rate 0.75",
+        "# TYPE phonepe_cache_hits gauge",
+        "phonepe_cache_hits 3",
+        "# TYPE phonepe_span_count gauge",
+        'phonepe_span_count{kind="query",name="sql.filtered(\\"x\\")"} 2',
+        "# TYPE phonepe_span_seconds_total gauge",
+        'phonepe_span_seconds_total{kind="query",name="sql.filtered(\\"x\\")"} 0.5',
+    ]
+
+
+def test_textfile_is_rate_limited(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_WRITE_INTERVAL", 3600)
+    path = str(tmp_path / "phonepe.prom")
+    metrics.register("cache", lambda: {"hits": 1})
+    assert metrics.maybe_write_textfile(path)
+    assert not metrics.maybe_write_textfile(path)
+    with open(path) as f:
+        assert "phonepe_cache_hits 1" in f.read()
@@ -0,0 +1,77 @@
+"""
+The read pool (datasource.create_db_engine) and SQLSource's per-render
+connection reuse and pool statistics.
+"""
+import threading
+
+import pandas as pd
+import pytest
+
+import settings
+from datasource import SQLSource, create_db_engine
+
+AGG_TRANS = pd.DataFrame([
+    ("goa", 2020, 1, "Merchant payments", 10, 1000.0),
+    ("kerala", 2020, 1, "Merchant payments", 30, 3000.0),
+], columns=["state", "year", "quarter", "transaction_type", "transaction_count", "transaction_amount"])
+
+
+@pytest.fixture
+def source(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pulse.db'}")
+    with engine.begin() as conn:
+        AGG_TRANS.to_sql("agg_trans", conn, index=False)
+    return SQLSource(engine)
+
+
+def test_pool_options_come_from_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 2)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 1)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 3)
+    monkeypatch.setattr(settings, "DB_POOL_RECYCLE", 60)
+    pool = create_db_engine(f"sqlite:///{tmp_path / 'pulse.db'}").pool
+    assert pool.size() == 2
+    assert pool._max_overflow == 1
+    assert pool._timeout == 3
+    assert pool._recycle == 60
+    assert pool._pre_ping is settings.DB_POOL_PRE_PING
+    # In-memory SQLite shares one connection and takes no pool size
+    assert create_db_engine("sqlite://").pool._recycle == 60
+
+
+def test_session_reuses_one_connection(source):
+    with source.session():
+        source.row_count("agg_trans")
+        source.filtered("agg_trans", state="goa")
+        with source.session() as inner:
+            source.table_summary("agg_trans")
+            assert inner is source._local.conn
+    assert source.pool_stats()["checkouts"] == 1
+    # Outside a session every call checks out its own connection
+    source.row_count("agg_trans")
+    source.row_count("agg_trans", state="goa")
+    stats = source.pool_stats()
+    assert stats["checkouts"] == 3
+    assert stats["checkedout"] == 0
+    # All of them reused the connection the fixture opened to load the table
+    assert stats["connects"] == 0
+
+
+def test_sessions_are_per_thread(source):
+    connections = []
+    ready = threading.Barrier(2)
+
+    def render():
+        with source.session() as conn:
+            ready.wait(timeout=5)
+            connections.append(conn)
+            source.row_count("agg_trans")
+    threads = [threading.Thread(target=render) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert connections[0] is not connections[1]
+    stats = source.pool_stats()
+    assert stats["checkouts"] == 2
+    assert stats["wait_seconds_max"] >= 0.0
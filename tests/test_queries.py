@@ -0,0 +1,100 @@
+"""
+The Analysis page's SQL (queries.py): filters pushed into parameterized WHERE
+clauses, paging and the composite index, on a small SQLite table.
+"""
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from queries import (build_filtered_query, ensure_indexes, fetch_filter_options, fetch_filtered, fetch_page,
+                     fetch_row_count, filter_values, quote_identifier)
+
+MAP_USER = pd.DataFrame([
+    ("goa", 2020, 1, "north goa", 100, 10),
+    ("goa", 2020, 2, "north goa", 120, None),
+    ("goa", 2021, 1, "south goa", 70, 8),
+    ("kerala", 2020, 1, "ernakulam", 300, 30),
+    ("kerala", 2021, 2, "idukki", 40, 4),
+], columns=["state", "year", "quarter", "district", "registered_users", "app_opens"])
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pulse.db'}")
+    with engine.begin() as conn:
+        MAP_USER.to_sql("map_user", conn, index=False)
+    return engine
+
+
+def _expected(mask, columns=None):
+    df = MAP_USER.loc[mask, columns or list(MAP_USER.columns)]
+    return df.reset_index(drop=True)
+
+
+# ----------------------------------
+# QUERY TEXT
+# ----------------------------------
+def test_filter_values():
+    assert filter_values("year", "All") is None
+    assert filter_values("state", []) is None
+    assert filter_values("state", ["goa", "All"]) is None
+    assert filter_values("year", "2020") == (2020,)
+    assert filter_values("state", ["goa", "kerala", "goa"]) == ("goa", "kerala")
+
+
+def test_filters_become_bound_parameters():
+    sql, params = build_filtered_query("map_user", ["district", "app_opens"], year=2020, state=["goa", "kerala"])
+    assert sql == ("SELECT district, app_opens FROM map_user "
+                   "WHERE year = :year AND state IN (:state_0, :state_1)")
+    assert params == {"year": 2020, "state_0": "goa", "state_1": "kerala"}
+    sql, params = build_filtered_query("map_user", quarter=1, param_prefix="$")
+    assert sql == "SELECT * FROM map_user WHERE quarter = $quarter"
+
+
+@pytest.mark.parametrize("name", ["map_user; DROP TABLE map_user", "state name", "1year", ""])
+def test_quote_identifier_rejects(name):
+    with pytest.raises(ValueError):
+        quote_identifier(name)
+
+
+# ----------------------------------
+# FETCHES
+# ----------------------------------
+def test_fetch_filtered_matches_pandas(engine):
+    df = fetch_filtered(engine, "map_user", ["state", "district", "registered_users"],
+                        year=2020, state=["goa", "kerala"])
+    pd.testing.assert_frame_equal(df, _expected(MAP_USER["year"] == 2020,
+                                                ["state", "district", "registered_users"]))
+    df = fetch_filtered(engine, "map_user", district="idukki")
+    pd.testing.assert_frame_equal(df, _expected(MAP_USER["district"] == "idukki"), check_dtype=False)
+
+
+def test_values_are_never_interpolated(engine):
+    assert fetch_row_count(engine, "map_user", state="goa' OR '1'='1") == 0
+    assert fetch_row_count(engine, "map_user", state="goa", quarter=["1", "2"]) == 3
+    assert fetch_row_count(engine, "map_user") == len(MAP_USER)
+
+
+def test_fetch_page_sorts_with_nulls_last(engine):
+    first = fetch_page(engine, "map_user", ["state", "app_opens"], sort_by="app_opens", descending=True, limit=2)
+    assert first["app_opens"].tolist() == [30, 10]
+    last = fetch_page(engine, "map_user", ["state", "app_opens"], sort_by="app_opens", descending=True,
+                      offset=4, limit=2)
+    assert len(last) == 1 and last["app_opens"].isna().all()
+
+
+def test_filter_options(engine):
+    options = fetch_filter_options(engine, "map_user")
+    assert options["state"] == ["goa", "kerala"]
+    assert options["year"] == [2020, 2021]
+    assert options["district"] == ["ernakulam", "idukki", "north goa", "south goa"]
+
+
+def test_ensure_indexes_is_idempotent(engine):
+    with engine.begin() as conn:
+        ensure_indexes(conn, "map_user")
+        ensure_indexes(conn, "map_user")
+        ensure_indexes(conn, "missing_table")
+    indexes = inspect(engine).get_indexes("map_user")
+    assert [(ix["name"], ix["column_names"]) for ix in indexes] == \
+        [("ix_map_user_state_year_quarter", ["state", "year", "quarter"])]
@@ -0,0 +1,128 @@
+"""
+The shared Analysis dataset (registry.py): range and district slicing of the
+memory-mapped tables against a plain pandas filter, paging and version swaps.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from datasource import ParquetSource, write_snapshot_table
+from filter_index import PositionIndex, intersect_sorted
+from registry import DatasetRegistry
+from synthetic import Scale, generate_tables
+
+SCALE = Scale(states=3, districts=4, pincodes=2, years=2, quarters=2, types=2)
+STATES = SCALE.state_slugs()
+TABLE = "map_trans"
+
+
+@pytest.fixture(scope="module")
+def source(tmp_path_factory):
+    root = str(tmp_path_factory.mktemp("snapshot"))
+    for table, df in generate_tables(SCALE, seed=5, tables=[TABLE]).items():
+        write_snapshot_table(df, table, root)
+    return ParquetSource(root)
+
+
+@pytest.fixture
+def registry(source, tmp_path):
+    return DatasetRegistry(source, str(tmp_path / "shared"))
+
+
+def _plain(df):
+    df = df[sorted(df.columns)].astype({col: object for col in ("state", "district", "transaction_type")
+                                        if col in df.columns})
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def _expected(source, year="All", quarter="All", state="All", district="All"):
+    df = source.filtered(TABLE)
+    for col, value in (("year", year), ("quarter", quarter), ("state", state), ("district", district)):
+        if value != "All":
+            values = value if isinstance(value, list) else [value]
+            df = df[df[col].astype(object).isin(values)]
+    return df
+
+
+def _district(state, number):
+    return SCALE.district_names(state)[number]
+
+
+# ----------------------------------
+# VIEWS
+# ----------------------------------
+@pytest.mark.parametrize("filters", [
+    {},
+    {"state": STATES[1]},                                  # one range
+    {"state": STATES[1], "year": 2019},                    # one range inside a state
+    {"year": 2018},                                        # one range per state
+    {"state": [STATES[0], STATES[2]], "quarter": [1, 2]},  # multi-select
+    {"district": _district(STATES[2], 1)},                 # positions across every range
+    {"district": [_district(STATES[0], 0), _district(STATES[2], 3)], "year": 2019, "quarter": 2},
+    {"district": _district(STATES[0], 0), "state": STATES[1]},  # district of another state
+    {"year": 1999},
+], ids=lambda filters: ",".join(filters) or "all")
+def test_view_matches_a_pandas_filter(registry, source, filters):
+    expected = _expected(source, **filters)
+    view = registry.view(TABLE, 1, **filters)
+    pd.testing.assert_frame_equal(_plain(view), _plain(expected), check_dtype=False)
+    assert registry.row_count(TABLE, 1, **filters) == len(expected)
+
+
+def test_view_columns(registry, source):
+    view = registry.view(TABLE, 1, columns=["district", "transaction_amount"], state=STATES[0])
+    assert list(view.columns) == ["district", "transaction_amount"]
+    assert view["transaction_amount"].sum() == pytest.approx(
+        _expected(source, state=STATES[0])["transaction_amount"].sum())
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"offset": 5, "limit": 10},
+    {"columns": ["state", "transaction_count"], "state": STATES[1], "limit": 4},
+    {"sort_by": "transaction_amount", "descending": True, "year": 2019, "offset": 2, "limit": 5},
+])
+def test_page_matches_the_source(registry, source, kwargs):
+    pd.testing.assert_frame_equal(
+        registry.page(TABLE, 1, **kwargs).astype(object).reset_index(drop=True),
+        source.page(TABLE, **kwargs).astype(object).reset_index(drop=True),
+    )
+
+
+# ----------------------------------
+# VERSIONS
+# ----------------------------------
+def test_one_build_per_version(registry, tmp_path):
+    registry.view(TABLE, 1)
+    registry.view(TABLE, 1, state=STATES[0])
+    assert registry.builds == 1
+    old_view = registry.view(TABLE, 1)
+
+    registry.view(TABLE, 2)
+    assert registry.builds == 2
+    assert os.listdir(str(tmp_path / "shared")) == ["2"]
+    # A frame handed out before the swap stays readable
+    assert len(old_view) == len(registry.view(TABLE, 2))
+
+    # A second registry (another worker process) maps the file that is already there
+    other = DatasetRegistry(registry.source, registry.root)
+    other.view(TABLE, 2)
+    assert other.builds == 0
+    assert registry.stats()["tables"] == 1
+
+
+# ----------------------------------
+# POSITION INDEX
+# ----------------------------------
+def test_position_index():
+    df = pd.DataFrame({"state": ["goa", "kerala", "goa", "goa", "kerala"], "year": [2020, 2020, 2021, 2020, 2021]})
+    index = PositionIndex(df, ["state", "year"])
+    assert index.lookup(state="All") is None
+    assert index.lookup(state="goa").tolist() == [0, 2, 3]
+    assert index.lookup(state="goa", year="2020").tolist() == [0, 3]
+    assert index.lookup(state=["goa", "kerala"], year=2021).tolist() == [2, 4]
+    assert index.lookup(state="delhi").tolist() == []
+    with pytest.raises(KeyError):
+        index.lookup(district="north goa")
+    assert intersect_sorted(np.array([1, 4, 9]), np.array([0, 1, 2, 9, 12])).tolist() == [1, 9]
@@ -0,0 +1,80 @@
+"""
+Server-side reduction of the scatter, histogram and box plot inputs (sampling.py).
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from sampling import box_figure, box_stats, histogram_counts, stratified_sample
+
+
+@pytest.fixture
+def rows():
+    # Two years of unequal size with one extreme amount each
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "year": np.repeat([2020, 2021], [3000, 1000]),
+        "amount": rng.random(4000) * 100,
+    })
+    df.loc[17, "amount"] = 10_000.0
+    df.loc[3500, "amount"] = -50.0
+    return df
+
+
+# ----------------------------------
+# SAMPLE
+# ----------------------------------
+def test_sample_within_budget_and_proportional(rows):
+    sample = stratified_sample(rows, "year", "amount", budget=400)
+    assert len(sample) <= 402
+    counts = sample["year"].value_counts()
+    assert counts[2020] == pytest.approx(300, abs=2)
+    assert counts[2021] == pytest.approx(100, abs=2)
+    # Original rows, in their original order
+    assert sample.index.is_monotonic_increasing
+    pd.testing.assert_frame_equal(sample, rows.loc[sample.index])
+
+
+def test_sample_keeps_extremes(rows):
+    sample = stratified_sample(rows, "year", "amount", budget=40)
+    assert {17, 3500} <= set(sample.index)
+    for _, group in rows.groupby("year"):
+        assert group["amount"].idxmax() in sample.index
+        assert group["amount"].idxmin() in sample.index
+
+
+def test_small_frames_are_not_sampled(rows):
+    assert stratified_sample(rows, "year", "amount", budget=len(rows)) is rows
+
+
+# ----------------------------------
+# HISTOGRAM AND BOX
+# ----------------------------------
+def test_histogram_counts_every_row_on_shared_edges(rows):
+    hist = histogram_counts(rows, "amount", "year", bins=20)
+    assert len(hist) == 40
+    assert hist.groupby("year")["count"].sum().to_dict() == {2020: 3000, 2021: 1000}
+    edges = hist.groupby("year")["bin_start"].apply(list)
+    assert edges[2020] == edges[2021]
+    assert hist["bin_start"].min() == -50.0 and hist["bin_end"].max() == 10_000.0
+
+
+def test_histogram_without_values():
+    hist = histogram_counts(pd.DataFrame({"year": [2020], "amount": [np.nan]}), "amount", "year")
+    assert hist.empty
+    assert list(hist.columns) == ["year", "bin_start", "bin_end", "bin_mid", "count"]
+
+
+def test_box_stats_match_numpy():
+    df = pd.DataFrame({"state": ["goa"] * 9 + ["kerala"] * 4,
+                       "amount": [1, 2, 3, 4, 5, 6, 7, 8, 100, 10, 20, 30, 40]})
+    stats = box_stats(df, "state", "amount").set_index("state")
+    goa = df.loc[df["state"] == "goa", "amount"]
+    q1, median, q3 = np.quantile(goa, [0.25, 0.5, 0.75])
+    assert (stats.loc["goa", "q1"], stats.loc["goa", "median"], stats.loc["goa", "q3"]) == (q1, median, q3)
+    # 100 lies beyond q3 + 1.5 * IQR: the whisker stops at the largest value inside
+    assert stats.loc["goa", "upperfence"] == 8
+    assert stats.loc["goa", "max"] == 100
+    assert stats.loc["kerala", "lowerfence"] == 10 and stats.loc["kerala", "upperfence"] == 40
+    fig = box_figure(stats.reset_index(), "state", "amount", title="Amount")
+    assert [trace.name for trace in fig.data] == ["goa", "kerala"]
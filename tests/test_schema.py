@@ -0,0 +1,70 @@
+"""
+The compact column types (schema.py): declared dtypes, shared category
+dictionaries and what happens to values the declarations do not cover.
+"""
+import pandas as pd
+
+from schema import SHARED_CATEGORIES, apply_schema, memory_stats
+
+MAP_TRANS = pd.DataFrame({
+    "state": ["goa", "kerala", "goa"],
+    "year": [2020, 2020, 2021],
+    "quarter": [1, 2, 1],
+    "district": ["north goa", "ernakulam", "north goa"],
+    "transaction_type": ["TOTAL", "TOTAL", "TOTAL"],
+    "transaction_count": [3_000_000_000, 5, 7],
+    "transaction_amount": [1.5, 2.5, 3.5],
+})
+
+
+def test_declared_dtypes():
+    df = apply_schema(MAP_TRANS, "map_trans")
+    assert df["year"].dtype == "int16"
+    assert df["quarter"].dtype == "int8"
+    # A state's quarterly count does not fit in int32
+    assert df["transaction_count"].dtype == "int64"
+    assert df["transaction_count"].iloc[0] == 3_000_000_000
+    assert df["transaction_amount"].dtype == "float64"
+    assert isinstance(df["district"].dtype, pd.CategoricalDtype)
+    # The input frame is left as it was
+    assert MAP_TRANS["year"].dtype == "int64"
+
+
+def test_shared_categories_have_the_same_codes_everywhere():
+    # Two frames holding different states still agree on every state's code
+    goa = apply_schema(MAP_TRANS[MAP_TRANS["state"] == "goa"], "map_trans")
+    kerala = apply_schema(MAP_TRANS[MAP_TRANS["state"] == "kerala"], "map_trans")
+    assert goa["state"].dtype == kerala["state"].dtype == SHARED_CATEGORIES["state"]
+    # ...so they concatenate without falling back to object columns
+    both = pd.concat([goa, kerala], ignore_index=True)
+    assert both["state"].dtype == SHARED_CATEGORIES["state"]
+    assert (both["state"] == "kerala").sum() == 1
+
+
+def test_unknown_values_are_kept():
+    df = MAP_TRANS.assign(transaction_type=["TOTAL", "Crypto payments", None])
+    typed = apply_schema(df, "map_trans")
+    assert typed["transaction_type"].tolist()[:2] == ["TOTAL", "Crypto payments"]
+    assert typed["transaction_type"].isna().iloc[2]
+    categories = list(typed["transaction_type"].cat.categories)
+    assert categories == sorted(categories)
+
+
+def test_pincodes_and_missing_counts():
+    df = pd.DataFrame({"state": ["goa", "goa"], "year": [2020, 2020], "quarter": [1, 1],
+                       "district": [None, None], "pincode": [403001, 403002],
+                       "registered_users": [10, None]})
+    typed = apply_schema(df, "top_users")
+    # Pincodes read back as numbers become strings, missing counts stay missing
+    assert typed["pincode"].tolist() == ["403001", "403002"]
+    assert typed["registered_users"].dtype == "Int32"
+    assert typed["registered_users"].isna().iloc[1]
+
+
+def test_unknown_tables_and_memory_stats():
+    assert apply_schema(MAP_TRANS, "no_such_table") is MAP_TRANS
+    rows = pd.concat([MAP_TRANS] * 1000, ignore_index=True)
+    apply_schema(rows, "map_trans")
+    stats = memory_stats()
+    assert stats["map_trans_rows"] == len(rows)
+    assert stats["map_trans_bytes_after"] < stats["map_trans_bytes_before"]
@@ -0,0 +1,69 @@
+"""
+The Home map's state rollup (queries.build_state_rollup and its snapshot and
+DuckDB counterparts) on a two-quarter fixture.
+"""
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from datasource import DuckDBSource, ParquetSource, build_snapshot_state_rollup, write_snapshot_table
+from queries import build_state_rollup
+
+MAP_USER = pd.DataFrame([
+    # registered_users is a running total: goa's 2020-Q2 figures include its 2020-Q1 users
+    ("goa", 2020, 1, "north goa", 100, 10),
+    ("goa", 2020, 1, "south goa", 50, 5),
+    ("goa", 2020, 2, "north goa", 120, 20),
+    ("goa", 2020, 2, "south goa", 70, 8),
+    # kerala has not reported 2020-Q2 yet, so its latest quarter is 2020-Q1
+    ("kerala", 2020, 1, "ernakulam", 300, 30),
+], columns=["state", "year", "quarter", "district", "registered_users", "app_opens"])
+
+AGG_TRANS = pd.DataFrame([
+    ("goa", 2020, 1, "Merchant payments", 10, 1000.0),
+    ("goa", 2020, 2, "Merchant payments", 20, 2000.0),
+    ("kerala", 2020, 1, "Merchant payments", 30, 3000.0),
+], columns=["state", "year", "quarter", "transaction_type", "transaction_count", "transaction_amount"])
+
+
+def _sql_rollup(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rollup.db'}")
+    with engine.begin() as conn:
+        MAP_USER.to_sql("map_user", conn, index=False)
+        AGG_TRANS.to_sql("agg_trans", conn, index=False)
+        return build_state_rollup(conn)
+
+
+def _write_snapshot(tmp_path):
+    root = str(tmp_path / "snapshot")
+    write_snapshot_table(MAP_USER, "map_user", root)
+    write_snapshot_table(AGG_TRANS, "agg_trans", root)
+    return root
+
+
+def _parquet_rollup(tmp_path):
+    return build_snapshot_state_rollup(ParquetSource(_write_snapshot(tmp_path)))
+
+
+def _duckdb_rollup(tmp_path):
+    pytest.importorskip("duckdb")
+    return DuckDBSource(_write_snapshot(tmp_path)).state_rollup()
+
+
+@pytest.fixture(params=[_sql_rollup, _parquet_rollup, _duckdb_rollup], ids=["sql", "parquet", "duckdb"])
+def rollup(request, tmp_path):
+    return request.param(tmp_path).set_index("state_slug")
+
+
+def test_registered_users_take_the_latest_quarter(rollup):
+    assert rollup.loc["goa", "registered_users"] == 190
+    assert rollup.loc["kerala", "registered_users"] == 300
+
+
+def test_flows_sum_every_quarter(rollup):
+    assert rollup.loc["goa", "app_opens"] == 43
+    assert rollup.loc["goa", "trans_count"] == 30
+    assert rollup.loc["goa", "total_value"] == pytest.approx(3000.0)
+    # Names and centroids come from the state dimension
+    assert rollup.loc["kerala", "state"] == "Kerala"
+    assert rollup.loc["kerala", "ins_amount"] == 0